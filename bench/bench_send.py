@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+bench_send.py
+Per-recipient message serialization cost for a ~100KB newsletter.
+
+Compares building a MIMEMultipart and calling as_string() for every envelope
+(the old send path) with mailer.PreparedMessage, which encodes the HTML once
+and only stamps per-recipient headers.
+
+Usage:
+    python3 bench/bench_send.py
+    python3 bench/bench_send.py --size-kb 250 --recipients 2000
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "email"))
+from mailer import PreparedMessage  # noqa: E402
+
+SUBJECT = "📰 FizzBuzz — Yale's Daily Digest"
+FROM = "FizzBuzz <news@example.com>"
+
+
+def synthetic_newsletter(size_kb: int) -> str:
+    """Table-heavy, inlined-style HTML roughly like compiled MJML output."""
+    rng = random.Random(0)
+    rows = []
+    total = 0
+    while total < size_kb * 1024:
+        words = " ".join(
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(40)
+        )
+        row = (
+            '<tr><td align="left" style="font-size:0px;padding:0 0 12px 0;word-break:break-word;">'
+            '<div style="font-family:\'Open Sans\', Arial, sans-serif;font-size:14px;line-height:1.6;'
+            f'text-align:left;color:#0e0e14;">{words} — “quoted” 💀</div></td></tr>\n'
+        )
+        rows.append(row)
+        total += len(row.encode("utf-8"))
+    return "<!doctype html><html><body><table>" + "".join(rows) + "</table></body></html>"
+
+
+def old_build(html: str, rcpt: str) -> str:
+    msg = MIMEMultipart("alternative")
+    msg["From"] = FROM
+    msg["To"] = rcpt
+    msg["Subject"] = SUBJECT
+    msg.attach(MIMEText(html, "html"))
+    return msg.as_string()
+
+
+def timed(fn, recipients):
+    start = time.perf_counter()
+    size = 0
+    for r in recipients:
+        size = len(fn(r))
+    return (time.perf_counter() - start) / len(recipients), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-recipient MIME serialization")
+    parser.add_argument("--size-kb", type=int, default=100, help="HTML body size (default: 100)")
+    parser.add_argument("--recipients", type=int, default=500, help="Envelopes to build (default: 500)")
+    args = parser.parse_args()
+
+    html = synthetic_newsletter(args.size_kb)
+    recipients = [f"reader{i}@example.com" for i in range(args.recipients)]
+    print(f"HTML body: {len(html.encode('utf-8')) / 1024:.0f} KB, {len(recipients)} recipients")
+
+    per_old, size_old = timed(lambda r: old_build(html, r), recipients)
+
+    start = time.perf_counter()
+    prepared = PreparedMessage(html, SUBJECT, FROM, list_unsubscribe="mailto:unsub@example.com?subject={email}")
+    prep_once = time.perf_counter() - start
+    per_new, size_new = timed(lambda r: prepared.for_recipients([r]), recipients)
+
+    print(f"  MIMEMultipart + as_string per recipient: {per_old * 1e3:8.3f} ms  ({size_old / 1024:.0f} KB msg)")
+    print(f"  PreparedMessage one-time encode:         {prep_once * 1e3:8.3f} ms")
+    print(f"  PreparedMessage per recipient:           {per_new * 1e3:8.3f} ms  ({size_new / 1024:.0f} KB msg)")
+    print(f"  Speedup per recipient: {per_old / per_new:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
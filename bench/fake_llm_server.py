@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+fake_llm_server.py
+A local Anthropic-protocol server (POST /v1/messages, plain and streamed)
+with injectable failures, for exercising email/llm_client.py.
+
+Replies are canned and deterministic: a small editorial plan for the
+analysis calls, and the five delimited blocks (or one SECTION, or the frame
+blocks) for the writing calls. When asked to continue an interrupted
+reply, it resumes the same canned text exactly where the assistant turn
+stopped. A max_tokens smaller than the reply cuts it off with stop_reason
+"max_tokens", as the real API does.
+
+Failures, each drawn per request with --seed:
+    --fail-rate       HTTP 500 api_error before any output
+    --overload-rate   HTTP 529 overloaded_error
+    --drop-rate       a stream is cut (TCP closed mid-body) halfway through
+
+Usage:
+    python3 bench/fake_llm_server.py --port 8765 --fail-rate 0.2 --drop-rate 0.3
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=test FIZZ_LLM_JOURNAL=/tmp/journal \\
+        python3 email/generate-email.py --force all
+
+    python3 bench/fake_llm_server.py --check      # run llm_client against it in-process
+"""
+
+import argparse
+import json
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PLAN = {
+    "sections": [
+        {"title": f"Storyline {n}", "pitch": "A canned storyline.", "section_type": "other",
+         "posts": [f"post snippet {n}"], "suggested_components": ["pull_quote"], "engagement_score": 100 - n}
+        for n in range(1, 6)
+    ],
+    "images_to_annotate": [],
+    "potd_candidate": {"text": "canned post of the day", "likes": 42, "why": "canned"},
+    "unknown_slang": [],
+    "edition_memory_draft": "[2025-01-01] Section I: canned",
+}
+NOTES = {"clusters": [{"title": "Storyline 1", "pitch": "A canned storyline.", "section_type": "other",
+                       "cluster_ids": [], "posts": ["post snippet 1"], "engagement_score": 99}],
+         "images": [], "potd_candidates": [], "unknown_slang": []}
+
+
+def _section(n: int) -> str:
+    body = " ".join(f"<p>Paragraph {p} of canned section {n}, long enough to stream in several pieces.</p>"
+                    for p in range(1, 9))
+    return f'<fb-section color="pink" label="Section {n} — Canned">\n  <fb-title>Canned <em>{n}</em></fb-title>\n  {body}\n</fb-section>'
+
+
+FRAME = {
+    "TICKER": "CANNED ONE <span>///</span> CANNED TWO",
+    "POTD": '<fb-potd likes="42 likes" annotation="canned">canned post of the day</fb-potd>',
+    "FOOTER_EXCEPT": "Except the canned parts.",
+    "EDITION_MEMORY": "[2025-01-01] Section I: canned | Section II: canned",
+    "UNKNOWN_SLANG": "",
+}
+
+
+def canned_reply(system: str, prompt: str) -> str:
+    """The full reply for a request, by which pipeline call it looks like."""
+    if "valid JSON" in system:
+        return json.dumps(NOTES if '"cluster_ids"' in prompt else PLAN)
+    if "ONE SECTION ONLY" in prompt:
+        return f"<!--SECTION-->\n{_section(1)}\n<!--/SECTION-->"
+    frame = "".join(f"<!--{name}-->{text}<!--/{name}-->\n" for name, text in FRAME.items() if name != "POTD")
+    if "EVERYTHING BUT THE SECTIONS" in prompt:
+        return frame + f"<!--POTD-->{FRAME['POTD']}<!--/POTD-->\n"
+    sections = "\n<fb-zigzag/>\n".join([_section(n) for n in range(1, 6)] + [FRAME["POTD"]])
+    ticker, rest = frame.split("\n", 1)
+    return f"{ticker}\n<!--SECTIONS-->\n{sections}\n<!--/SECTIONS-->\n{rest}"
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeServer"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _event(self, name: str, body: dict) -> None:
+        self._chunk(f"event: {name}\ndata: {json.dumps(body)}\n\n".encode("utf-8"))
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/v1/messages"):
+            return self._json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        fault = self.server.draw_fault(bool(request.get("stream")))
+        if fault == "fail":
+            return self._json(500, {"type": "error", "error": {"type": "api_error", "message": "Injected failure"}})
+        if fault == "overload":
+            return self._json(529, {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}})
+
+        messages = request.get("messages", [])
+        first_prompt = _text(messages[0]["content"]) if messages else ""
+        reply = canned_reply(_text(request.get("system", "")), first_prompt)
+        # An interrupted reply resumes where the assistant turn stopped
+        if len(messages) >= 3 and messages[-2]["role"] == "assistant":
+            done = _text(messages[-2]["content"])
+            reply = reply[len(done):] if reply.startswith(done) else reply
+        input_tokens = sum(len(_text(m["content"])) for m in messages) // 4
+        stop_reason = "end_turn"
+        limit = int(request.get("max_tokens", 1 << 30)) * 4
+        if len(reply) > limit:
+            reply, stop_reason = reply[:limit], "max_tokens"
+        usage_out = len(reply) // 4
+
+        if not request.get("stream"):
+            return self._json(200, {
+                "id": "msg_fake", "type": "message", "role": "assistant", "model": request.get("model"),
+                "content": [{"type": "text", "text": reply}], "stop_reason": stop_reason, "stop_sequence": None,
+                "usage": {"input_tokens": input_tokens, "output_tokens": usage_out},
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self._event("message_start", {"type": "message_start", "message": {
+            "id": "msg_fake", "type": "message", "role": "assistant", "model": request.get("model"), "content": [],
+            "stop_reason": None, "stop_sequence": None, "usage": {"input_tokens": input_tokens, "output_tokens": 0}}})
+        self._event("content_block_start", {"type": "content_block_start", "index": 0,
+                                            "content_block": {"type": "text", "text": ""}})
+        pieces = [reply[i:i + self.server.chunk_chars] for i in range(0, len(reply), self.server.chunk_chars)]
+        for i, piece in enumerate(pieces):
+            if fault == "drop" and i == len(pieces) // 2:
+                # Close the socket mid-body, without the terminating chunk
+                self.connection.shutdown(socket.SHUT_RDWR)
+                self.close_connection = True
+                return
+            self._event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                "delta": {"type": "text_delta", "text": piece}})
+            if self.server.delay:
+                time.sleep(self.server.delay)
+        self._event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._event("message_delta", {"type": "message_delta", "delta": {"stop_reason": stop_reason,
+                                                                         "stop_sequence": None},
+                                      "usage": {"output_tokens": usage_out}})
+        self._event("message_stop", {"type": "message_stop"})
+        self._chunk(b"")
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, fail_rate=0.0, overload_rate=0.0, drop_rate=0.0, seed=0,
+                 chunk_chars=40, delay=0.0, verbose=False):
+        super().__init__(("127.0.0.1", port), FakeHandler)
+        self.rates = (("fail", fail_rate), ("overload", overload_rate))
+        self.drop_rate = drop_rate
+        self.chunk_chars = chunk_chars
+        self.delay = delay
+        self.verbose = verbose
+        self.rng = random.Random(seed)
+        self.counts = {"requests": 0, "fail": 0, "overload": 0, "drop": 0}
+        self._lock = threading.Lock()
+
+    def draw_fault(self, stream: bool) -> str | None:
+        with self._lock:
+            self.counts["requests"] += 1
+            for name, rate in self.rates + ((("drop", self.drop_rate),) if stream else ()):
+                if self.rng.random() < rate:
+                    self.counts[name] += 1
+                    return name
+        return None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+def check(args) -> None:
+    """Drive llm_client.ResilientClient against the server with faults injected."""
+    import anthropic
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "email"))
+    import llm_client
+
+    llm_client.BASE_DELAY = 0.05        # keep the backoff short for a quick check
+    server = FakeServer(0, args.fail_rate, args.overload_rate, args.drop_rate, args.seed, args.chunk_chars)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    with tempfile.TemporaryDirectory() as journal:
+        llm_client.os.environ["FIZZ_LLM_JOURNAL"] = journal
+        client = llm_client.ResilientClient(
+            anthropic.Anthropic(api_key="test", base_url=server.url, max_retries=0),
+            max_attempts=args.attempts,
+            breaker=llm_client.CircuitBreaker(threshold=args.attempts + 1, cooldown=1),
+        )
+        writing = [{"role": "user", "content": "Write the newsletter."}]
+        expected = canned_reply("", "Write the newsletter.")
+        ok = 0
+        for i in range(args.requests):
+            response = client.messages.create(model="fake", max_tokens=8000, system="Output ONLY valid JSON",
+                                              messages=[{"role": "user", "content": f"plan {i}"}])
+            assert json.loads(response.content[0].text) == PLAN
+            with client.messages.stream(model="fake", max_tokens=96000, messages=writing) as s:
+                text = "".join(s.text_stream)
+                final = s.get_final_message()
+            assert text == expected, "resumed stream differs from the uninterrupted reply"
+            assert final.stop_reason == "end_turn"
+            ok += 1
+        leftover = list(Path(journal).iterdir())
+    server.shutdown()
+    c = server.counts
+    print(f"{ok}/{args.requests} create + stream pairs correct over {c['requests']} HTTP requests "
+          f"({c['fail']} failures, {c['overload']} overloads, {c['drop']} dropped streams injected)")
+    if leftover:
+        sys.exit(f"Journal files left behind: {leftover}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Anthropic-protocol server with injectable failures")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered 500")
+    parser.add_argument("--overload-rate", type=float, default=0.0, help="Fraction of requests answered 529")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of streams cut halfway")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-chars", type=int, default=40, help="Characters per streamed delta")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds between streamed deltas")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    parser.add_argument("--check", action="store_true",
+                        help="Run llm_client against an in-process server instead of serving")
+    parser.add_argument("--requests", type=int, default=20, help="--check: create + stream pairs (default: 20)")
+    parser.add_argument("--attempts", type=int, default=8, help="--check: client attempts per request")
+    args = parser.parse_args()
+
+    if args.check:
+        if not (args.fail_rate or args.overload_rate or args.drop_rate):
+            args.fail_rate, args.overload_rate, args.drop_rate = 0.15, 0.1, 0.4
+        check(args)
+        return
+
+    server = FakeServer(args.port, args.fail_rate, args.overload_rate, args.drop_rate, args.seed,
+                        args.chunk_chars, args.delay, args.verbose)
+    print(f"Fake Anthropic-protocol server on {server.url} (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"[{server.counts}]")
+
+
+if __name__ == "__main__":
+    main()
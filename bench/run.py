@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+run.py
+Benchmark the pipeline's non-LLM stages on synthetic datasets.
+
+For each dataset size, bench/synth.py writes a posts-db.json into a scratch
+data dir and a matching synthetic writing-pass output, then these stages are
+timed (best of --repeat runs) and measured for peak Python heap
+(tracemalloc, one extra run):
+
+    sanitize           sanitize.main(): load window, build rows, write CSV + map
+    match_post_links   fuzzy-match quotes and inline links to post IDs
+    expand_shorthand   fb-* tags -> MJML
+    compile_mjml       npx mjml on the filled template (skipped without mjml;
+                       its memory is the node subprocess, not measured)
+
+Results are compared with bench/baseline.json; any stage slower or larger
+than the baseline by more than the tolerance fails the run (exit 1).
+A run with nothing to compare against (no baseline, or none of its
+results in it) exits 2 unless --no-baseline-ok is given. Baselines are
+machine-specific: record one on the box that runs the benchmarks with
+--save-baseline.
+
+Usage:
+    python3 bench/run.py                          # 1k, 10k, 100k
+    python3 bench/run.py --sizes 1k,10k,100k,1m   # 1M needs a few GB of RAM
+    python3 bench/run.py --stages sanitize --sizes 100k --repeat 5
+    python3 bench/run.py --save-baseline
+    python3 bench/run.py --no-baseline-ok         # report only, e.g. on a new machine
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from importlib.util import spec_from_file_location, module_from_spec
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+EMAIL_DIR = ROOT / "email"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+STAGES = ("sanitize", "match_post_links", "expand_shorthand", "compile_mjml")
+DEFAULT_SIZES = "1k,10k,100k"
+
+TIME_TOLERANCE = 0.25       # fail if a stage is >25% slower than baseline ...
+TIME_FLOOR = 0.02           # ... and by more than this many seconds (timer noise)
+MEMORY_TOLERANCE = 0.10     # fail if peak heap is >10% above baseline ...
+MEMORY_FLOOR_MB = 1.0       # ... and by more than this many MB
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * scale)
+
+
+def size_label(n: int) -> str:
+    if n >= 1_000_000 and n % 1_000_000 == 0:
+        return f"{n // 1_000_000}m"
+    if n >= 1_000 and n % 1_000 == 0:
+        return f"{n // 1_000}k"
+    return str(n)
+
+
+def measure(fn, repeat: int) -> dict:
+    """Best wall time over `repeat` runs, then peak traced heap from one more."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(min(times), 6), "peak_mb": round(peak / 1e6, 3)}
+
+
+def quiet(fn):
+    """Run fn with its progress prints discarded."""
+    def wrapper():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return wrapper
+
+
+def mjml_available() -> bool:
+    try:
+        result = subprocess.run(["npx", "--no-install", "mjml", "--version"],
+                                capture_output=True, timeout=20)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+
+def compare(results: dict, baseline: dict, time_tol: float, mem_tol: float) -> list[str]:
+    """Regression messages for results that exceed the baseline."""
+    problems = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if res["seconds"] > base["seconds"] * (1 + time_tol) and res["seconds"] - base["seconds"] > TIME_FLOOR:
+            problems.append(f"{key}: {res['seconds']:.4f}s vs baseline {base['seconds']:.4f}s")
+        if (res["peak_mb"] > base["peak_mb"] * (1 + mem_tol)
+                and res["peak_mb"] - base["peak_mb"] > MEMORY_FLOOR_MB):
+            problems.append(f"{key}: {res['peak_mb']:.1f} MB peak vs baseline {base['peak_mb']:.1f} MB")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic data")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Comma-separated post counts, k/m suffixes allowed (default: {DEFAULT_SIZES})")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help=f"Comma-separated stages to run (default: all: {','.join(STAGES)})")
+    parser.add_argument("--repeat", type=int, default=None,
+                        help="Timed runs per stage, best is kept (default: 3; 1 for sizes >= 100k)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write these results into the baseline instead of comparing")
+    parser.add_argument("--no-baseline-ok", action="store_true",
+                        help="Exit 0 when there is no baseline to compare with (first runs)")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE,
+                        help=f"Allowed slowdown as a fraction (default: {TIME_TOLERANCE})")
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE,
+                        help=f"Allowed peak-memory growth as a fraction (default: {MEMORY_TOLERANCE})")
+    parser.add_argument("--json", type=Path, default=None, help="Also write results to this file")
+    args = parser.parse_args()
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    scratch = Path(tempfile.mkdtemp(prefix="fizz-bench-"))
+    try:
+        run(args, sizes, stages, scratch)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def run(args, sizes: list[int], stages: list[str], scratch: Path) -> None:
+    # Set before the pipeline modules are imported: they read their paths at import
+    os.environ["FIZZ_DATA_DIR"] = str(scratch)
+    os.environ["FIZZ_NONINTERACTIVE"] = "1"
+    sys.path.insert(0, str(EMAIL_DIR))
+    sys.path.insert(0, str(BENCH_DIR))
+
+    import sanitize
+    from stage_cache import StageCache
+    from synth import generate_posts, synthetic_raw_output, write_posts_db
+    spec = spec_from_file_location("generate_email", EMAIL_DIR / "generate-email.py")
+    gen = module_from_spec(spec)
+    spec.loader.exec_module(gen)
+
+    have_mjml = "compile_mjml" in stages and mjml_available()
+    if "compile_mjml" in stages and not have_mjml:
+        print("[compile_mjml skipped: mjml not installed (npm install mjml)]")
+    template = (EMAIL_DIR / "input" / "template.mjml").read_text(encoding="utf-8")
+
+    results = {}
+    print(f"{'stage':<18} {'posts':>7} {'seconds':>10} {'peak MB':>9}")
+    for n in sizes:
+        label = size_label(n)
+        repeat = args.repeat or (3 if n < 100_000 else 1)
+        write_posts_db(generate_posts(n, seed=args.seed), scratch / "posts-db.json")
+
+        # Always produce the CSV and map; later stages read them
+        run_sanitize = quiet(lambda: sanitize.main(StageCache(force=["sanitize"])))
+        if "sanitize" in stages:
+            results[f"sanitize@{label}"] = measure(run_sanitize, repeat)
+        else:
+            run_sanitize()
+
+        post_text_map = json.loads(sanitize.POST_TEXT_MAP_PATH.read_text(encoding="utf-8"))
+        raw = synthetic_raw_output(post_text_map, seed=args.seed)
+        sections_raw = gen.extract_block(raw, "SECTIONS")
+        matched = quiet(lambda: gen.match_post_links(sections_raw, sanitize.POST_TEXT_MAP_PATH))()
+        expanded = gen.expand_shorthand(matched)
+
+        if "match_post_links" in stages:
+            results[f"match_post_links@{label}"] = measure(
+                quiet(lambda: gen.match_post_links(sections_raw, sanitize.POST_TEXT_MAP_PATH)), repeat)
+        if "expand_shorthand" in stages:
+            results[f"expand_shorthand@{label}"] = measure(lambda: gen.expand_shorthand(matched), repeat)
+        if have_mjml:
+            mjml_source = (template
+                           .replace("{{TICKER_CONTENT}}", gen.extract_block(raw, "TICKER"))
+                           .replace("{{SECTIONS}}", expanded)
+                           .replace("{{FOOTER_EXCEPT}}", gen.extract_block(raw, "FOOTER_EXCEPT")))
+            results[f"compile_mjml@{label}"] = measure(quiet(lambda: gen.compile_mjml(mjml_source)), repeat)
+
+        for key, res in results.items():
+            if key.endswith(f"@{label}"):
+                print(f"{key.split('@')[0]:<18} {label:>7} {res['seconds']:>10.4f} {res['peak_mb']:>9.1f}",
+                      flush=True)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.is_file() else {}
+    if args.save_baseline:
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"\n[Baseline saved: {args.baseline} ({len(results)} results)]")
+        return
+    compared = sum(1 for key in results if key in baseline)
+    if not compared:
+        # A regression check that compared nothing must not pass silently
+        found = "No baseline" if not baseline else "No results matching the baseline"
+        print(f"\n[{found} at {args.baseline}; record one with --save-baseline]")
+        if not args.no_baseline_ok:
+            sys.exit(2)
+        return
+
+    problems = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    if problems:
+        print(f"\nREGRESSION ({len(problems)} of {compared} compared):")
+        for line in problems:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\n[No regressions against {args.baseline.name} ({compared} compared)]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+synth.py
+Synthetic Fizz datasets for the benchmarks.
+
+generate_posts() builds posts-db.json posts with the shape the scrapers
+write: heavy-tailed like counts, reFizz chains (quote-reposts of posts that
+may themselves be reFizzes, plus reFizzes of comments), media with
+thumbnails, named and verified identities, and relative-time words for the
+sanitize annotator. synthetic_raw_output() builds a writing-pass output
+(TICKER / SECTIONS / FOOTER_EXCEPT / EDITION_MEMORY / UNKNOWN_SLANG) whose
+quotes and inline links are drawn from a post-text map, so post matching
+has real work to do.
+
+Everything is seeded, so the same size always produces the same data.
+
+Usage:
+    python3 bench/synth.py --posts 100000 --out /tmp/bench/posts-db.json
+"""
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+
+WORDS = (
+    "yale sterling bass library commons dining hall pset midterm final section ta "
+    "professor seminar lecture econ cs stats orgo bio premed consulting banking "
+    "internship recruiting frat party tang rager dorm suite roommate froco dean "
+    "college master housing lottery east rock wall street chapel toad's shuttle "
+    "snow rain cold heat spring fall formal dhall brunch coffee matcha gym payne "
+    "whitney crew football harvard princeton tea drama crush situationship ex "
+    "ghosted texted dm'd anonymous fizz upvote downvote meme ratio"
+).split()
+SLANG = "lowkey deadass mogging glazing cooked touse chud atp fr ngl tbh".split()
+RELATIVE = ["tonight", "tomorrow", "tmrw", "this weekend", "this friday", "later today", "rn", "right now"]
+COLLEGES = ["BK", "TD", "Saybrook", "Pierson", "JE", "Davenport", "Morse", "Stiles", "Berkeley", "Grace Hopper"]
+ORGS = ["YCC", "Yale Dining", "YPU", "WYBC", "Yale Daily News", "Dwight Hall", "Yale Athletics"]
+
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    words = rng.choices(WORDS, k=n_words)
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(SLANG))
+    if rng.random() < 0.12:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(RELATIVE))
+    return " ".join(words)
+
+
+def _text(rng: random.Random) -> str:
+    text = _sentence(rng, rng.randint(4, 40))
+    if rng.random() < 0.15:
+        text += "\n" + _sentence(rng, rng.randint(3, 20))
+    return text
+
+
+def _identity(rng: random.Random) -> dict:
+    roll = rng.random()
+    if roll < 0.01:
+        return {"name": rng.choice(ORGS), "communityID": "Yale", "verified": True}
+    if roll < 0.03:
+        return {"name": f"{rng.choice(WORDS).title()} {rng.choice(COLLEGES)}", "communityID": "Yale",
+                "verified": False}
+    return {"name": "Anonymous", "communityID": "Yale", "verified": False}
+
+
+def _media(rng: random.Random, post_id: str) -> list[dict]:
+    if rng.random() >= 0.15:
+        return []
+    items = []
+    for i in range(rng.choice((1, 1, 1, 2, 3))):
+        url = f"https://cdn.example.com/media/{post_id}/{i}.jpg?sig={rng.getrandbits(64):016x}"
+        item = {"type": "image", "signedUrl": url}
+        if rng.random() < 0.5:
+            item["thumbnail"] = {"signedUrl": url.replace(".jpg", "_thumb.jpg")}
+        items.append(item)
+    return items
+
+
+def generate_posts(n: int, seed: int = 0, now: float | None = None, days: float = 10) -> list[dict]:
+    """n synthetic posts spread over the last `days` days, oldest first."""
+    rng = random.Random(seed)
+    now = time.time() if now is None else now
+    start = now - days * 86400
+    posts = []
+    for i in range(n):
+        post_id = f"p{seed:02d}{i:08d}{rng.getrandbits(32):08x}"
+        post = {
+            "postID": post_id,
+            "date": start + (i + rng.random()) * (days * 86400 / n),
+            "text": _text(rng),
+            "likesMinusDislikes": int(rng.paretovariate(1.3)) - 1 - (rng.random() < 0.1) * rng.randint(1, 20),
+            "commentCount": int(rng.paretovariate(1.6)) - 1,
+            "identity": _identity(rng),
+            "media": _media(rng, post_id),
+            "_scrapedAt": int(now * 1000),
+            "_source": rng.choice(("top-feed", "crawl", "live")),
+        }
+        # reFizz of an earlier post (which may itself be a reFizz) or of a comment
+        roll = rng.random()
+        if posts and roll < 0.06:
+            parent = posts[rng.randrange(max(0, len(posts) - 5000), len(posts))]
+            post["reFizz"] = {
+                "postID": parent["postID"],
+                "text": parent["text"],
+                "likesMinusDislikes": parent["likesMinusDislikes"],
+            }
+            post["reFizzContentType"] = "post"
+        elif roll < 0.08:
+            post["reFizz"] = {
+                "postID": f"c{rng.getrandbits(48):012x}",
+                "text": _sentence(rng, rng.randint(3, 20)),
+                "likesMinusDislikes": int(rng.paretovariate(1.5)),
+            }
+            post["reFizzContentType"] = "comment"
+        posts.append(post)
+    return posts
+
+
+def write_posts_db(posts: list[dict], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"lastUpdated": None, "posts": posts}, f)
+
+
+def _snippet(rng: random.Random, text: str, words: int) -> str:
+    parts = text.split()
+    if len(parts) <= words:
+        return text
+    start = rng.randrange(len(parts) - words)
+    return " ".join(parts[start:start + words])
+
+
+def synthetic_raw_output(post_text_map: dict, sections: int = 8, seed: int = 0) -> str:
+    """A writing-pass output quoting posts from post_text_map."""
+    rng = random.Random(seed)
+    # Values are textnorm entries (older maps: plain strings)
+    texts = [v["text"] if isinstance(v, dict) else v for v in post_text_map.values()] or ["nothing happened today"]
+    colors = ["pink", "lime", "blue", "orange", "yellow"]
+    blocks = []
+    for s in range(sections):
+        body = []
+        for _ in range(rng.randint(2, 4)):
+            para = _sentence(rng, rng.randint(25, 60))
+            snippet = _snippet(rng, rng.choice(texts), rng.randint(4, 8)).replace('"', "")
+            para += f' <a post="{snippet}">{_sentence(rng, 4)}</a> ' + _sentence(rng, rng.randint(10, 30))
+            body.append(f"<p>{para}</p>")
+        quote = _snippet(rng, rng.choice(texts), rng.randint(8, 25))
+        components = [
+            f'<fb-quote attribution="{rng.randint(5, 900)} likes">{quote}</fb-quote>',
+        ]
+        if s % 3 == 0:
+            components.append(
+                f'<fb-stats><fb-stat color="lime">{rng.randint(2, 99)}% {_sentence(rng, 2)}</fb-stat>'
+                f'<fb-stat color="pink">{rng.randint(2, 500)} {_sentence(rng, 2)}</fb-stat></fb-stats>'
+            )
+        if s % 3 == 1:
+            components.append(f'<fb-camp name="{_sentence(rng, 2)}" color="{rng.choice(colors)}">'
+                              f'{_sentence(rng, 30)}</fb-camp>')
+        if s % 4 == 2:
+            components.append(f'<fb-image src="https://cdn.example.com/media/{s}.jpg" '
+                              f'alt="{_sentence(rng, 3)}" caption="{_sentence(rng, 3)}" size="half" />')
+        blocks.append(
+            f'<fb-section color="{colors[s % len(colors)]}" label="{_sentence(rng, 2)}">\n'
+            f"<fb-title>{_sentence(rng, 6)}</fb-title>\n" + "\n".join(body) + "\n" + "\n".join(components)
+            + "\n</fb-section>"
+        )
+    potd = _snippet(rng, max(texts, key=len), 20)
+    sections_raw = "\n<fb-zigzag/>\n".join(blocks) + (
+        f'\n<fb-potd likes="{rng.randint(100, 2000)}" annotation="{_sentence(rng, 8)}">{potd}</fb-potd>'
+    )
+    ticker = " • ".join(_sentence(rng, 5) for _ in range(6))
+    memory = " | ".join(_sentence(rng, 3) for _ in range(sections))
+    return (
+        f"<!--TICKER-->{ticker}<!--/TICKER-->\n"
+        f"<!--SECTIONS-->\n{sections_raw}\n<!--/SECTIONS-->\n"
+        f"<!--FOOTER_EXCEPT-->{_sentence(rng, 12)}<!--/FOOTER_EXCEPT-->\n"
+        f"<!--EDITION_MEMORY-->[2026-01-01] {memory}<!--/EDITION_MEMORY-->\n"
+        f"<!--UNKNOWN_SLANG-->{', '.join(rng.sample(SLANG, 3))}<!--/UNKNOWN_SLANG-->\n"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic posts-db.json")
+    parser.add_argument("--posts", type=int, default=10_000, help="Number of posts (default: 10000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, required=True, help="Output posts-db.json path")
+    args = parser.parse_args()
+
+    posts = generate_posts(args.posts, seed=args.seed)
+    write_posts_db(posts, args.out)
+    print(f"Wrote {len(posts):,} posts to {args.out} ({args.out.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -55,19 +55,66 @@ TEST_EMAIL="${TEST_EMAIL_RECIPIENT:-}"
 
 # ── Parse arguments ──────────────────────────────────────────────────────────
 MODE="interactive"
-for arg in "$@"; do
+AUTO_ARGS=()
+FORCE_STAGES=()
+PROFILE_MODE=""
+while [ $# -gt 0 ]; do
+  arg="$1"
   case "$arg" in
     --auto) MODE="auto" ;;
+    --force)
+      FORCE_STAGES+=("${2:?--force needs a stage name}")
+      shift
+      ;;
+    --profile=*) PROFILE_MODE="${arg#--profile=}" ;;
+    --profile)
+      case "${2:-}" in
+        cpu|mem|all|cpu,mem|mem,cpu) PROFILE_MODE="$2"; shift ;;
+        *) PROFILE_MODE="cpu" ;;
+      esac
+      ;;
     --help|-h)
-      echo "Usage: daily-email.sh [--auto]"
+      echo "Usage: daily-email.sh [--auto [pipeline options]]"
       echo ""
       echo "  (default)   Interactive mode — walk through each step with prompts"
-      echo "  --auto      Automatic mode (WIP)"
+      echo "  --auto      Automatic mode — run email/pipeline.py unattended"
+      echo "  --force STAGE   Re-run a cached stage (sanitize, glossary, analysis,"
+      echo "                  annotation, writing, assembly, all); repeatable, works in both modes"
+      echo "  --profile [MODE]  Profile every Python step into logs/ (cpu, mem, all;"
+      echo "                  default cpu); works in both modes"
+      echo ""
+      echo "Pipeline options (auto mode only):"
+      echo "  --scrape top-feed|crawl|both|none   (default: \$AUTO_SCRAPE or top-feed)"
+      echo "  --send none|test|list               (default: \$AUTO_SEND or test)"
+      echo "  --fresh                             ignore today's checkpoint"
       exit 0
       ;;
+    *) AUTO_ARGS+=("$arg") ;;
   esac
+  shift
 done
 
+# Pipeline options have no interactive equivalent (the prompts choose the
+# scrape and send); refuse them rather than silently run without them
+if [ "$MODE" = "interactive" ] && [ ${#AUTO_ARGS[@]} -gt 0 ]; then
+  echo "daily-email.sh: ${AUTO_ARGS[*]}: pipeline options only work with --auto" >&2
+  echo "  (--force and --profile work in both modes; see --help)" >&2
+  exit 2
+fi
+
+# Stage-cache overrides reach every Python step through the environment
+if [ ${#FORCE_STAGES[@]} -gt 0 ]; then
+  FIZZ_FORCE="$(IFS=,; echo "${FORCE_STAGES[*]}")"
+  export FIZZ_FORCE
+fi
+
+# So do profiling hooks; every profile from this run shares the log's timestamp
+if [ -n "$PROFILE_MODE" ]; then
+  FIZZ_PROFILE="$PROFILE_MODE"
+  FIZZ_RUN_TIMESTAMP="$TIMESTAMP"
+  export FIZZ_PROFILE FIZZ_RUN_TIMESTAMP
+fi
+
 # ══════════════════════════════════════════════════════════════════════════════
 # INTERACTIVE MODE
 # ══════════════════════════════════════════════════════════════════════════════
@@ -81,7 +128,7 @@ interactive_mode() {
   echo "  [1] crawl.mjs   — graph crawler (slower, more thorough)"
   echo "  [2] top-feed.mjs — top weekly feed (fast, curated)"
   echo "  [3] both"
-  echo "  [s] skip"
+  echo "  [s] skip (e.g. live-scrape.js is already feeding the DB)"
   echo -n "  Choice [2]: " | tee -a "$LOG_FILE"
   read -r scrape_choice
   echo "$scrape_choice" >> "$LOG_FILE"
@@ -218,7 +265,7 @@ interactive_mode() {
     if ask_yn "Send the email to the full mailing list ($recipient_count recipients)?"; then
       log "Sending to mailing list..."
       cd "$PROJECT_DIR/email"
-      run python3 send.py --file "$LATEST_EMAIL"
+      run python3 send.py --list --file "$LATEST_EMAIL"
       log "Mailing list send complete."
     else
       log "Skipped mailing list send."
@@ -233,13 +280,23 @@ interactive_mode() {
 }
 
 # ══════════════════════════════════════════════════════════════════════════════
-# AUTO MODE (WIP)
+# AUTO MODE
 # ══════════════════════════════════════════════════════════════════════════════
+# Stages, concurrency and checkpoint/resume live in email/pipeline.py; a
+# failed run can simply be re-run and picks up where it stopped.
 auto_mode() {
-  log "=== FizzBuzz Daily Email — Auto Mode (WIP) ==="
-  log "Auto mode is not yet implemented."
-  log "Use interactive mode (no flags) for now."
-  log "=== Done ==="
+  log "=== FizzBuzz Daily Email — Auto Mode ==="
+  log "Log file: $LOG_FILE"
+
+  cd "$PROJECT_DIR/email"
+  if run python3 pipeline.py ${AUTO_ARGS[@]+"${AUTO_ARGS[@]}"}; then
+    log "=== FizzBuzz Daily Email — Done ==="
+  else
+    log "Pipeline failed — re-run with --auto to resume from the failed stage."
+    log "Log saved to: $LOG_FILE"
+    exit 1
+  fi
+  log "Log saved to: $LOG_FILE"
 }
 
 # ── Run ──────────────────────────────────────────────────────────────────────
@@ -7,6 +7,8 @@ Usage:
     python3 assemble.py                          # uses latest fizz_raw_*.html
     python3 assemble.py --file email/output/fizz_raw_20260228_153608.html
     python3 assemble.py --template email/input/template.mjml  # custom template
+    python3 assemble.py --force assembly         # ignore the stage cache
+    python3 assemble.py --profile                # cProfile into logs/
 
 Assembly logic lives in generate-email.py; this script is a thin CLI wrapper.
 """
@@ -15,12 +17,15 @@ import glob
 import argparse
 import platform
 import subprocess
-import sys
 from pathlib import Path
 
 # Import shared assembly logic from generate-email.py
 from importlib.util import spec_from_file_location, module_from_spec
 
+from paths import DATA_DIR, INPUT_DIR, OUTPUT_DIR, input_file
+from profiling import add_profile_argument, run_main
+from stage_cache import StageCache, add_force_argument, fingerprint
+
 _SCRIPT_DIR = Path(__file__).resolve().parent
 _ROOT = _SCRIPT_DIR.parent
 
@@ -31,18 +36,78 @@ _spec.loader.exec_module(_mod)
 assemble_html = _mod.assemble_html
 extract_block = _mod.extract_block
 
+DEFAULT_TEMPLATE = input_file("template.mjml")
+
 
 def find_latest_raw() -> Path:
-    pattern = str(_SCRIPT_DIR / "output" / "fizz_raw_*.html")
+    pattern = str(OUTPUT_DIR / "fizz_raw_*.html")
     files = sorted(glob.glob(pattern))
     if not files:
         raise FileNotFoundError(
-            "No fizz_raw_*.html files found in email/output/. "
+            f"No fizz_raw_*.html files found in {OUTPUT_DIR}. "
             "Run generate-email.py --raw first."
         )
     return Path(files[-1])
 
 
+def assemble_file(raw_path: Path, template_path: Path = DEFAULT_TEMPLATE,
+                  raw_output: str | None = None, cache: StageCache | None = None) -> Path:
+    """Assemble one raw file into fizz_email_*.html and return its path.
+
+    Pass raw_output to skip re-reading a raw file that is already in memory.
+    The compiled HTML is reused from the stage cache when the raw output,
+    template, post links, editor's note, issue info and assembly code are
+    all unchanged. HTML with post links that could not be resolved (a failed
+    token refresh or share URL) is written but not cached, so the next run
+    tries the links again.
+    """
+    cache = cache or StageCache()
+    print(f"Raw input:  {raw_path.name}")
+    print(f"Template:   {template_path.name}")
+
+    if raw_output is None:
+        raw_output = raw_path.read_text(encoding="utf-8")
+    mjml_template = template_path.read_text(encoding="utf-8")
+
+    # Derive output name from raw file: fizz_raw_... -> fizz_email_...
+    out_name = raw_path.name.replace("fizz_raw_", "fizz_email_")
+    output_path = OUTPUT_DIR / out_name
+
+    key = fingerprint(
+        raw_output, mjml_template,
+        DATA_DIR / "post-text-map.json",
+        INPUT_DIR / "editors-note.json",
+        _mod.build_issue_info(),
+        _SCRIPT_DIR / "generate-email.py",
+        _SCRIPT_DIR / "textnorm.py",
+    )
+    cached = cache.get("assembly", key)
+    if cached is not None:
+        final_html = cached["html"]
+        if output_path.is_file() and output_path.read_text(encoding="utf-8") == final_html:
+            print(f"Output:     {output_path} (unchanged)")
+            return output_path
+    else:
+        assembled = assemble_html(raw_output, mjml_template)
+        if assembled is None:
+            blocks = ["TICKER", "SECTIONS", "FOOTER_EXCEPT"]
+            missing = [b for b in blocks if extract_block(raw_output, b) is None]
+            raise ValueError(
+                f"Could not find delimited blocks in {raw_path.name}: {', '.join(missing)}"
+            )
+        final_html, unresolved = assembled
+        if unresolved:
+            print(f"[Assembly not cached: {len(unresolved)} post link(s) unresolved]")
+        else:
+            cache.put("assembly", key, {"html": final_html})
+
+    output_path.write_text(final_html, encoding="utf-8")
+    print(f"[Assembly OK]")
+    print(f"Output:     {output_path}")
+    print(f"Chars:      {len(final_html):,}")
+    return output_path
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Assemble a raw AI output file with the MJML template"
@@ -59,6 +124,8 @@ def main():
         default=None,
         help="Path to the MJML template (default: email/input/template.mjml)",
     )
+    add_force_argument(parser)
+    add_profile_argument(parser)
     args = parser.parse_args()
 
     # Resolve raw file
@@ -78,36 +145,15 @@ def main():
         if not template_path.is_absolute():
             template_path = _ROOT / template_path
     else:
-        template_path = _SCRIPT_DIR / "input" / "template.mjml"
+        template_path = DEFAULT_TEMPLATE
 
     if not template_path.is_file():
         raise FileNotFoundError(f"Template not found: {template_path}")
 
-    print(f"Raw input:  {raw_path.name}")
-    print(f"Template:   {template_path.name}")
-
-    raw_output = raw_path.read_text(encoding="utf-8")
-    mjml_template = template_path.read_text(encoding="utf-8")
-
-    final_html = assemble_html(raw_output, mjml_template)
-    if final_html is None:
-        blocks = ["TICKER", "SECTIONS", "FOOTER_EXCEPT"]
-        missing = [b for b in blocks if extract_block(raw_output, b) is None]
-        raise ValueError(
-            f"Could not find delimited blocks in {raw_path.name}: {', '.join(missing)}"
-        )
-
-    # Derive output name from raw file: fizz_raw_... -> fizz_email_...
-    out_name = raw_path.name.replace("fizz_raw_", "fizz_email_")
-    output_path = _SCRIPT_DIR / "output" / out_name
-
-    output_path.write_text(final_html, encoding="utf-8")
-    print(f"[Assembly OK]")
-    print(f"Output:     {output_path}")
-    print(f"Chars:      {len(final_html):,}")
+    output_path = assemble_file(raw_path, template_path, cache=StageCache(force=args.force))
 
     # Prompt to open in browser
-    if sys.stdin.isatty():
+    if _mod._is_interactive():
         try:
             answer = input("Open in browser? [y/N] ").strip().lower()
         except EOFError:
@@ -121,4 +167,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_main("assemble", main)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+crawl_graph.py
+Clusters posts using the similar-posts graph that crawl.mjs records.
+
+crawl.mjs saves every get-similar-posts answer as an edge {from, to} in
+crawl-results.json. This module loads those edges for a set of posts (the
+sanitize window) into a compact CSR adjacency, two flat int arrays, then
+groups posts with one of two methods:
+
+    components   connected components: posts reachable through any chain of
+                 similar-post links (coarse; one big story can swallow others)
+    lpa          label propagation: each post repeatedly takes the label most
+                 common among its neighbours, so densely linked groups settle
+                 on their own label even when a few bridges join them (default)
+
+Edges are treated as undirected. A link reported from both ends counts twice
+in label propagation. Only edges between two posts of the set are used, so
+a cluster never leans on a post outside the window.
+
+The graph file is CRAWL_OUTPUT_FILE, resolved against scraping/ the way
+crawl.mjs resolves it, defaulting to scraping/crawl-results.json.
+
+Usage:
+    from crawl_graph import load_graph
+    graph = load_graph(keep=window_post_ids)
+    labels = graph.label_propagation() if graph else {}
+
+    python3 crawl_graph.py                     # cluster stats for the last 7 days
+    python3 crawl_graph.py --method components --days 3 --top 15
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+
+from paths import ROOT_DIR
+
+SCRAPING_DIR = ROOT_DIR / "scraping"
+
+
+def graph_path() -> Path:
+    """Where crawl.mjs writes its posts + edges file."""
+    value = os.environ.get("CRAWL_OUTPUT_FILE")
+    if not value:
+        return SCRAPING_DIR / "crawl-results.json"
+    path = Path(value).expanduser()
+    return path if path.is_absolute() else (SCRAPING_DIR / path).resolve()
+
+
+def load_edges(path: Path) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("edges", [])
+
+
+class CrawlGraph:
+    """Undirected post graph in CSR form.
+
+    Node i is ids[i]; its neighbours are indices[indptr[i]:indptr[i + 1]].
+    """
+
+    def __init__(self, ids: list[str], indptr: array, indices: array):
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_edges(cls, edges, keep=None) -> "CrawlGraph":
+        """Build from {"from", "to"} dicts, keeping only edges inside `keep` (if given)."""
+        index: dict[str, int] = {}
+        ids: list[str] = []
+        if keep is not None:
+            for post_id in keep:
+                if post_id not in index:
+                    index[post_id] = len(ids)
+                    ids.append(post_id)
+
+        src, dst = array("l"), array("l")
+        seen = set()
+        for edge in edges:
+            a, b = edge.get("from"), edge.get("to")
+            if not a or not b or a == b or (a, b) in seen:
+                continue
+            if keep is not None and (a not in index or b not in index):
+                continue
+            seen.add((a, b))
+            for post_id in (a, b):
+                if post_id not in index:
+                    index[post_id] = len(ids)
+                    ids.append(post_id)
+            src.append(index[a])
+            dst.append(index[b])
+
+        # Counting sort of both directions into CSR
+        n = len(ids)
+        degree = [0] * (n + 1)
+        for i in src:
+            degree[i + 1] += 1
+        for i in dst:
+            degree[i + 1] += 1
+        for i in range(n):
+            degree[i + 1] += degree[i]
+        indptr = array("l", degree)
+        indices = array("l", [0]) * degree[n]
+        fill = degree[:n]
+        for a, b in zip(src, dst):
+            indices[fill[a]] = b
+            fill[a] += 1
+            indices[fill[b]] = a
+            fill[b] += 1
+        return cls(ids, indptr, indices)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices) // 2
+
+    def neighbors(self, i: int) -> array:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def components(self) -> dict[str, int]:
+        """postID -> component label (the lowest node index in the component)."""
+        n = len(self.ids)
+        label = array("l", [-1]) * n
+        indptr, indices = self.indptr, self.indices
+        for start in range(n):
+            if label[start] != -1:
+                continue
+            label[start] = start
+            stack = [start]
+            while stack:
+                i = stack.pop()
+                for k in range(indptr[i], indptr[i + 1]):
+                    j = indices[k]
+                    if label[j] == -1:
+                        label[j] = start
+                        stack.append(j)
+        return dict(zip(self.ids, label))
+
+    def label_propagation(self, max_iter: int = 30, seed: int = 0) -> dict[str, int]:
+        """postID -> community label by asynchronous label propagation.
+
+        Nodes are visited in a seeded random order, so the result is
+        reproducible. A node keeps its label on a tie that includes it,
+        otherwise takes the smallest of the tied labels.
+        """
+        n = len(self.ids)
+        label = array("l", range(n))
+        indptr, indices = self.indptr, self.indices
+        order = [i for i in range(n) if indptr[i + 1] > indptr[i]]
+        rng = random.Random(seed)
+        for _ in range(max_iter):
+            rng.shuffle(order)
+            changed = 0
+            for i in order:
+                counts = Counter(label[j] for j in indices[indptr[i]:indptr[i + 1]])
+                best = max(counts.values())
+                if counts.get(label[i]) == best:
+                    continue
+                label[i] = min(lab for lab, c in counts.items() if c == best)
+                changed += 1
+            if not changed:
+                break
+        return dict(zip(self.ids, label))
+
+    def clusters(self, method: str = "lpa") -> dict[str, int]:
+        if method == "components":
+            return self.components()
+        if method == "lpa":
+            return self.label_propagation()
+        raise ValueError(f"Unknown clustering method '{method}' (components or lpa)")
+
+
+def load_graph(path: Path | None = None, keep=None) -> CrawlGraph | None:
+    """The crawl graph restricted to `keep`, or None if there is no crawl file."""
+    path = path or graph_path()
+    if not path.is_file():
+        return None
+    return CrawlGraph.from_edges(load_edges(path), keep=keep)
+
+
+def number_clusters(labels: dict[str, int], post_ids, weight=None, min_size: int = 2) -> dict[str, int]:
+    """Renumber raw labels 1..k over `post_ids`, heaviest cluster first.
+
+    Only clusters with at least `min_size` of the given posts get a number;
+    weight(postID) (default 1 each) orders them, ties by size.
+    """
+    weight = weight or (lambda _: 1)
+    members: dict[int, list[str]] = {}
+    for post_id in post_ids:
+        if post_id in labels:
+            members.setdefault(labels[post_id], []).append(post_id)
+    groups = [ids for ids in members.values() if len(ids) >= min_size]
+    groups.sort(key=lambda ids: (sum(weight(p) for p in ids), len(ids)), reverse=True)
+    return {post_id: number for number, ids in enumerate(groups, 1) for post_id in ids}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster recent posts over the crawl's similar-posts graph")
+    parser.add_argument("--method", choices=("lpa", "components"), default="lpa")
+    parser.add_argument("--days", type=float, default=7, help="Window to cluster (default: 7)")
+    parser.add_argument("--top", type=int, default=10, help="Clusters to print (default: 10)")
+    parser.add_argument("--file", type=Path, default=None,
+                        help="crawl-results.json (default: $CRAWL_OUTPUT_FILE or scraping/crawl-results.json)")
+    args = parser.parse_args()
+
+    path = args.file or graph_path()
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    cutoff = time.time() - args.days * 86400
+    posts = {p["postID"]: p for p in data.get("posts", []) if p.get("date", 0) >= cutoff}
+
+    start = time.perf_counter()
+    graph = CrawlGraph.from_edges(data.get("edges", []), keep=posts)
+    labels = graph.clusters(args.method)
+    numbered = number_clusters(labels, posts, weight=lambda p: max(posts[p].get("likesMinusDislikes", 0), 0))
+    elapsed = time.perf_counter() - start
+
+    sizes = Counter(numbered.values())
+    print(f"{path}: {len(posts):,} posts in the last {args.days:g} days, "
+          f"{graph.edge_count:,} edges between them")
+    print(f"[{args.method}: {len(sizes)} clusters covering {sum(sizes.values()):,} posts, "
+          f"{len(posts) - sum(sizes.values()):,} unclustered, {elapsed:.2f}s]")
+    for number in sorted(sizes)[:args.top]:
+        ids = sorted((p for p, c in numbered.items() if c == number),
+                     key=lambda p: posts[p].get("likesMinusDislikes", 0), reverse=True)
+        lead = posts[ids[0]].get("text", "").replace("\n", " ")
+        print(f"  #{number:<3} {sizes[number]:>4} posts  {lead[:90]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+dedup.py
+Near-duplicate detection for posts with MinHash signatures and LSH banding.
+
+Many Fizz posts are near-copies: reposts, copypasta, the "can we get the
+big X" template. Each text is lowercased and stripped to letters, digits
+and single spaces. It is then cut into overlapping SHINGLE-byte character
+shingles and summarised by a NUM_PERM-value MinHash signature. Two texts
+agree on a signature position with probability equal to the Jaccard
+similarity of their shingle sets.
+
+Signatures are split into BANDS bands. Texts that agree on a whole band
+land in the same bucket and become candidates. A candidate is kept when
+its signatures agree on at least `threshold` of the positions. Candidates
+are then merged transitively into groups. With 8 bands of 8 rows, pairs
+around 0.77 Jaccard have a 50% chance of becoming candidates, and pairs
+above 0.9 almost always do.
+
+The hashing runs in NumPy over all texts of a chunk at once, so 100k posts
+take a few seconds. NumPy is optional for the pipeline. Without it
+sanitize.py skips this step.
+
+Usage:
+    from dedup import near_duplicate_groups
+    groups = near_duplicate_groups(texts)    # [[i, j, ...], ...] index lists, size >= 2
+"""
+
+import re
+
+SHINGLE = 5             # characters per shingle (bytes of normalized UTF-8)
+NUM_PERM = 64           # MinHash signature length
+BANDS = 8               # LSH bands (NUM_PERM / BANDS rows each)
+CHUNK = 10_000          # texts hashed per NumPy batch (bounds memory)
+
+# Bytes-level normalization: ASCII letters lowercased, ASCII digits and
+# non-ASCII bytes (accents, emoji) kept, other ASCII bytes become spaces.
+# NUL is preserved as the separator between texts.
+_NORMALIZE = bytes(
+    b if b == 0 or b >= 0x80 or chr(b).isalnum() else 0x20
+    for b in bytes(range(256)).lower()
+)
+_SPACES_RE = re.compile(rb" {2,}")
+
+
+def available() -> bool:
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def normalize(text: str) -> str:
+    """The text as the shingler sees it."""
+    data = text.replace("\0", " ").encode("utf-8").translate(_NORMALIZE)
+    return _SPACES_RE.sub(b" ", data).strip().decode("utf-8")
+
+
+def estimate_tokens(text: str) -> int:
+    """Same rough chars/4 estimate generate-email.py uses for prompts."""
+    return len(text) // 4
+
+
+def _hash_params(np, seed: int):
+    rng = np.random.default_rng(seed)
+    # Multiply-shift hashing: odd 64-bit multipliers, take the high 32 bits
+    a = rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+    band_mix = rng.integers(1, 2**63, size=NUM_PERM // BANDS, dtype=np.uint64) | np.uint64(1)
+    return a, b, band_mix
+
+
+def _pack(np, data) -> "np.ndarray":
+    """Every SHINGLE-byte window of a uint8 array, packed exactly into uint64s.
+
+    Data shorter than a shingle has no windows (an empty array).
+    """
+    n_windows = max(len(data) - SHINGLE + 1, 0)
+    packed = np.zeros(n_windows, dtype=np.uint64)
+    for k in range(SHINGLE):
+        packed |= data[k:k + n_windows].astype(np.uint64) << np.uint64(8 * k)
+    return packed
+
+
+def _signatures(np, texts: list[str], a, b):
+    """(len(texts), NUM_PERM) uint32 MinHash signatures for one chunk.
+
+    Also returns the chunk indices of texts with nothing left after
+    normalization, which must not be grouped with each other.
+    """
+    raw = "\0".join(t.replace("\0", " ") for t in texts).encode("utf-8").translate(_NORMALIZE)
+    buf = np.frombuffer(_SPACES_RE.sub(b" ", raw), dtype=np.uint8)
+
+    # Drop windows that straddle a separator; the rest belong to the text
+    # numbered by the separators before them, in order
+    shingles = _pack(np, buf)
+    n_windows = len(shingles)
+    seps = np.concatenate(([0], np.cumsum(buf == 0)))
+    valid = seps[SHINGLE:SHINGLE + n_windows] == seps[:n_windows]
+    doc_of = seps[:n_windows][valid]
+    shingles = shingles[valid]
+    starts = np.searchsorted(doc_of, np.arange(len(texts)))
+
+    # Texts shorter than a shingle own no window (nor does any text of a chunk
+    # whose normalized bytes are all shorter than one): give them one shingle
+    # of their whole (padded) text, appended at the end
+    ends = np.append(starts[1:], len(shingles))
+    short = np.flatnonzero(starts == ends)
+    blank = []
+    if len(short):
+        extra = [normalize(texts[i]).encode("utf-8") for i in short]
+        blank = [i for i, data in zip(short.tolist(), extra) if not data]
+        extra = [data.ljust(SHINGLE)[:SHINGLE] for data in extra]
+        shingles = np.concatenate((shingles, _pack(np, np.frombuffer(b"".join(extra), dtype=np.uint8))[::SHINGLE]))
+        order = np.argsort(np.concatenate((doc_of, short)), kind="stable")
+        shingles = shingles[order]
+        doc_of = np.concatenate((doc_of, short))[order]
+        starts = np.searchsorted(doc_of, np.arange(len(texts)))
+
+    sig = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+    hashed = np.empty_like(shingles)
+    for p in range(NUM_PERM):
+        np.multiply(shingles, a[p], out=hashed)
+        hashed += b[p]
+        hashed >>= np.uint64(32)
+        sig[:, p] = np.minimum.reduceat(hashed, starts)
+    return sig, blank
+
+
+def near_duplicate_groups(texts: list[str], threshold: float = 0.7, seed: int = 0) -> list[list[int]]:
+    """Indices of near-duplicate texts, grouped; singletons are omitted.
+
+    Texts that are empty after normalization (punctuation, media-only
+    posts) are never grouped. Raises ImportError if NumPy is not installed.
+    """
+    import numpy as np
+
+    n = len(texts)
+    if n < 2:
+        return []
+    a, b, band_mix = _hash_params(np, seed)
+    chunks, blank = [], np.zeros(n, dtype=bool)
+    for offset in range(0, n, CHUNK):
+        chunk_sig, chunk_blank = _signatures(np, texts[offset:offset + CHUNK], a, b)
+        chunks.append(chunk_sig)
+        blank[[offset + i for i in chunk_blank]] = True
+    sig = np.concatenate(chunks)
+
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = NUM_PERM // BANDS
+    for band in range(BANDS):
+        part = sig[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = (part * band_mix).sum(axis=1)    # wraps mod 2**64
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        # Pair every member of a bucket with the bucket's first member
+        same = np.concatenate(([False], sorted_keys[1:] == sorted_keys[:-1]))
+        if not same.any():
+            continue
+        run_start = np.maximum.accumulate(np.where(same, 0, np.arange(n)))
+        left, right = order[run_start[same]], order[same]
+        keep = ((sig[left] == sig[right]).mean(axis=1) >= threshold) & ~blank[left] & ~blank[right]
+        for i, j in zip(left[keep].tolist(), right[keep].tolist()):
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+
+    groups: dict[int, list[int]] = {}
+    for i in range(n):
+        groups.setdefault(find(i), []).append(i)
+    return [members for members in groups.values() if len(members) > 1]
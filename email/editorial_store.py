@@ -0,0 +1,268 @@
+"""
+editorial_store.py
+The slang glossary and edition memory as indexed stores.
+
+Both files only grow: the pipeline appends "term = ???" placeholders to
+slang-glossary.txt and one line per edition to edition-memory.log. Pasting
+them whole into the prompts makes every edition more expensive than the
+last. Instead:
+
+    Glossary        parses slang-glossary.txt once into a term index, so
+                    "is this slang known?" is a dict lookup. relevant(texts)
+                    keeps the entries that occur in this window's posts:
+                    words by a lookup in the window's word set, [bracketed]
+                    phrase patterns as regexes (a slot matches one to four
+                    words) tried only when their fixed words all occur, and
+                    emoji combos by substring. The matches can be cached by
+                    the texts' hash, so a re-run of the same window only
+                    scans terms added since.
+    EditionMemory   parses edition-memory.log into (date, summary) entries
+                    indexed by date; recent(n) is the last n editions before
+                    today, so the prompt always carries a fixed-size history.
+
+The files stay the source of truth and keep their plain-text format; an
+editor can still edit them by hand between runs (call reload()).
+
+Usage:
+    glossary = Glossary(INPUT_DIR / "slang-glossary.txt")
+    new_terms = glossary.add_unknown(["mid", "bro is trying to [verb]"])
+    prompt_glossary = glossary.render(glossary.relevant(post_texts, cache))
+
+    memory = EditionMemory(INPUT_DIR / "edition-memory.log")
+    history = memory.render(memory.recent(10))
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date
+from functools import cached_property
+from pathlib import Path
+
+from stage_cache import fingerprint
+
+_WORD_RE = re.compile(r"[\w']+")
+_SLOT_RE = re.compile(r"\[[^\]]*\]")
+_SLOT = r"\S+(?:\s+\S+){0,3}"     # what a [bracketed] part of a phrase pattern stands for
+_VS16 = "\ufe0f"                  # emoji presentation selector, written inconsistently
+_MEMORY_DATE_RE = re.compile(r"^\[?(\d{4}-\d{2}-\d{2})\]?\s*")
+
+# Section headers for placeholders appended by add_unknown(), per kind
+_NEW_SECTION = {
+    "word": "# --- New (needs definitions) ---",
+    "phrase": "# --- New phrase patterns (needs definitions) ---",
+    "emoji": "# --- New emoji combos (needs definitions) ---",
+}
+
+
+def term_kind(term: str) -> str:
+    """"emoji", "phrase" (has a [bracketed] slot) or "word"."""
+    if any(ord(c) > 0x2600 for c in term):
+        return "emoji"
+    if "[" in term:
+        return "phrase"
+    return "word"
+
+
+def _mentioned(term: str, words: set[str]) -> bool:
+    """Whether a word entry occurs in a text's word set.
+
+    "W or L"-style entries match on either form; a multi-word form needs
+    all of its words.
+    """
+    for form in term.lower().split(" or "):
+        parts = _WORD_RE.findall(form)
+        if parts and all(p in words for p in parts):
+            return True
+    return False
+
+
+def _phrase_regex(term: str) -> re.Pattern:
+    """A phrase pattern as a regex, e.g. "the big [name]" -> the\\s+big\\s+<slot>."""
+    pieces = []
+    for i, part in enumerate(_SLOT_RE.split(term.lower())):
+        if i:
+            pieces.append(_SLOT)
+        pieces.append(r"\s+".join(re.escape(w) for w in part.split(" ")))
+    return re.compile(r"(?<!\w)" + "".join(pieces) + r"(?!\w)")
+
+
+class _Window:
+    """A window's post texts, lowercased and tokenized on first use."""
+
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+
+    @cached_property
+    def joined(self) -> str:
+        return "\n".join(self.texts).lower().replace(_VS16, "")
+
+    @cached_property
+    def words(self) -> set[str]:
+        return set(_WORD_RE.findall(self.joined))
+
+    def mentions(self, entry: "GlossaryEntry") -> bool:
+        if entry.kind == "word":
+            return _mentioned(entry.term, self.words)
+        if entry.kind == "emoji":
+            return entry.term.replace(_VS16, "") in self.joined
+        fixed = _WORD_RE.findall(_SLOT_RE.sub(" ", entry.term.lower()))
+        if not all(w in self.words for w in fixed):
+            return False
+        return _phrase_regex(entry.term).search(self.joined) is not None
+
+
+@dataclass
+class GlossaryEntry:
+    term: str
+    definition: str
+    kind: str
+    section: str        # the "# ---" header it sits under ("" before the first)
+    line: str           # as written in the file
+
+    @property
+    def defined(self) -> bool:
+        return self.definition != "???"
+
+
+class Glossary:
+    """slang-glossary.txt with a lowercase term index."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.reload()
+
+    def reload(self) -> None:
+        self.entries: list[GlossaryEntry] = []
+        self.index: dict[str, GlossaryEntry] = {}
+        section = ""
+        text = self.path.read_text(encoding="utf-8") if self.path.is_file() else ""
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("#"):
+                section = line
+                continue
+            term, _, definition = line.partition("=")
+            term = term.strip()
+            if not term:
+                continue
+            entry = GlossaryEntry(term, definition.strip(), term_kind(term), section, line)
+            self.entries.append(entry)
+            self.index[term.lower()] = entry
+
+    def __contains__(self, term: str) -> bool:
+        return term.strip().lower() in self.index
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add_unknown(self, terms) -> list[str]:
+        """Append "term = ???" placeholders for terms not in the glossary yet.
+
+        Returns the terms that were new. Placeholders are grouped under one
+        "New ..." header per kind, as editors expect to find them.
+        """
+        new_terms = []
+        for term in terms:
+            term = term.strip()
+            if term and term not in self and term.lower() not in {t.lower() for t in new_terms}:
+                new_terms.append(term)
+        if not new_terms:
+            return []
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for kind in ("word", "phrase", "emoji"):
+                group = [t for t in new_terms if term_kind(t) == kind]
+                if not group:
+                    continue
+                f.write(f"\n{_NEW_SECTION[kind]}\n")
+                for term in group:
+                    f.write(f"{term} = ???\n")
+                    entry = GlossaryEntry(term, "???", kind, _NEW_SECTION[kind], f"{term} = ???")
+                    self.entries.append(entry)
+                    self.index[term.lower()] = entry
+        return new_terms
+
+    def relevant(self, texts: list[str], cache=None) -> list[GlossaryEntry]:
+        """Entries that occur in a window of post texts.
+
+        With a StageCache, the matched terms are recorded under the texts'
+        hash ("glossary" entry); a later call for the same window reuses them
+        and only scans entries it has not seen.
+        """
+        window = _Window(texts)
+        key = fingerprint(Path(__file__), *texts) if cache is not None else None
+        cached = cache.get("glossary", key) if cache is not None else None
+        scanned = set(cached["scanned"]) if cached else set()
+        matched = set(cached["matched"]) if cached else set()
+
+        unseen = [e for e in self.entries if e.term.lower() not in scanned]
+        for entry in unseen:
+            if window.mentions(entry):
+                matched.add(entry.term.lower())
+        if cache is not None and (unseen or cached is None):
+            scanned.update(e.term.lower() for e in unseen)
+            cache.put("glossary", key, {"scanned": sorted(scanned), "matched": sorted(matched)})
+        return [e for e in self.entries if e.term.lower() in matched]
+
+    def render(self, entries: list[GlossaryEntry] | None = None, empty: str = "(No slang glossary yet.)") -> str:
+        """Entries back in glossary format, under their section headers."""
+        entries = self.entries if entries is None else entries
+        if not entries:
+            return empty
+        lines, section = [], None
+        for entry in entries:
+            if entry.section != section:
+                section = entry.section
+                if section:
+                    lines.extend(["", section] if lines else [section])
+            lines.append(entry.line)
+        return "\n".join(lines)
+
+
+class EditionMemory:
+    """edition-memory.log as (date, summary) entries with a date index."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.reload()
+
+    def reload(self) -> None:
+        self.entries: list[tuple[str, str]] = []    # (YYYY-MM-DD or "", line)
+        self.by_date: dict[str, list[str]] = {}
+        text = self.path.read_text(encoding="utf-8") if self.path.is_file() else ""
+        for line in text.splitlines():
+            if line.strip():
+                self._index(line.strip())
+
+    def _index(self, line: str) -> None:
+        m = _MEMORY_DATE_RE.match(line)
+        day = m.group(1) if m else ""
+        self.entries.append((day, line))
+        if day:
+            self.by_date.setdefault(day, []).append(line)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def recent(self, n: int, before: str | None = None) -> list[tuple[str, str]]:
+        """The last n editions dated before `before` (default today).
+
+        Today's own line (from an earlier run of this edition) is left out,
+        so a re-run is not told to avoid its own stories.
+        """
+        before = before or date.today().isoformat()
+        earlier = [(day, line) for day, line in self.entries if not day or day < before]
+        return earlier[-n:] if n else earlier
+
+    def render(self, entries: list[tuple[str, str]], empty: str = "(No previous editions yet.)") -> str:
+        return "\n".join(line for _, line in entries) or empty
+
+    def append(self, line: str) -> None:
+        line = line.strip()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        self._index(line)
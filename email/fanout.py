@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+fanout.py
+Run the daily pipeline for several communities at once.
+
+Each community in config/communities.json gets its own data dir, input dir
+(glossary, edition memory, alignment and editor's notes), output dir and
+mailing list, and runs pipeline.py's scrape -> sanitize -> generate ->
+assemble -> send graph in its own worker process. LLM requests and SMTP
+sessions are capped across all workers with shared semaphores, so adding
+campuses doesn't multiply the load on the API or the mail server.
+
+Each community's output goes to logs/fanout_<name>_<timestamp>.log and its
+checkpoint to logs/pipeline-checkpoint_<name>.json, so a failed community
+can be re-run on its own with --only and resumes where it stopped.
+
+Usage:
+    python3 fanout.py                                # every configured community
+    python3 fanout.py --only yale,harvard --send list
+    python3 fanout.py --workers 4 --llm-slots 2 --smtp-slots 1
+    python3 fanout.py --force writing
+    python3 fanout.py --profile                      # per-community stage profiles in logs/
+
+Config entry fields (only "name" is required):
+    name          short id used in file names
+    community     Fizz community ID (default: name)
+    data_dir      default data/<name>
+    input_dir     default email/input/<name>; prompts and templates not
+                  found there come from email/input/
+    output_dir    default email/output/<name>
+    mailing_list  default .mailing_list.<name>
+    subject       email subject line
+    env           extra environment variables (e.g. scraper credentials)
+
+Requires Python 3.11+ (each community runs in a fresh worker process).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+# Only modules that read no paths at import time belong up here: worker
+# processes re-import this file before their community's environment is set.
+from limits import install
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT = SCRIPT_DIR.parent
+LOGS_DIR = ROOT / "logs"
+CONFIG_PATH = ROOT / "config" / "communities.json"
+
+# ── Config ──────────────────────────────────────────────────────────────────
+LLM_SLOTS = int(os.getenv("FANOUT_LLM_SLOTS", "2"))     # concurrent LLM requests, all communities
+SMTP_SLOTS = int(os.getenv("FANOUT_SMTP_SLOTS", "2"))   # concurrent SMTP sessions, all communities
+# ────────────────────────────────────────────────────────────────────────────
+
+
+def load_communities(path: Path) -> list[dict]:
+    if not path.is_file():
+        raise FileNotFoundError(
+            f"{path} not found. Copy config/communities.example.json and edit it."
+        )
+    communities = json.loads(path.read_text(encoding="utf-8"))["communities"]
+    names = [c["name"] for c in communities]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate community names in {path}")
+    return communities
+
+
+def community_env(entry: dict) -> dict[str, str]:
+    """Environment that points one pipeline run at a community's files."""
+    name = entry["name"]
+    env = {
+        "COMMUNITY": entry.get("community", name),
+        "FIZZ_TENANT": name,
+        "FIZZ_DATA_DIR": entry.get("data_dir", f"data/{name}"),
+        "FIZZ_INPUT_DIR": entry.get("input_dir", f"email/input/{name}"),
+        "FIZZ_OUTPUT_DIR": entry.get("output_dir", f"email/output/{name}"),
+        "FIZZ_MAILING_LIST": entry.get("mailing_list", f".mailing_list.{name}"),
+        "FIZZ_NONINTERACTIVE": "1",
+    }
+    if entry.get("subject"):
+        env["EMAIL_SUBJECT"] = entry["subject"]
+    env.update({key: str(value) for key, value in entry.get("env", {}).items()})
+    return env
+
+
+def run_community(entry: dict, options: dict) -> dict:
+    """Worker: run one community's pipeline with output redirected to its log."""
+    name = entry["name"]
+    os.environ.update(community_env(entry))
+
+    log_path = LOGS_DIR / f"fanout_{name}_{options['timestamp']}.log"
+    with open(log_path, "ab") as log:
+        # fd-level so the node scrapers' output lands in the log too
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+    sys.stdout.reconfigure(line_buffering=True)
+    sys.stderr.reconfigure(line_buffering=True)
+
+    # Imported only now, with the community's paths in the environment
+    import pipeline
+    from stage_cache import StageCache
+
+    start = time.monotonic()
+    try:
+        ok = pipeline.run(options["scrape"], options["send"], fresh=options["fresh"],
+                          cache=StageCache(force=options["force"]))
+    except Exception:
+        traceback.print_exc()
+        ok = False
+    return {"name": name, "ok": ok, "elapsed": time.monotonic() - start, "log": str(log_path)}
+
+
+def main():
+    from pipeline import SCRAPE_CHOICES, SEND_CHOICES
+    from profiling import add_profile_argument
+    from stage_cache import add_force_argument
+
+    parser = argparse.ArgumentParser(description="Run the pipeline for several communities in parallel")
+    parser.add_argument("--config", type=Path, default=CONFIG_PATH,
+                        help="Communities file (default: config/communities.json)")
+    parser.add_argument("--only", default="",
+                        help="Comma-separated community names to run (default: all)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Communities to run at once (default: all, up to the CPU count)")
+    parser.add_argument("--llm-slots", type=int, default=LLM_SLOTS,
+                        help=f"Concurrent LLM requests across all communities (default: {LLM_SLOTS})")
+    parser.add_argument("--smtp-slots", type=int, default=SMTP_SLOTS,
+                        help=f"Concurrent SMTP sessions across all communities (default: {SMTP_SLOTS})")
+    parser.add_argument("--scrape", choices=SCRAPE_CHOICES, default=os.environ.get("AUTO_SCRAPE", "top-feed"))
+    parser.add_argument("--send", choices=SEND_CHOICES, default=os.environ.get("AUTO_SEND", "test"))
+    parser.add_argument("--fresh", action="store_true", help="Ignore today's checkpoints")
+    add_force_argument(parser)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    communities = load_communities(args.config)
+    if args.only:
+        wanted = {n.strip() for n in args.only.split(",") if n.strip()}
+        unknown = wanted - {c["name"] for c in communities}
+        if unknown:
+            parser.error(f"Unknown communities: {', '.join(sorted(unknown))}")
+        communities = [c for c in communities if c["name"] in wanted]
+    if not communities:
+        parser.error("No communities to run")
+
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    for entry in communities:
+        env = community_env(entry)
+        for key in ("FIZZ_DATA_DIR", "FIZZ_INPUT_DIR", "FIZZ_OUTPUT_DIR"):
+            (ROOT / env[key]).mkdir(parents=True, exist_ok=True)
+
+    workers = args.workers or min(len(communities), os.cpu_count() or 1)
+    options = {
+        "scrape": args.scrape,
+        "send": args.send,
+        "fresh": args.fresh,
+        "force": args.force or [],
+        "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),
+    }
+    if args.profile:
+        # Inherited by the workers; their profiles are named per community
+        os.environ["FIZZ_PROFILE"] = args.profile
+        os.environ.setdefault("FIZZ_RUN_TIMESTAMP", options["timestamp"])
+    print(f"[Fan-out: {len(communities)} communities, {workers} workers, "
+          f"{args.llm_slots} LLM slots, {args.smtp_slots} SMTP slots]")
+
+    # spawn + one task per worker: every community starts from a clean
+    # interpreter, so module-level paths are read from its own environment
+    mp = multiprocessing.get_context("spawn")
+    llm = mp.BoundedSemaphore(args.llm_slots)
+    smtp = mp.BoundedSemaphore(args.smtp_slots)
+
+    start = time.monotonic()
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp, max_tasks_per_child=1,
+                             initializer=install, initargs=(llm, smtp)) as pool:
+        futures = {pool.submit(run_community, entry, options): entry["name"] for entry in communities}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                result = fut.result()
+            except Exception as exc:
+                result = {"name": name, "ok": False, "elapsed": 0.0, "log": f"worker crashed: {exc}"}
+            status = "complete" if result["ok"] else "FAILED"
+            print(f"[{name}: {status} in {result['elapsed']:.0f}s | {result['log']}]", flush=True)
+            if not result["ok"]:
+                failed.append(name)
+
+    print(f"\n[Fan-out finished in {time.monotonic() - start:.0f}s: "
+          f"{len(communities) - len(failed)} ok, {len(failed)} failed]")
+    if failed:
+        print(f"Re-run the failed ones with: python3 fanout.py --only {','.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,24 @@ import os
 import re
 import json
 import sys
+import argparse
 import subprocess
 import tempfile
 import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
 from pathlib import Path
 
+import llm_client
+import llm_replay
+from editorial_store import EditionMemory, Glossary
+from limits import slot
+from paths import DATA_DIR, INPUT_DIR, OUTPUT_DIR, input_file
+from profiling import add_profile_argument, profiled
+from stage_cache import StageCache, add_force_argument, fingerprint, glossary_fingerprint, memory_fingerprint
+from textnorm import clean_for_matching, load_post_text_map
+
 ENV_PATH = Path(__file__).resolve().parents[1] / ".env"
-SCRIPT_DIR = Path(__file__).resolve().parent
 
 # ── Hard limits ────────────────────────────────────────────────────────
 MAX_IMAGES = 20
@@ -18,8 +27,35 @@ IMAGE_CONFIRM_THRESHOLD = 10
 MAX_REVISIONS = 5
 ANALYSIS_MAX_TOKENS = 8_000
 WRITING_MAX_TOKENS = 96_000
+WRITING_CONTINUATIONS = 2  # follow-up requests when the writing stream hits max_tokens
 IMAGE_MAX_TOKENS = 300
 TOKEN_WARNING_THRESHOLD = 150_000  # warn if input estimate exceeds this
+EDITION_MEMORY_WINDOW = 10  # previous editions shown to the analysis pass
+GLOSSARY_TEXT_COLUMNS = ("text", "refizzes")  # CSV columns scanned for glossary terms
+
+# ── Map-reduce analysis ────────────────────────────────────────────────
+# single: one call over the whole CSV; mapreduce: summarize token-bounded
+# chunks concurrently, then merge; auto: map-reduce only when the single
+# prompt would exceed TOKEN_WARNING_THRESHOLD. FIZZ_ANALYSIS_MODE or
+# --analysis override.
+ANALYSIS_MODES = ("auto", "single", "mapreduce")
+ANALYSIS_MODE = "auto"
+ANALYSIS_CHUNK_TOKENS = 40_000  # CSV tokens per chunk
+ANALYSIS_MAP_WORKERS = 4  # chunks summarized at once
+
+# ── Per-section writing ────────────────────────────────────────────────
+# single: one streamed call writes every block; sections: one concurrent
+# call per plan section, then a small call for the ticker, POTD, footer,
+# edition memory and slang, stitched into the same raw format. A failed or
+# truncated section is retried on its own. FIZZ_WRITING_MODE or --writing
+# override.
+WRITING_MODES = ("single", "sections")
+WRITING_MODE = "single"
+SECTION_MAX_TOKENS = 16_000  # per section call
+FRAME_MAX_TOKENS = 4_000  # ticker/POTD/footer/memory/slang call
+SECTION_WORKERS = 4  # sections written at once
+SECTION_ATTEMPTS = 3  # tries per call before its section is dropped
+SECTION_COLORS = ("pink", "blue", "lime", "orange", "yellow")  # rotated, never adjacent
 
 # ── Color definitions ────────────────────────────────────────────────
 
@@ -300,38 +336,39 @@ def expand_shorthand(raw: str) -> str:
 
 # ── Post text matching ────────────────────────────────────────────────
 
-def _clean_for_matching(text: str) -> str:
-    """Normalize text for fuzzy comparison."""
-    text = re.sub(r'&[a-z]+;', ' ', text)       # strip HTML entities
-    text = re.sub(r'<[^>]+>', ' ', text)         # strip tags
-    text = re.sub(r'\[RELATIVE TIME:[^\]]*\]', ' ', text)  # strip time annotations
-    text = re.sub(r'[^\w\s]', ' ', text.lower()) # lowercase, strip punctuation
-    return re.sub(r'\s+', ' ', text).strip()
-
-
-def _best_post_match(needle: str, post_texts: dict, threshold: float = 0.4) -> str | None:
+def _best_post_match(needle: str, posts: dict, threshold: float = 0.4) -> str | None:
     """Find the postID whose text best matches `needle`.
 
-    Returns the postID or None if no match exceeds the threshold.
+    `posts` comes from textnorm.load_post_text_map: post text is already
+    normalized, so only the needle is cleaned here. Posts sharing no word
+    with the needle are skipped. Returns the postID or None if no match
+    exceeds the threshold.
     """
     import difflib
-    clean_needle = _clean_for_matching(needle)
+    clean_needle = clean_for_matching(needle)
     if not clean_needle:
         return None
+    needle_tokens = set(clean_needle.split())
 
     best_id = None
     best_ratio = 0.0
 
-    for post_id, post_text in post_texts.items():
-        clean_post = _clean_for_matching(post_text)
-        if not clean_post:
+    for post_id, entry in posts.items():
+        clean_post = entry["clean"]
+        if not clean_post or needle_tokens.isdisjoint(entry["tokens"]):
             continue
 
         # Fast check: if needle is a substring, strong match
         if clean_needle in clean_post:
             ratio = 0.95
         else:
-            ratio = difflib.SequenceMatcher(None, clean_needle, clean_post).ratio()
+            # One matcher per post: difflib indexes the second sequence, so
+            # that work is shared by every quote matched against this post
+            matcher = entry.get("matcher")
+            if matcher is None:
+                matcher = entry["matcher"] = difflib.SequenceMatcher(None, b=clean_post)
+            matcher.set_seq1(clean_needle)
+            ratio = matcher.ratio()
 
         if ratio > best_ratio:
             best_ratio = ratio
@@ -353,7 +390,7 @@ def match_post_links(sections_raw: str, map_path: Path) -> str:
         print(f"WARNING: {map_path} not found. Post links will not be generated.")
         return sections_raw
 
-    post_texts = json.loads(map_path.read_text(encoding="utf-8"))
+    post_texts = load_post_text_map(map_path)
     matched = 0
     unmatched = 0
 
@@ -417,11 +454,15 @@ def match_post_links(sections_raw: str, map_path: Path) -> str:
 
 # ── Post link resolution ──────────────────────────────────────────────
 
-def resolve_post_links(mjml_source: str) -> str:
-    """Replace {{POST_LINK_<postID>}} placeholders with Fizz share URLs."""
+def resolve_post_links(mjml_source: str) -> tuple[str, list[str]]:
+    """Replace {{POST_LINK_<postID>}} placeholders with Fizz share URLs.
+
+    Returns (mjml_source, unresolved): links that could not be resolved are
+    stripped to their text, and their post IDs are listed in unresolved.
+    """
     placeholders = set(re.findall(r'\{\{POST_LINK_([^}]+)\}\}', mjml_source))
     if not placeholders:
-        return mjml_source
+        return mjml_source, []
 
     # Import generate-url.py functions
     from importlib.util import spec_from_file_location, module_from_spec
@@ -437,11 +478,12 @@ def resolve_post_links(mjml_source: str) -> str:
         token = gen_url.refresh_bearer_token()
     except Exception as e:
         print(f"WARNING: Could not refresh bearer token: {e}. Post links will be removed.")
-        return _strip_unresolved_links(mjml_source, placeholders)
+        return _strip_unresolved_links(mjml_source, placeholders), sorted(placeholders)
 
     print(f"[Resolving {len(placeholders)} post link(s)...]")
 
     result = mjml_source
+    unresolved = []
     for post_id in placeholders:
         try:
             share_url = gen_url.create_share_url(token, post_id, community)
@@ -450,8 +492,9 @@ def resolve_post_links(mjml_source: str) -> str:
         except Exception as e:
             print(f"  WARNING: Failed to generate URL for {post_id[:12]}...: {e}. Link removed.")
             result = _strip_single_link(result, post_id)
+            unresolved.append(post_id)
 
-    return result
+    return result, unresolved
 
 
 def _strip_single_link(html: str, post_id: str) -> str:
@@ -483,7 +526,7 @@ def load_editors_note() -> tuple[str, str]:
     """Return (header_mjml, footer_mjml) from editors-note.json, or empty strings."""
     header_mjml = ""
     footer_mjml = ""
-    editors_note_path = SCRIPT_DIR / "input" / "editors-note.json"
+    editors_note_path = INPUT_DIR / "editors-note.json"
     if not editors_note_path.is_file():
         return header_mjml, footer_mjml
     try:
@@ -529,12 +572,7 @@ VERSION = "1.0.0"
 
 def build_issue_info() -> str:
     """Build issue info from edition-memory.log line count and today's date."""
-    memory_path = SCRIPT_DIR / "input" / "edition-memory.log"
-    if memory_path.is_file():
-        lines = [l for l in memory_path.read_text(encoding="utf-8").splitlines() if l.strip()]
-        issue_num = len(lines)
-    else:
-        issue_num = 1
+    issue_num = len(EditionMemory(INPUT_DIR / "edition-memory.log")) or 1
     today = date.today()
     date_str = today.strftime("%B %-d, %Y")
     return f"{date_str}<br>No. {issue_num}<br>v{VERSION}"
@@ -574,8 +612,12 @@ def compile_mjml(mjml_source: str) -> str:
                 pass
 
 
-def assemble_html(raw_output: str, mjml_template: str) -> str | None:
-    """Substitute AI content blocks into the MJML template and compile to HTML."""
+def assemble_html(raw_output: str, mjml_template: str) -> tuple[str, list[str]] | None:
+    """Substitute AI content blocks into the MJML template and compile to HTML.
+
+    Returns (html, unresolved post IDs whose links were dropped), or None if
+    a required block is missing.
+    """
     ticker = extract_block(raw_output, "TICKER")
     sections_raw = extract_block(raw_output, "SECTIONS")
     footer_except = extract_block(raw_output, "FOOTER_EXCEPT")
@@ -584,7 +626,7 @@ def assemble_html(raw_output: str, mjml_template: str) -> str | None:
         return None
 
     # Match quoted text to posts by content similarity, inject postIDs
-    text_map_path = Path(__file__).resolve().parents[1] / "data" / "post-text-map.json"
+    text_map_path = DATA_DIR / "post-text-map.json"
     sections_raw = match_post_links(sections_raw, text_map_path)
 
     # Expand fb-* shorthand to MJML (creates {{POST_LINK_<id>}} placeholders)
@@ -602,15 +644,18 @@ def assemble_html(raw_output: str, mjml_template: str) -> str | None:
     mjml_source = mjml_source.replace("{{EDITORS_NOTE_FOOTER}}", editors_footer)
 
     # Resolve post link placeholders to actual Fizz share URLs
-    mjml_source = resolve_post_links(mjml_source)
+    mjml_source, unresolved = resolve_post_links(mjml_source)
 
     print("[Compiling MJML to email-safe HTML...]")
-    return compile_mjml(mjml_source)
+    return compile_mjml(mjml_source), unresolved
 
 
 # ── Interactive helpers ───────────────────────────────────────────────
 
 def _is_interactive() -> bool:
+    """True when a human can answer prompts. FIZZ_NONINTERACTIVE=1 forces False."""
+    if os.environ.get("FIZZ_NONINTERACTIVE") == "1":
+        return False
     return sys.stdin.isatty()
 
 
@@ -641,6 +686,311 @@ def _print_cost_estimate(input_tokens: int, output_tokens: int):
     print(f"  Est. cost: ${total:.4f} (input: ${input_cost:.4f} + output: ${output_cost:.4f})")
 
 
+def _parse_json_reply(raw: str):
+    """Parse a model's JSON reply, stripping markdown fencing if it added some."""
+    json_text = raw.strip()
+    if json_text.startswith("```"):
+        json_text = re.sub(r'^```\w*\n?', '', json_text)
+        json_text = re.sub(r'\n?```$', '', json_text)
+    return json.loads(json_text)
+
+
+# ── Map-reduce analysis ──────────────────────────────────────────────
+
+def _analysis_chunks(df, budget_tokens: int) -> list:
+    """Split the CSV rows into DataFrames of about budget_tokens each.
+
+    Rows sharing a crawl cluster go into the same chunk unless the cluster
+    alone is over budget, so a storyline is usually summarized whole.
+    Rows keep their CSV order within a chunk.
+    """
+    row_tokens = [_estimate_tokens(line) for line in df.to_string(index=False).splitlines()[1:]]
+    labels = df["cluster"].tolist() if "cluster" in df else [None] * len(df)
+    groups: dict = {}
+    for pos, label in enumerate(labels):
+        clustered = label is not None and label == label and label != ""    # NaN != NaN
+        groups.setdefault(label if clustered else ("row", pos), []).append(pos)
+
+    chunks, current, used = [], [], 0
+    for positions in groups.values():
+        size = sum(row_tokens[p] for p in positions)
+        units = [positions] if size <= budget_tokens else [[p] for p in positions]
+        for unit in units:
+            unit_size = sum(row_tokens[p] for p in unit)
+            if current and used + unit_size > budget_tokens:
+                chunks.append(current)
+                current, used = [], 0
+            current.extend(unit)
+            used += unit_size
+    if current:
+        chunks.append(current)
+    return [df.iloc[sorted(chunk)] for chunk in chunks]
+
+
+def _map_chunk(client, map_template: str, chunk_text: str, number: int, count: int,
+               slang_glossary: str) -> dict:
+    """Summarize one chunk into storyline notes (one retry on invalid JSON)."""
+    prompt = map_template.replace("[PASTE CSV HERE]", chunk_text)
+    prompt = prompt.replace("[SLANG_GLOSSARY]", slang_glossary)
+    prompt = prompt.replace("[CHUNK_NUMBER]", str(number)).replace("[CHUNK_COUNT]", str(count))
+    messages = [{"role": "user", "content": prompt}]
+    for attempt in range(2):
+        with slot("llm"):
+            response = client.messages.create(
+                model="MiniMax-M2.5",
+                max_tokens=ANALYSIS_MAX_TOKENS,
+                system=ANALYSIS_SYSTEM,
+                messages=messages,
+            )
+        raw = next(block.text for block in response.content if block.type == "text")
+        try:
+            notes = _parse_json_reply(raw)
+        except json.JSONDecodeError as e:
+            print(f"  Chunk {number}/{count}: invalid JSON ({e}){', retrying' if not attempt else ''}")
+            if attempt:
+                raise
+            messages.append({"role": "assistant", "content": raw})
+            messages.append({"role": "user", "content": "That was not valid JSON. Please output only valid JSON with no markdown fencing."})
+            continue
+        print(f"  Chunk {number}/{count}: {len(notes.get('clusters', []))} storylines | "
+              f"Input tokens: {response.usage.input_tokens:,} | Output tokens: {response.usage.output_tokens:,}")
+        return notes
+
+
+def _map_analysis(client, df, map_template: str, slang_glossary: str) -> list[dict]:
+    """Chunk notes for every chunk of the CSV, in chunk order."""
+    chunks = _analysis_chunks(df, ANALYSIS_CHUNK_TOKENS)
+    workers = min(ANALYSIS_MAP_WORKERS, len(chunks))
+    print(f"\nSummarizing {len(df)} posts in {len(chunks)} chunks (~{ANALYSIS_CHUNK_TOKENS:,} tokens each, "
+          f"{workers} at a time)...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_map_chunk, client, map_template, chunk.to_string(index=False), number, len(chunks),
+                        slang_glossary)
+            for number, chunk in enumerate(chunks, 1)
+        ]
+        return [future.result() for future in futures]
+
+
+WRITING_BLOCKS = ("TICKER", "SECTIONS", "FOOTER_EXCEPT", "EDITION_MEMORY", "UNKNOWN_SLANG")
+
+
+def _unfinished_blocks(raw: str) -> tuple[str | None, list[str]]:
+    """(block left open, blocks not started) in a cut-off writing output."""
+    open_block, missing = None, []
+    for block in WRITING_BLOCKS:
+        opened = raw.rfind(f"<!--{block}-->")
+        if opened == -1:
+            missing.append(block)
+        elif raw.find(f"<!--/{block}-->", opened) == -1:
+            open_block = block
+    return open_block, missing
+
+
+def _join_continuation(partial: str, more: str, open_block: str | None) -> str:
+    """Append a continuation, dropping a re-opened block tag or repeated tail."""
+    more = more.lstrip("\n") if partial.endswith("\n") else more
+    if open_block and more.lstrip().startswith(f"<!--{open_block}-->"):
+        more = more.lstrip()[len(f"<!--{open_block}-->"):]
+    return partial + llm_client.trim_overlap(partial, more)
+
+
+def _continuation_request(raw: str) -> str:
+    open_block, missing = _unfinished_blocks(raw)
+    where = f"inside the <!--{open_block}--> block" if open_block else "between blocks"
+    todo = ([f"close <!--/{open_block}-->"] if open_block else []) + [f"write the {b} block" for b in missing]
+    return (
+        f"Your output was cut off by the length limit {where}. Continue exactly where it stopped: "
+        f"output only the remaining text, starting with the next character, without repeating anything "
+        f"or adding commentary. Then {', then '.join(todo) or 'stop'}."
+    )
+
+
+def _stream_writing(client, messages: list[dict]):
+    """Stream one writing call with block-aware progress; returns (text, final message)."""
+    import anthropic
+
+    try:
+        stream = client.messages.stream(
+            model="MiniMax-M2.5",
+            max_tokens=WRITING_MAX_TOKENS,
+            system=WRITING_SYSTEM,
+            messages=messages,
+        )
+    except anthropic.AuthenticationError as exc:
+        raise RuntimeError(
+            "Authentication failed. Check your MiniMax API key and endpoint."
+        ) from exc
+
+    # Stream with block-aware progress
+    raw_chunks = []
+    char_count = 0
+    last_reported_count = 0
+    detected_opens = set()
+    detected_closes = set()
+    tail_buffer = ""
+
+    # The request is made when the stream is entered; hold an LLM slot until it ends
+    with slot("llm"), stream as s:
+        for text in s.text_stream:
+            raw_chunks.append(text)
+            char_count += len(text)
+            tail_buffer = (tail_buffer + text)[-200:]
+
+            for block in WRITING_BLOCKS:
+                if block not in detected_opens and f"<!--{block}-->" in tail_buffer:
+                    detected_opens.add(block)
+                    print(f"  [{block} streaming...]", flush=True)
+                if block not in detected_closes and f"<!--/{block}-->" in tail_buffer:
+                    detected_closes.add(block)
+                    print(f"  [{block} received] ({char_count:,} chars)", flush=True)
+
+            if char_count - last_reported_count >= 5000 and char_count > last_reported_count:
+                print(f"  ... {char_count:,} chars", flush=True)
+                last_reported_count = char_count
+
+        response = s.get_final_message()
+
+    return "".join(raw_chunks), response
+
+
+# ── Per-section writing ──────────────────────────────────────────────
+
+def _roman(n: int) -> str:
+    out = ""
+    for value, numeral in ((10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I")):
+        while n >= value:
+            out += numeral
+            n -= value
+    return out
+
+
+def _render_writing_prompt(template: str, plan_text: str, annotations_text: str, slang_glossary: str,
+                           editor_alignment: str) -> str:
+    prompt = template.replace("[EDITORIAL_PLAN]", plan_text)
+    prompt = prompt.replace("[IMAGE_ANNOTATIONS]", annotations_text)
+    prompt = prompt.replace("[SLANG_GLOSSARY]", slang_glossary)
+    return prompt.replace("[EDITOR_ALIGNMENT]", editor_alignment)
+
+
+def _format_annotations(image_annotations: dict) -> str:
+    if not image_annotations:
+        return "(No images were annotated.)"
+    return "\n".join(f"- {url}\n  Description: {desc}" for url, desc in image_annotations.items())
+
+
+def _write_blocks(client, prompt: str, max_tokens: int, blocks: tuple, label: str,
+                  allow_empty: tuple = ()) -> tuple[dict | None, int, int]:
+    """One writing call that must return every block in `blocks`.
+
+    The call is retried on its own (up to SECTION_ATTEMPTS) when it fails,
+    is cut off at max_tokens, or leaves a block missing. Returns ({block:
+    text} or None, input tokens, output tokens) summed over attempts.
+    """
+    import anthropic
+
+    input_tokens = output_tokens = 0
+    for attempt in range(1, SECTION_ATTEMPTS + 1):
+        try:
+            with slot("llm"):
+                response = client.messages.create(
+                    model="MiniMax-M2.5",
+                    max_tokens=max_tokens,
+                    system=WRITING_SYSTEM,
+                    messages=[{"role": "user", "content": prompt}],
+                )
+        except (anthropic.AuthenticationError, llm_client.CircuitOpenError):
+            raise   # retrying can't help; fail the run rather than drop the section
+        except Exception as e:
+            problem = f"error: {e}"
+        else:
+            input_tokens += response.usage.input_tokens
+            output_tokens += response.usage.output_tokens
+            raw = "".join(block.text for block in response.content if block.type == "text")
+            found = {name: extract_block(raw, name) for name in blocks}
+            missing = [name for name, text in found.items() if text is None or (not text and name not in allow_empty)]
+            if response.stop_reason == "max_tokens":
+                problem = "truncated"
+            elif missing:
+                problem = f"missing {', '.join(missing)}"
+            else:
+                print(f"  [{label} written] (output {response.usage.output_tokens:,} tokens)", flush=True)
+                return found, input_tokens, output_tokens
+        print(f"  [{label}: {problem}, {'retrying' if attempt < SECTION_ATTEMPTS else 'giving up'}]", flush=True)
+        if problem.startswith("error") and attempt < SECTION_ATTEMPTS:
+            time.sleep(2 ** attempt)
+    return None, input_tokens, output_tokens
+
+
+def _stitch_raw_output(sections: list[str], frame: dict) -> str:
+    """Sections and frame blocks in the standard delimited raw format."""
+    body = "\n<fb-zigzag/>\n".join(sections + [frame["POTD"]])
+    return (
+        f"<!--TICKER-->{frame['TICKER']}<!--/TICKER-->\n"
+        f"<!--SECTIONS-->\n{body}\n<!--/SECTIONS-->\n"
+        f"<!--FOOTER_EXCEPT-->{frame['FOOTER_EXCEPT']}<!--/FOOTER_EXCEPT-->\n"
+        f"<!--EDITION_MEMORY-->{frame['EDITION_MEMORY']}<!--/EDITION_MEMORY-->\n"
+        f"<!--UNKNOWN_SLANG-->{frame['UNKNOWN_SLANG']}<!--/UNKNOWN_SLANG-->\n"
+    )
+
+
+def _write_by_section(client, writing_template: str, section_template: str, frame_template: str, plan: dict,
+                      image_annotations: dict, slang_glossary: str, editor_alignment: str
+                      ) -> tuple[str | None, int, int, int]:
+    """Write the newsletter one plan section per concurrent call, then the frame.
+
+    Returns (raw output, sections dropped, input tokens, output tokens). The
+    raw output is None if the frame could not be written.
+    """
+    plan_text = json.dumps(plan, indent=2)
+    planned = plan.get("sections", [])
+    # Each section sees only the images the plan assigned to it
+    image_sections = {img.get("url"): img.get("section_title") for img in plan.get("images_to_annotate", [])}
+
+    def section_prompt(number: int, section: dict) -> str:
+        images = {url: desc for url, desc in image_annotations.items()
+                  if image_sections.get(url) == section.get("title")}
+        prompt = _render_writing_prompt(writing_template, plan_text, _format_annotations(images),
+                                        slang_glossary, editor_alignment)
+        addendum = section_template.replace("[SECTION_PLAN]", json.dumps(section, indent=2))
+        addendum = addendum.replace("[SECTION_NUMBER]", str(number)).replace("[SECTION_COUNT]", str(len(planned)))
+        addendum = addendum.replace("[SECTION_ROMAN]", _roman(number))
+        addendum = addendum.replace("[SECTION_COLOR]", SECTION_COLORS[(number - 1) % len(SECTION_COLORS)])
+        return prompt + addendum
+
+    workers = max(1, min(SECTION_WORKERS, len(planned)))
+    print(f"Writing {len(planned)} sections, {workers} at a time...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_write_blocks, client, section_prompt(number, section), SECTION_MAX_TOKENS, ("SECTION",),
+                        f"Section {number}/{len(planned)}")
+            for number, section in enumerate(planned, 1)
+        ]
+        results = [future.result() for future in futures]
+
+    sections = [found["SECTION"] for found, _, _ in results if found]
+    dropped = len(results) - len(sections)
+    input_tokens = sum(r[1] for r in results)
+    output_tokens = sum(r[2] for r in results)
+    if dropped:
+        print(f"WARNING: {dropped} of {len(planned)} sections could not be written and were left out.")
+
+    print("Writing ticker, POTD, footer, edition memory and slang...")
+    frame_prompt = _render_writing_prompt(writing_template, plan_text, "(Images are placed in the sections.)",
+                                          slang_glossary, editor_alignment)
+    frame_prompt += frame_template.replace("[WRITTEN_SECTIONS]", "\n\n".join(sections))
+    frame, frame_in, frame_out = _write_blocks(
+        client, frame_prompt, FRAME_MAX_TOKENS,
+        ("TICKER", "POTD", "FOOTER_EXCEPT", "EDITION_MEMORY", "UNKNOWN_SLANG"), "Frame",
+        allow_empty=("UNKNOWN_SLANG",),
+    )
+    input_tokens += frame_in
+    output_tokens += frame_out
+    if frame is None:
+        return None, dropped, input_tokens, output_tokens
+    return _stitch_raw_output(sections, frame), dropped, input_tokens, output_tokens
+
+
 # ── Main generation flow ─────────────────────────────────────────────
 
 def load_env_file(path: Path) -> None:
@@ -657,41 +1007,62 @@ def load_env_file(path: Path) -> None:
             os.environ[key] = value
 
 
-def main():
+ANALYSIS_SYSTEM = "You are a newsletter editor producing a structured editorial plan as JSON. Output ONLY valid JSON, no markdown fencing, no explanation."
+WRITING_SYSTEM = "You are a witty college newsletter writer. Output ONLY the delimited content blocks as instructed. Use fb-* shorthand tags (fb-section, fb-quote, fb-image, fb-zigzag, fb-stats, fb-camp, fb-potd, fb-weather) for the SECTIONS block — no raw MJML, no raw HTML divs, no full documents."
+
+
+def main(cache: StageCache | None = None) -> Path:
     import pandas as pd
     import anthropic
 
+    cache = cache or StageCache()
+
     load_env_file(ENV_PATH)
 
     # ── Load API config ──
     base_url = os.getenv("ANTHROPIC_BASE_URL", os.getenv("OPENAI_BASE_URL", "https://api.minimax.io/anthropic"))
     api_key = os.getenv("ANTHROPIC_API_KEY", os.getenv("OPENAI_API_KEY", ""))
 
-    if not api_key or api_key.startswith("YOUR_"):
+    if (not api_key or api_key.startswith("YOUR_")) and llm_replay.mode() != "replay":
         raise RuntimeError(
             "Please set ANTHROPIC_API_KEY (or OPENAI_API_KEY) in .env or your shell to your MiniMax API key"
         )
 
-    client = anthropic.Anthropic(
+    # Retries, the circuit breaker and stream resumption live in llm_client
+    client = llm_client.ResilientClient(llm_replay.make_client(lambda: anthropic.Anthropic(
         api_key=api_key,
         base_url=base_url,
-    )
+        max_retries=0,
+    )))
 
     # ── Load all inputs ──
-    csv_path = str(Path(__file__).resolve().parents[1] / "data" / "crawl-results-new.csv")
+    csv_path = str(DATA_DIR / "crawl-results-new.csv")
     if not os.path.isfile(csv_path):
-        raise FileNotFoundError("data/crawl-results-new.csv not found. Run sanitize.py first.")
+        raise FileNotFoundError(f"{csv_path} not found. Run sanitize.py first.")
 
     df = pd.read_csv(csv_path, comment="#")
     csv_text = df.to_string(index=False)
 
-    slang_path = SCRIPT_DIR / "input" / "slang-glossary.txt"
-    slang_glossary = slang_path.read_text(encoding="utf-8").strip() if slang_path.is_file() else "(No slang glossary yet.)"
-
-    memory_path = SCRIPT_DIR / "input" / "edition-memory.log"
-    memory_log = memory_path.read_text(encoding="utf-8").strip() if memory_path.is_file() else "(No previous editions yet.)"
-
-    alignment_path = SCRIPT_DIR / "input" / "alignment.json"
+    # Only the glossary terms this window can use and the last few editions
+    # go into the prompts, so their size does not grow with the newsletter
+    glossary = Glossary(INPUT_DIR / "slang-glossary.txt")
+    slang_path = glossary.path
+    # Every column of post wording the prompt shows: the post and its reFizzes
+    text_columns = [c for c in GLOSSARY_TEXT_COLUMNS if c in df]
+    post_texts = [
+        "\n".join(row) for row in df[text_columns].fillna("").astype(str).itertuples(index=False, name=None)
+    ] if text_columns else [csv_text]
+    relevant_terms = glossary.relevant(post_texts, cache)
+    slang_glossary = glossary.render(relevant_terms)
+    print(f"[Slang glossary: {len(relevant_terms)} of {len(glossary)} terms occur in this window]")
+
+    memory = EditionMemory(INPUT_DIR / "edition-memory.log")
+    memory_path = memory.path
+    recent_editions = memory.recent(EDITION_MEMORY_WINDOW)
+    memory_log = memory.render(recent_editions)
+    print(f"[Edition memory: last {len(recent_editions)} of {len(memory)} editions]")
+
+    alignment_path = INPUT_DIR / "alignment.json"
     editor_alignment = "(No editor alignment note for this edition.)"
     if alignment_path.is_file():
         try:
@@ -716,7 +1087,7 @@ def main():
     print("STAGE 1: Editorial Analysis")
     print("=" * 60)
 
-    analysis_prompt_path = SCRIPT_DIR / "input" / "analysis-prompt.md"
+    analysis_prompt_path = input_file("analysis-prompt.md")
     if not analysis_prompt_path.is_file():
         raise FileNotFoundError(f"Analysis prompt not found: {analysis_prompt_path}")
     analysis_template = analysis_prompt_path.read_text(encoding="utf-8")
@@ -727,31 +1098,68 @@ def main():
 
     est_input = _estimate_tokens(analysis_prompt)
     print(f"Analysis prompt: {len(analysis_prompt):,} chars (~{est_input:,} tokens) | {len(df)} posts")
-    print(f"Max output: {ANALYSIS_MAX_TOKENS:,} tokens")
-    _print_cost_estimate(est_input, ANALYSIS_MAX_TOKENS)
 
-    if est_input > TOKEN_WARNING_THRESHOLD:
-        print(f"WARNING: Input estimate ({est_input:,}) exceeds {TOKEN_WARNING_THRESHOLD:,} token threshold.")
+    analysis_mode = os.getenv("FIZZ_ANALYSIS_MODE", ANALYSIS_MODE).strip().lower() or ANALYSIS_MODE
+    if analysis_mode not in ANALYSIS_MODES:
+        raise ValueError(f"FIZZ_ANALYSIS_MODE must be one of {', '.join(ANALYSIS_MODES)}, not {analysis_mode!r}")
+    map_reduce = analysis_mode == "mapreduce" or (analysis_mode == "auto" and est_input > TOKEN_WARNING_THRESHOLD)
+    map_reduce_inputs = ()
+    if map_reduce:
+        map_template = input_file("analysis-map-prompt.md").read_text(encoding="utf-8")
+        reduce_template = input_file("analysis-reduce-prompt.md").read_text(encoding="utf-8")
+        map_reduce_inputs = ("mapreduce", map_template, reduce_template, ANALYSIS_CHUNK_TOKENS)
+        reason = "requested" if analysis_mode == "mapreduce" else f"over the {TOKEN_WARNING_THRESHOLD:,} token threshold"
+        print(f"[Analysis: map-reduce ({reason})]")
+    else:
+        print(f"Max output: {ANALYSIS_MAX_TOKENS:,} tokens")
+        _print_cost_estimate(est_input, ANALYSIS_MAX_TOKENS)
+        if est_input > TOKEN_WARNING_THRESHOLD:
+            print(f"WARNING: Input estimate ({est_input:,}) exceeds {TOKEN_WARNING_THRESHOLD:,} token threshold.")
 
     # Build conversation for revision loop
     messages = [
         {"role": "user", "content": analysis_prompt},
     ]
 
-    plan = None
-    for revision_round in range(MAX_REVISIONS + 1):
+    analysis_key = fingerprint(
+        "MiniMax-M2.5", ANALYSIS_SYSTEM, ANALYSIS_MAX_TOKENS, analysis_template, csv_text,
+        memory_fingerprint(memory_log), glossary_fingerprint(slang_glossary), editor_alignment,
+        *map_reduce_inputs,
+    )
+    plan = cache.get("analysis", analysis_key)
+    analysis_cached = plan is not None
+
+    if map_reduce and not analysis_cached:
+        # The chunk notes replace the CSV; revisions then go to the merge call
+        try:
+            notes = _map_analysis(client, df, map_template, slang_glossary)
+        except anthropic.AuthenticationError as exc:
+            raise RuntimeError(
+                "Authentication failed. Check your MiniMax API key and endpoint."
+            ) from exc
+        reduce_prompt = reduce_template.replace("[CHUNK_NOTES]", json.dumps(notes, ensure_ascii=False))
+        reduce_prompt = reduce_prompt.replace("[CHUNK_COUNT]", str(len(notes)))
+        reduce_prompt = reduce_prompt.replace("[EDITION_MEMORY_LOG]", memory_log)
+        reduce_prompt = reduce_prompt.replace("[EDITOR_ALIGNMENT]", editor_alignment)
+        messages = [{"role": "user", "content": reduce_prompt}]
+        est_reduce = _estimate_tokens(reduce_prompt)
+        print(f"Merge prompt: {len(reduce_prompt):,} chars (~{est_reduce:,} tokens)")
+        _print_cost_estimate(est_reduce, ANALYSIS_MAX_TOKENS)
+
+    for revision_round in range(0 if analysis_cached else MAX_REVISIONS + 1):
         if revision_round == 0:
             print("\nCalling MiniMax for analysis...")
         else:
             print(f"\nRevision round {revision_round}/{MAX_REVISIONS}...")
 
         try:
-            response = client.messages.create(
-                model="MiniMax-M2.5",
-                max_tokens=ANALYSIS_MAX_TOKENS,
-                system="You are a newsletter editor producing a structured editorial plan as JSON. Output ONLY valid JSON, no markdown fencing, no explanation.",
-                messages=messages,
-            )
+            with slot("llm"):
+                response = client.messages.create(
+                    model="MiniMax-M2.5",
+                    max_tokens=ANALYSIS_MAX_TOKENS,
+                    system=ANALYSIS_SYSTEM,
+                    messages=messages,
+                )
         except anthropic.AuthenticationError as exc:
             raise RuntimeError(
                 "Authentication failed. Check your MiniMax API key and endpoint."
@@ -762,12 +1170,7 @@ def main():
 
         # Try to parse JSON
         try:
-            # Strip markdown fencing if model wrapped it
-            json_text = raw_analysis.strip()
-            if json_text.startswith("```"):
-                json_text = re.sub(r'^```\w*\n?', '', json_text)
-                json_text = re.sub(r'\n?```$', '', json_text)
-            plan = json.loads(json_text)
+            plan = _parse_json_reply(raw_analysis)
         except json.JSONDecodeError as e:
             print(f"WARNING: Could not parse analysis as JSON: {e}")
             print("Raw output (first 500 chars):")
@@ -836,44 +1239,16 @@ def main():
 
     if plan is None:
         raise RuntimeError("Failed to get a valid editorial plan after all attempts.")
+    if not analysis_cached:
+        cache.put("analysis", analysis_key, plan)
 
     # ── Update slang glossary from analysis pass ──
     analysis_slang = plan.get("unknown_slang", [])
     if analysis_slang:
-        existing_terms = set()
-        if slang_path.is_file():
-            for line in slang_path.read_text(encoding="utf-8").splitlines():
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                term = line.split("=")[0].strip().lower()
-                if term:
-                    existing_terms.add(term)
-
-        new_terms = [t for t in analysis_slang if t.lower() not in existing_terms]
+        new_terms = glossary.add_unknown(analysis_slang)
         if new_terms:
-            emoji_terms = [t for t in new_terms if any(ord(c) > 0x2600 for c in t)]
-            phrase_terms = [t for t in new_terms if '[' in t and t not in emoji_terms]
-            word_terms = [t for t in new_terms if t not in emoji_terms and t not in phrase_terms]
-
-            with open(slang_path, "a", encoding="utf-8") as sf:
-                if word_terms:
-                    sf.write("\n# --- New (needs definitions) ---\n")
-                    for term in word_terms:
-                        sf.write(f"{term} = ???\n")
-                if phrase_terms:
-                    sf.write("\n# --- New phrase patterns (needs definitions) ---\n")
-                    for term in phrase_terms:
-                        sf.write(f"{term} = ???\n")
-                if emoji_terms:
-                    sf.write("\n# --- New emoji combos (needs definitions) ---\n")
-                    for term in emoji_terms:
-                        sf.write(f"{term} = ???\n")
             print(f"[New slang added to {slang_path.name}: {', '.join(new_terms)}]")
             print(f"  -> Edit {slang_path.name} now to fill in definitions before the writing pass")
-
-            # Reload glossary so the writing pass gets updated definitions
-            slang_glossary = slang_path.read_text(encoding="utf-8").strip()
         else:
             print("[No new unknown slang from analysis.]")
     else:
@@ -903,7 +1278,13 @@ def main():
             print(f"  {i:2d}. {url[:70]}")
             print(f"      Section: {section} | Post: \"{post_text}...\"")
 
-        if _is_interactive():
+        annotation_key = fingerprint([(img.get("url", ""), img.get("post_text", "")) for img in images_to_annotate])
+        cached_annotations = cache.get("annotation", annotation_key)
+        if cached_annotations:
+            image_annotations = cached_annotations
+            choice = "cached"
+            print(f"[{len(image_annotations)} image annotations reused]")
+        elif _is_interactive():
             print(f"\n  [m] Manual — describe each image yourself (opens URL in browser)")
             print(f"  [a] AI — annotate via MiniMax-Text-01 (requires credits)")
             print(f"  [s] Skip — no image annotations")
@@ -943,6 +1324,9 @@ def main():
             annotated = sum(1 for v in image_annotations.values() if v)
             print(f"[{annotated}/{len(images_to_annotate)} images annotated manually]")
 
+        elif choice == "cached":
+            pass
+
         elif choice in ("a", "ai"):
             # ── AI annotation via MiniMax-Text-01 ──
             est_per_image = 500
@@ -993,12 +1377,13 @@ def main():
                     success = False
                     for attempt in range(3):
                         try:
-                            resp = requests.post(
-                                f"{openai_base}/chat/completions",
-                                headers=openai_headers,
-                                json=payload,
-                                timeout=60,
-                            )
+                            with slot("llm"):
+                                resp = llm_replay.post(
+                                    f"{openai_base}/chat/completions",
+                                    headers=openai_headers,
+                                    json=payload,
+                                    timeout=60,
+                                )
                             if resp.status_code == 429:
                                 wait = 2 ** (attempt + 1)
                                 print(f" rate limited, waiting {wait}s...", end="", flush=True)
@@ -1034,6 +1419,10 @@ def main():
 
         else:
             print("[Skipping image annotation]")
+
+        # Only a real annotation run is worth keeping; a skip should ask again next time
+        if choice != "cached" and image_annotations:
+            cache.put("annotation", annotation_key, image_annotations)
     else:
         print("\n[No images to annotate]")
 
@@ -1044,7 +1433,7 @@ def main():
     print("STAGE 3: Writing Pass")
     print("=" * 60)
 
-    writing_prompt_path = SCRIPT_DIR / "input" / "prompt.md"
+    writing_prompt_path = input_file("prompt.md")
     if not writing_prompt_path.is_file():
         raise FileNotFoundError(f"Writing prompt not found: {writing_prompt_path}")
     writing_template = writing_prompt_path.read_text(encoding="utf-8")
@@ -1053,84 +1442,104 @@ def main():
     plan_text = json.dumps(plan, indent=2)
 
     # Build image annotations text
-    if image_annotations:
-        annotations_lines = []
-        for url, desc in image_annotations.items():
-            annotations_lines.append(f"- {url}\n  Description: {desc}")
-        annotations_text = "\n".join(annotations_lines)
-    else:
-        annotations_text = "(No images were annotated.)"
-
-    writing_prompt = writing_template.replace("[EDITORIAL_PLAN]", plan_text)
-    writing_prompt = writing_prompt.replace("[IMAGE_ANNOTATIONS]", annotations_text)
-    writing_prompt = writing_prompt.replace("[SLANG_GLOSSARY]", slang_glossary)
-    writing_prompt = writing_prompt.replace("[EDITOR_ALIGNMENT]", editor_alignment)
+    annotations_text = _format_annotations(image_annotations)
+
+    # Pick up definitions filled in since the analysis pass
+    glossary.reload()
+    slang_glossary = glossary.render(glossary.relevant(post_texts, cache))
+    writing_prompt = _render_writing_prompt(writing_template, plan_text, annotations_text, slang_glossary,
+                                            editor_alignment)
+
+    writing_mode = os.getenv("FIZZ_WRITING_MODE", WRITING_MODE).strip().lower() or WRITING_MODE
+    if writing_mode not in WRITING_MODES:
+        raise ValueError(f"FIZZ_WRITING_MODE must be one of {', '.join(WRITING_MODES)}, not {writing_mode!r}")
+    by_section = writing_mode == "sections"
+    by_section_inputs = ()
+    if by_section:
+        section_template = input_file("prompt-section.md").read_text(encoding="utf-8")
+        frame_template = input_file("prompt-frame.md").read_text(encoding="utf-8")
+        by_section_inputs = ("sections", section_template, frame_template, SECTION_MAX_TOKENS, FRAME_MAX_TOKENS)
 
     est_writing_input = _estimate_tokens(writing_prompt)
     print(f"Writing prompt: {len(writing_prompt):,} chars (~{est_writing_input:,} tokens)")
-    print(f"Max output: {WRITING_MAX_TOKENS:,} tokens")
-    _print_cost_estimate(est_writing_input, WRITING_MAX_TOKENS)
+    if by_section:
+        calls = len(plan.get("sections", [])) + 1
+        print(f"[Writing: one call per section + 1 for the frame ({calls} calls, "
+              f"max output {SECTION_MAX_TOKENS:,} tokens per section)]")
+        _print_cost_estimate(est_writing_input * calls, SECTION_MAX_TOKENS * (calls - 1) + FRAME_MAX_TOKENS)
+    else:
+        print(f"Max output: {WRITING_MAX_TOKENS:,} tokens")
+        _print_cost_estimate(est_writing_input, WRITING_MAX_TOKENS)
 
     if est_writing_input > TOKEN_WARNING_THRESHOLD:
         print(f"WARNING: Input estimate ({est_writing_input:,}) exceeds {TOKEN_WARNING_THRESHOLD:,} token threshold.")
 
     # Prepare output file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = str(SCRIPT_DIR / "output" / f"fizz_raw_{timestamp}.html")
-    print(f"Output: {output_file}")
-    print(f"Streaming...\n")
-
-    try:
-        stream = client.messages.stream(
-            model="MiniMax-M2.5",
-            max_tokens=WRITING_MAX_TOKENS,
-            system="You are a witty college newsletter writer. Output ONLY the delimited content blocks as instructed. Use fb-* shorthand tags (fb-section, fb-quote, fb-image, fb-zigzag, fb-stats, fb-camp, fb-potd, fb-weather) for the SECTIONS block — no raw MJML, no raw HTML divs, no full documents.",
-            messages=[
-                {"role": "user", "content": writing_prompt},
-            ],
-        )
-    except anthropic.AuthenticationError as exc:
-        raise RuntimeError(
-            "Authentication failed. Check your MiniMax API key and endpoint."
-        ) from exc
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    output_file = str(OUTPUT_DIR / f"fizz_raw_{timestamp}.html")
 
-    # Stream with block-aware progress
-    BLOCK_NAMES = ["TICKER", "SECTIONS", "FOOTER_EXCEPT", "EDITION_MEMORY", "UNKNOWN_SLANG"]
-    raw_chunks = []
-    char_count = 0
-    last_reported_count = 0
-    detected_opens = set()
-    detected_closes = set()
-    tail_buffer = ""
-
-    with stream as s:
-        for text in s.text_stream:
-            raw_chunks.append(text)
-            char_count += len(text)
-            tail_buffer = (tail_buffer + text)[-200:]
-
-            for block in BLOCK_NAMES:
-                if block not in detected_opens and f"<!--{block}-->" in tail_buffer:
-                    detected_opens.add(block)
-                    print(f"  [{block} streaming...]", flush=True)
-                if block not in detected_closes and f"<!--/{block}-->" in tail_buffer:
-                    detected_closes.add(block)
-                    print(f"  [{block} received] ({char_count:,} chars)", flush=True)
-
-            if char_count - last_reported_count >= 5000 and char_count > last_reported_count:
-                print(f"  ... {char_count:,} chars", flush=True)
-                last_reported_count = char_count
-
-        writing_response = s.get_final_message()
+    writing_key = fingerprint(
+        "MiniMax-M2.5", WRITING_SYSTEM, WRITING_MAX_TOKENS, writing_template, plan_text,
+        annotations_text, glossary_fingerprint(slang_glossary), editor_alignment, *by_section_inputs,
+    )
+    cached_writing = cache.get("writing", writing_key)
+    if cached_writing is not None:
+        # Edition memory and slang were recorded when this output was first written
+        raw_output = cached_writing["raw_output"]
+        previous = Path(cached_writing["raw_path"])
+        if previous.is_file() and previous.read_text(encoding="utf-8") == raw_output:
+            print(f"Output: {previous} (unchanged)")
+            return previous
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(raw_output)
+        print(f"Output: {output_file} (restored from cache)")
+        return Path(output_file)
 
-    raw_output = "".join(raw_chunks)
+    print(f"Output: {output_file}")
+    if by_section:
+        raw_output, dropped, input_tokens, output_tokens = _write_by_section(
+            client, writing_template, section_template, frame_template, plan, image_annotations,
+            slang_glossary, editor_alignment,
+        )
+        if raw_output is None:
+            raise RuntimeError("Could not write the ticker/POTD/footer blocks; no output was saved.")
+        stop_reason = f"{dropped} sections dropped" if dropped else "end_turn"
+        truncated = dropped > 0
+    else:
+        print(f"Streaming...\n")
+        messages = [{"role": "user", "content": writing_prompt}]
+        raw_output, writing_response = _stream_writing(client, messages)
+        input_tokens = writing_response.usage.input_tokens
+        output_tokens = writing_response.usage.output_tokens
+
+        # Cut off at max_tokens: ask for the rest instead of regenerating it all
+        for continuation in range(1, WRITING_CONTINUATIONS + 1):
+            if writing_response.stop_reason != "max_tokens":
+                break
+            open_block, missing = _unfinished_blocks(raw_output)
+            if not open_block and not missing:
+                break
+            print(f"\n[Output hit max_tokens with {open_block or 'no block'} open; "
+                  f"continuing ({continuation}/{WRITING_CONTINUATIONS})...]")
+            messages = [
+                {"role": "user", "content": writing_prompt},
+                {"role": "assistant", "content": raw_output},
+                {"role": "user", "content": _continuation_request(raw_output)},
+            ]
+            more, writing_response = _stream_writing(client, messages)
+            raw_output = _join_continuation(raw_output, more, open_block)
+            input_tokens += writing_response.usage.input_tokens
+            output_tokens += writing_response.usage.output_tokens
+
+        stop_reason = writing_response.stop_reason
+        open_block, missing = _unfinished_blocks(raw_output)
+        truncated = stop_reason == "max_tokens" and bool(open_block or missing)
 
     # ── Save edition memory ──
     edition_memory = extract_block(raw_output, "EDITION_MEMORY")
     if edition_memory:
-        memory_line = edition_memory.strip()
-        with open(memory_path, "a", encoding="utf-8") as mf:
-            mf.write(memory_line + "\n")
+        memory.append(edition_memory)
         print(f"\n[Edition memory saved to {memory_path.name}]")
     else:
         print("\nWARNING: No EDITION_MEMORY block found in AI output. Memory not updated.")
@@ -1143,36 +1552,8 @@ def main():
         writing_slang = [t.strip() for t in unknown_slang_block.split(",") if t.strip()]
 
     if writing_slang:
-        existing_terms = set()
-        if slang_path.is_file():
-            for line in slang_path.read_text(encoding="utf-8").splitlines():
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                term = line.split("=")[0].strip().lower()
-                if term:
-                    existing_terms.add(term)
-
-        new_terms = [t for t in writing_slang if t.lower() not in existing_terms]
-
+        new_terms = glossary.add_unknown(writing_slang)
         if new_terms:
-            emoji_terms = [t for t in new_terms if any(ord(c) > 0x2600 for c in t)]
-            phrase_terms = [t for t in new_terms if '[' in t and t not in emoji_terms]
-            word_terms = [t for t in new_terms if t not in emoji_terms and t not in phrase_terms]
-
-            with open(slang_path, "a", encoding="utf-8") as sf:
-                if word_terms:
-                    sf.write("\n# --- New (needs definitions) ---\n")
-                    for term in word_terms:
-                        sf.write(f"{term} = ???\n")
-                if phrase_terms:
-                    sf.write("\n# --- New phrase patterns (needs definitions) ---\n")
-                    for term in phrase_terms:
-                        sf.write(f"{term} = ???\n")
-                if emoji_terms:
-                    sf.write("\n# --- New emoji combos (needs definitions) ---\n")
-                    for term in emoji_terms:
-                        sf.write(f"{term} = ???\n")
             print(f"[New slang added to {slang_path.name}: {', '.join(new_terms)}]")
             print(f"  -> Edit {slang_path.name} to fill in definitions for terms marked '???'")
         else:
@@ -1183,19 +1564,59 @@ def main():
     # ── Save output ──
     with open(output_file, "w", encoding="utf-8") as f:
         f.write(raw_output)
+    # A truncated draft is not worth reusing; the next run should try again
+    if not truncated:
+        cache.put("writing", writing_key, {"raw_output": raw_output, "raw_path": output_file})
 
     print(f"\n{'=' * 60}")
     print(f"GENERATION COMPLETE")
     print(f"{'=' * 60}")
-    print(f"AI output chars: {char_count:,}")
-    print(f"Writing pass: input {writing_response.usage.input_tokens:,} / output {writing_response.usage.output_tokens:,} tokens")
-    print(f"Stop reason: {writing_response.stop_reason}")
-    if writing_response.stop_reason == "max_tokens":
+    print(f"AI output chars: {len(raw_output):,}")
+    print(f"Writing pass: input {input_tokens:,} / output {output_tokens:,} tokens")
+    print(f"Stop reason: {stop_reason}")
+    if truncated and by_section:
+        print("WARNING: Some sections are missing from the output (see above).")
+    elif truncated:
         print("WARNING: Output was truncated! The model hit the max_tokens limit.")
         print("The output file is likely incomplete.")
     print(f"Saved to: {output_file}")
     print(f"  -> Run assemble.py to combine with template.")
+    return Path(output_file)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate the raw newsletter content via the LLM passes")
+    add_force_argument(parser)
+    parser.add_argument(
+        "--llm",
+        choices=llm_replay.MODES,
+        default=None,
+        help="live API calls, record them as fixtures, or replay fixtures offline "
+             "(default: $FIZZ_LLM_MODE or live)",
+    )
+    parser.add_argument(
+        "--analysis",
+        choices=ANALYSIS_MODES,
+        default=None,
+        help="one analysis call, map-reduce over chunks of the CSV, or map-reduce only for "
+             f"prompts over {TOKEN_WARNING_THRESHOLD:,} tokens (default: $FIZZ_ANALYSIS_MODE or {ANALYSIS_MODE})",
+    )
+    parser.add_argument(
+        "--writing",
+        choices=WRITING_MODES,
+        default=None,
+        help="write the newsletter in one streamed call, or one concurrent call per plan section "
+             f"(default: $FIZZ_WRITING_MODE or {WRITING_MODE})",
+    )
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    if args.llm:
+        os.environ["FIZZ_LLM_MODE"] = args.llm
+    if args.analysis:
+        os.environ["FIZZ_ANALYSIS_MODE"] = args.analysis
+    if args.writing:
+        os.environ["FIZZ_WRITING_MODE"] = args.writing
+    cache = StageCache(force=args.force)
+    with profiled("generate", args.profile):
+        main(cache)
+    print(cache.report())
@@ -0,0 +1,38 @@
+"""
+limits.py
+Caps on concurrent LLM requests and SMTP sessions shared by every process
+of a multi-community run.
+
+fanout.py creates one multiprocessing semaphore per resource and installs
+them in each worker process. A normal single-community run installs
+nothing and slot() is a no-op.
+
+Usage:
+    from limits import slot
+    with slot("llm"):
+        response = client.messages.create(...)
+"""
+
+from contextlib import contextmanager
+
+_semaphores = {}
+
+
+def install(llm=None, smtp=None) -> None:
+    """Register the shared semaphores for this process (a pool initializer)."""
+    _semaphores["llm"] = llm
+    _semaphores["smtp"] = smtp
+
+
+@contextmanager
+def slot(kind: str):
+    """Hold one `kind` slot ("llm" or "smtp") for the duration of the block."""
+    sem = _semaphores.get(kind)
+    if sem is None:
+        yield
+        return
+    sem.acquire()
+    try:
+        yield
+    finally:
+        sem.release()
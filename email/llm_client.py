@@ -0,0 +1,376 @@
+"""
+llm_client.py
+Retries, a circuit breaker and resumable streams for the MiniMax client.
+
+generate-email.py wraps its Anthropic-protocol client (or llm_replay's
+recording/replaying stand-in) in ResilientClient. client.messages.create and
+client.messages.stream keep their signatures, but:
+
+- Transient failures are retried with full-jitter exponential backoff:
+  connection errors, timeouts, 408/409/429 and 5xx. A Retry-After header is
+  honoured. Overload (HTTP 529 or an overloaded_error event) waits longer.
+- A circuit breaker shared by every call of the client opens after
+  BREAKER_THRESHOLD consecutive failed attempts (non-retryable errors such
+  as a bad request don't count). While it is open, new calls fail at once
+  with CircuitOpenError instead of piling onto a struggling API; retries of
+  calls already under way wait until it has been open BREAKER_COOLDOWN
+  seconds. Then one new call is let through as a trial, and a success
+  closes the breaker again.
+- Streams are journaled. The text received so far is saved to
+  data/.llm-journal/ while it arrives. If the stream drops, the wrapper asks
+  the model to continue from that text (the partial output as the assistant
+  turn plus RESUME_PROMPT) and yields only the new text. If the whole
+  process dies, a rerun with the same request replays the saved text and
+  then continues from it. The journal is deleted when a stream completes.
+
+Errors that a retry cannot fix (authentication, bad request) are raised
+unchanged, so callers keep their own handling for them.
+
+bench/fake_llm_server.py is a local Anthropic-protocol server with
+injectable 5xx, overload and mid-stream failures for exercising all of this.
+
+Usage:
+    client = ResilientClient(anthropic.Anthropic(api_key=..., max_retries=0))
+    response = client.messages.create(model=..., max_tokens=..., messages=...)
+    with client.messages.stream(model=..., max_tokens=..., messages=...) as s:
+        for text in s.text_stream:
+            ...
+        final = s.get_final_message()
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from paths import DATA_DIR
+
+# ── Config ──────────────────────────────────────────────────────────────────
+MAX_ATTEMPTS = 5            # tries per request (a resumed stream counts each reconnect)
+BASE_DELAY = 1.0            # seconds; backoff ceiling doubles per attempt ...
+MAX_DELAY = 30.0            # ... up to this
+OVERLOAD_FACTOR = 4         # overload waits this many times longer
+BREAKER_THRESHOLD = 5       # consecutive failed attempts that open the breaker
+BREAKER_COOLDOWN = 60.0     # seconds the breaker stays open
+JOURNAL_EVERY = 2.0         # seconds between partial-stream saves
+RESUME_PROMPT = (
+    "Your previous response was interrupted. Continue exactly where it stopped: output only the "
+    "remaining text, starting with the next character, without repeating anything or adding commentary."
+)
+# ────────────────────────────────────────────────────────────────────────────
+
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class CircuitOpenError(RuntimeError):
+    """The API failed too often recently; calls are refused until the cooldown ends."""
+
+
+def journal_dir() -> Path:
+    value = os.environ.get("FIZZ_LLM_JOURNAL")
+    return Path(value).expanduser() if value else DATA_DIR / ".llm-journal"
+
+
+def classify(exc: BaseException) -> tuple[bool, bool]:
+    """(retryable, overloaded) for an exception raised by a client call."""
+    status = getattr(exc, "status_code", None)
+    overloaded = status == 529 or "overloaded" in str(exc).lower()
+    if overloaded or status in RETRY_STATUS:
+        return True, overloaded
+    if status is not None:
+        return False, False
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True, False
+    # anthropic.APIConnectionError (and APITimeoutError) before the response;
+    # a stream dropped mid-body surfaces as the HTTP library's TransportError.
+    # Matched by name so no particular SDK or httpx version is needed.
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    return bool(names & {"APIConnectionError", "TransportError"}), False
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, overloaded: bool = False, retry_after: float | None = None) -> float:
+    """Full-jitter exponential backoff for the attempt-th retry (1-based)."""
+    ceiling = min(MAX_DELAY, BASE_DELAY * 2 ** (attempt - 1))
+    if overloaded:
+        ceiling = min(MAX_DELAY * OVERLOAD_FACTOR, ceiling * OVERLOAD_FACTOR)
+    delay = random.uniform(0, ceiling)
+    return max(delay, retry_after or 0.0)
+
+
+def trim_overlap(partial: str, more: str, min_overlap: int = 64, max_overlap: int = 500) -> str:
+    """`more` without a head that repeats the end of `partial`.
+
+    Models asked to continue sometimes restart a little before the cut.
+    Only overlaps of at least min_overlap characters count, so a short
+    coincidental match is kept.
+    """
+    for size in range(min(len(partial), len(more), max_overlap), min_overlap - 1, -1):
+        if partial.endswith(more[:size]):
+            return more[size:]
+    return more
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker, safe to share between threads."""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """Admit a new request, or raise CircuitOpenError while the breaker is open.
+
+        Returns True if the request is the half-open trial; pass that on to
+        record() / release().
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if remaining > 0 or self._trial:
+                raise CircuitOpenError(
+                    f"LLM API circuit open after {self.failures} consecutive failures; "
+                    f"retry in {max(remaining, 0):.0f}s"
+                )
+            self._trial = True      # half-open: this call decides
+            return True
+
+    def wait_for_retry(self) -> None:
+        """Block the retry of a request already under way until the breaker's open period is over.
+
+        Retries are not refused like new requests: they wait the cooldown
+        out, so a short outage delays running calls instead of failing them.
+        """
+        while True:
+            with self._lock:
+                if self.opened_at is None:
+                    return
+                remaining = self.opened_at + self.cooldown - time.monotonic()
+            if remaining <= 0:
+                return
+            print(f"  [LLM circuit breaker open; retry waits {remaining:.0f}s]", flush=True)
+            time.sleep(remaining)
+
+    def record(self, ok: bool, trial: bool = False) -> None:
+        """Outcome of a retryable attempt; `trial` is what before_call() returned."""
+        with self._lock:
+            if trial:
+                self._trial = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.threshold:
+                if self.opened_at is None:
+                    print(f"[LLM circuit breaker open: {self.failures} consecutive failures, "
+                          f"pausing calls for {self.cooldown:.0f}s]")
+                self.opened_at = time.monotonic()
+
+    def release(self, trial: bool) -> None:
+        """End a call that neither succeeded nor failed (abandoned, interrupted, or
+        a non-retryable error such as a bad request).
+
+        If it held the half-open trial, the next call can take it; the
+        failure count is unchanged.
+        """
+        if trial:
+            with self._lock:
+                self._trial = False
+
+
+class _Journal:
+    """The partial text of one streamed request, saved under its request hash."""
+
+    def __init__(self, request: dict):
+        blob = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        self.request = request
+        self.path = journal_dir() / f"stream_{hashlib.sha256(blob.encode('utf-8')).hexdigest()[:24]}.json"
+        self._saved_at = 0.0
+
+    def load(self) -> str:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))["text"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            return ""
+
+    def save(self, text: str, force: bool = False) -> None:
+        now = time.monotonic()
+        if not text or (not force and now - self._saved_at < JOURNAL_EVERY):
+            return
+        self._saved_at = now
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"request": self.request, "text": text}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class _ResumableStream:
+    """Context manager with the text_stream / get_final_message() interface."""
+
+    def __init__(self, owner: "ResilientClient", kwargs: dict):
+        self._owner = owner
+        self._kwargs = kwargs
+        self._journal = _Journal(kwargs)
+        self._text = ""
+        self._usage = [0, 0]
+        self._final = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _request(self) -> dict:
+        if not self._text:
+            return self._kwargs
+        messages = list(self._kwargs["messages"]) + [
+            {"role": "assistant", "content": self._text},
+            {"role": "user", "content": RESUME_PROMPT},
+        ]
+        return {**self._kwargs, "messages": messages}
+
+    def _attempt(self):
+        """Yield the new text of one streamed request; sets self._final when it completes."""
+        resuming = bool(self._text)
+        head = ""      # a resumed stream is held back until its overlap can be trimmed
+        with self._owner._messages.stream(**self._request()) as s:
+            for chunk in s.text_stream:
+                if resuming:
+                    head += chunk
+                    if len(head) < 500:
+                        continue
+                    chunk, head, resuming = trim_overlap(self._text, head), "", False
+                self._text += chunk
+                self._journal.save(self._text)
+                yield chunk
+            if resuming and head:
+                chunk = trim_overlap(self._text, head)
+                self._text += chunk
+                yield chunk
+            final = s.get_final_message()
+        self._usage[0] += final.usage.input_tokens
+        self._usage[1] += final.usage.output_tokens
+        self._final = final
+
+    @property
+    def text_stream(self):
+        saved = self._journal.load()
+        if saved:
+            print(f"[Resuming a stream interrupted in an earlier run: {len(saved):,} chars saved in "
+                  f"{self._journal.path.name}]", flush=True)
+            self._text = saved
+            yield saved
+        breaker = self._owner.breaker
+        trial = breaker.before_call()
+        for attempt in range(1, self._owner.max_attempts + 1):
+            if attempt > 1:
+                breaker.wait_for_retry()
+            try:
+                yield from self._attempt()
+            except Exception as exc:
+                retryable, overloaded = classify(exc)
+                self._journal.save(self._text, force=True)
+                if not retryable:
+                    raise       # not the API's health; released below
+                breaker.record(False, trial)
+                trial = False
+                if attempt == self._owner.max_attempts:
+                    raise
+                delay = backoff_delay(attempt, overloaded, _retry_after(exc))
+                print(f"\n  [Stream {'overloaded' if overloaded else 'failed'} after {len(self._text):,} chars "
+                      f"({type(exc).__name__}); resuming in {delay:.1f}s, attempt {attempt + 1}/"
+                      f"{self._owner.max_attempts}]", flush=True)
+                time.sleep(delay)
+                continue
+            else:
+                breaker.record(True, trial)
+                trial = False
+            finally:
+                # A consumer that abandons the stream (GeneratorExit, Ctrl+C)
+                # must not keep the half-open trial forever
+                breaker.release(trial)
+                trial = False
+            self._journal.clear()
+            return
+
+    def get_final_message(self):
+        final = self._final
+        return SimpleNamespace(
+            stop_reason=final.stop_reason,
+            usage=SimpleNamespace(input_tokens=self._usage[0], output_tokens=self._usage[1]),
+            content=[SimpleNamespace(type="text", text=self._text)],
+        )
+
+
+class _Messages:
+    def __init__(self, owner: "ResilientClient", messages):
+        self._owner = owner
+        self._messages = messages
+
+    def create(self, **kwargs):
+        owner = self._owner
+        trial = owner.breaker.before_call()
+        for attempt in range(1, owner.max_attempts + 1):
+            if attempt > 1:
+                owner.breaker.wait_for_retry()
+            try:
+                response = self._messages.create(**kwargs)
+            except Exception as exc:
+                retryable, overloaded = classify(exc)
+                if not retryable:
+                    raise       # not the API's health; released below
+                owner.breaker.record(False, trial)
+                trial = False
+                if attempt == owner.max_attempts:
+                    raise
+                delay = backoff_delay(attempt, overloaded, _retry_after(exc))
+                print(f"  [LLM call {'overloaded' if overloaded else 'failed'} ({type(exc).__name__}); "
+                      f"retrying in {delay:.1f}s, attempt {attempt + 1}/{owner.max_attempts}]", flush=True)
+                time.sleep(delay)
+                continue
+            else:
+                owner.breaker.record(True, trial)
+                trial = False
+            finally:
+                owner.breaker.release(trial)    # also after Ctrl+C, which is neither outcome
+                trial = False
+            return response
+
+    def stream(self, **kwargs):
+        # The request is made when the stream is iterated, like the SDK's
+        return _ResumableStream(self._owner, kwargs)
+
+
+class ResilientClient:
+    """Wraps an Anthropic-protocol client; only .messages is used."""
+
+    def __init__(self, client, max_attempts: int = MAX_ATTEMPTS, breaker: CircuitBreaker | None = None):
+        self.max_attempts = max_attempts
+        self.breaker = breaker or CircuitBreaker()
+        self._messages = client.messages
+        self.messages = _Messages(self, client.messages)
@@ -0,0 +1,239 @@
+"""
+llm_replay.py
+Record/replay layer for the pipeline's LLM calls.
+
+generate-email.py talks to MiniMax three ways: client.messages.create
+(analysis), client.messages.stream (writing) and requests.post (image
+annotation). All three go through this module, which runs in one of three
+modes chosen by FIZZ_LLM_MODE (or generate-email.py --llm):
+
+    live     call the API (default)
+    record   call the API and save every response as a fixture
+    replay   answer from fixtures only; no network, no API key needed
+
+A fixture is keyed by a hash of the request (model, system prompt, messages,
+max_tokens; URL and JSON body for requests.post), so replay is exact: the
+same inputs give the same responses, and a changed prompt fails loudly with
+the fixture it looked for. Streams are stored chunk by chunk with their
+arrival times. FIZZ_REPLAY_TIMING controls how a stream is replayed:
+
+    none        as fast as possible (default)
+    recorded    with the original inter-chunk timing
+    <seconds>   a fixed delay per chunk, e.g. 0.02
+
+Fixtures live in data/llm-fixtures/ (FIZZ_LLM_FIXTURES overrides). Replay
+pairs well with `--force all`, since the stage cache would otherwise skip
+the passes being replayed.
+
+Usage:
+    FIZZ_LLM_MODE=record python3 generate-email.py
+    FIZZ_LLM_MODE=replay FIZZ_REPLAY_TIMING=recorded python3 generate-email.py --force all
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from paths import DATA_DIR, ROOT_DIR
+
+MODES = ("live", "record", "replay")
+
+
+def mode() -> str:
+    value = os.environ.get("FIZZ_LLM_MODE", "live").strip().lower() or "live"
+    if value not in MODES:
+        raise ValueError(f"FIZZ_LLM_MODE must be one of {', '.join(MODES)}, not {value!r}")
+    return value
+
+
+def fixtures_dir() -> Path:
+    value = os.environ.get("FIZZ_LLM_FIXTURES")
+    if not value:
+        return DATA_DIR / "llm-fixtures"
+    path = Path(value).expanduser()
+    return path if path.is_absolute() else ROOT_DIR / path
+
+
+def _chunk_delay(recorded_gap: float) -> float:
+    timing = os.environ.get("FIZZ_REPLAY_TIMING", "none").strip().lower()
+    if timing in ("", "none", "0"):
+        return 0.0
+    if timing == "recorded":
+        return recorded_gap
+    return float(timing)
+
+
+# ── Fixture storage ─────────────────────────────────────────────────────
+
+def _fixture_path(kind: str, request: dict) -> Path:
+    blob = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha256(blob.encode("utf-8")).hexdigest()[:24]
+    return fixtures_dir() / f"{kind}_{digest}.json"
+
+
+def _load(kind: str, request: dict) -> dict:
+    path = _fixture_path(kind, request)
+    if not path.is_file():
+        raise FileNotFoundError(
+            f"No recorded {kind} response for this request ({path}). "
+            "Run once with FIZZ_LLM_MODE=record to capture it."
+        )
+    return json.loads(path.read_text(encoding="utf-8"))["response"]
+
+
+def _save(kind: str, request: dict, response: dict) -> None:
+    path = _fixture_path(kind, request)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"request": request, "response": response}, ensure_ascii=False, indent=1),
+                   encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# ── Response shapes ─────────────────────────────────────────────────────
+# Only the attributes generate-email.py reads are reproduced.
+
+def _message_to_dict(message) -> dict:
+    return {
+        "content": [{"type": block.type, "text": getattr(block, "text", "")} for block in message.content],
+        "usage": {"input_tokens": message.usage.input_tokens, "output_tokens": message.usage.output_tokens},
+        "stop_reason": message.stop_reason,
+    }
+
+
+def _message_from_dict(data: dict) -> SimpleNamespace:
+    return SimpleNamespace(
+        content=[SimpleNamespace(**block) for block in data["content"]],
+        usage=SimpleNamespace(**data["usage"]),
+        stop_reason=data["stop_reason"],
+    )
+
+
+class _ReplayHTTPResponse:
+    def __init__(self, data: dict):
+        self.status_code = data["status_code"]
+        self.text = data["text"]
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} (replayed)", response=self)
+
+
+# ── Streams ─────────────────────────────────────────────────────────────
+
+class _RecordingStream:
+    """Wraps a live MessageStreamManager and saves what it yields."""
+
+    def __init__(self, manager, request: dict):
+        self._manager = manager
+        self._request = request
+        self._chunks: list[list] = []
+
+    def __enter__(self):
+        self._stream = self._manager.__enter__()
+        self._start = time.monotonic()
+        return self
+
+    @property
+    def text_stream(self):
+        for text in self._stream.text_stream:
+            self._chunks.append([round(time.monotonic() - self._start, 4), text])
+            yield text
+
+    def get_final_message(self):
+        message = self._stream.get_final_message()
+        response = _message_to_dict(message)
+        response["chunks"] = self._chunks
+        _save("stream", self._request, response)
+        return message
+
+    def __exit__(self, *exc):
+        return self._manager.__exit__(*exc)
+
+
+class _ReplayStream:
+    def __init__(self, request: dict):
+        self._request = request
+
+    def __enter__(self):
+        self._data = _load("stream", self._request)
+        return self
+
+    @property
+    def text_stream(self):
+        last = 0.0
+        for offset, text in self._data["chunks"]:
+            delay = _chunk_delay(offset - last)
+            if delay > 0:
+                time.sleep(delay)
+            last = offset
+            yield text
+
+    def get_final_message(self):
+        return _message_from_dict(self._data)
+
+    def __exit__(self, *exc):
+        return False
+
+
+# ── Client ──────────────────────────────────────────────────────────────
+
+class _Messages:
+    def __init__(self, client, mode: str):
+        self._client = client
+        self._mode = mode
+
+    def create(self, **kwargs):
+        if self._mode == "replay":
+            return _message_from_dict(_load("create", kwargs))
+        message = self._client.messages.create(**kwargs)
+        if self._mode == "record":
+            _save("create", kwargs, _message_to_dict(message))
+        return message
+
+    def stream(self, **kwargs):
+        if self._mode == "replay":
+            return _ReplayStream(kwargs)
+        manager = self._client.messages.stream(**kwargs)
+        if self._mode == "record":
+            return _RecordingStream(manager, kwargs)
+        return manager
+
+
+class ReplayClient:
+    """Stands in for anthropic.Anthropic; only .messages is used."""
+
+    def __init__(self, factory, mode: str):
+        # No real client (and no API key) is needed to replay
+        self._client = factory() if mode != "replay" else None
+        self.messages = _Messages(self._client, mode)
+
+
+def make_client(factory):
+    """The real client in live mode, a recording/replaying wrapper otherwise."""
+    current = mode()
+    if current == "live":
+        return factory()
+    print(f"[LLM {current} mode: fixtures in {fixtures_dir()}]")
+    return ReplayClient(factory, current)
+
+
+def post(url: str, headers: dict | None = None, json: dict | None = None, timeout: float | None = None):
+    """requests.post with record/replay. Headers (credentials) are not part of the key."""
+    current = mode()
+    request = {"url": url, "json": json}
+    if current == "replay":
+        return _ReplayHTTPResponse(_load("post", request))
+    import requests
+    resp = requests.post(url, headers=headers, json=json, timeout=timeout)
+    # Rate-limit and server errors are retried by the caller; keep only the answer
+    if current == "record" and resp.status_code < 500 and resp.status_code != 429:
+        _save("post", request, {"status_code": resp.status_code, "text": resp.text})
+    return resp
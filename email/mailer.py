@@ -0,0 +1,444 @@
+"""
+mailer.py
+Bulk SMTP delivery engine used by send.py.
+
+Keeps one authenticated SMTP session open and delivers the newsletter as one
+envelope per recipient (or per small batch), instead of a single message
+with the whole mailing list in Bcc. Relays like Gmail cap recipients per
+message and throttle large Bcc lists; small envelopes paced under a rate
+limit avoid both.
+
+- Paced by a token bucket (recipients per minute)
+- Optionally spreads envelopes over a small pool of parallel connections
+  sharing that one rate limit
+- Reconnects and retries on 421 / 4xx replies and dropped connections
+- Writes a JSONL progress journal so a crashed send resumes where it stopped
+- PreparedMessage encodes the (large, inlined-CSS) HTML body once; each
+  envelope only adds its own To / Message-ID / List-Unsubscribe headers
+
+Usage:
+    prepared = PreparedMessage(html, subject, "FizzBuzz <news@example.com>")
+    sender = BulkSender(host, port, user, password, sender_email,
+                        rate_per_minute=60, journal_path=Path("journal.jsonl"),
+                        connections=4)
+    report = sender.send_all(recipients, prepared.for_recipients)
+"""
+
+import json
+import os
+import queue
+import smtplib
+import threading
+import time
+from datetime import datetime
+from email import policy
+from email.charset import Charset, BASE64, QP
+from email.generator import BytesGenerator
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+from io import BytesIO
+from pathlib import Path
+from typing import Callable
+from urllib.parse import quote
+
+from limits import slot
+
+MAX_ATTEMPTS = 5            # per envelope, across reconnects
+RETRY_BASE_DELAY = 2.0      # seconds, doubled on each attempt
+SMTP_TIMEOUT = 60
+FINAL_STATUSES = {"sent", "refused"}   # journal statuses a resumed send skips
+
+
+class RateLimiter:
+    """Thread-safe token bucket. acquire(n) blocks until n tokens are free."""
+
+    def __init__(self, per_minute: float, burst: int | None = None):
+        self.rate = per_minute / 60.0 if per_minute else 0.0
+        self.capacity = float(burst if burst is not None else max(1, int(self.rate) or 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: int = 1) -> None:
+        if not self.rate:
+            return
+        n = min(n, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait = (n - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SendJournal:
+    """Append-only JSONL record of per-recipient delivery outcomes.
+
+    Each line is {"rcpt": ..., "status": "sent" | "refused" | "failed", "ts": ..., ...}.
+    "refused" is a permanent (5xx) rejection of the address at RCPT;
+    "failed" means the transient retries ran out or the server rejected the
+    whole message (MAIL FROM / DATA). Only recipients whose latest status is final ("sent" or
+    "refused") are in `done` and skipped when a send is resumed, so failed
+    ones are tried again.
+    """
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self.done: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._fh = None
+        if path is None:
+            return
+        if path.is_file():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from a crash
+                self._mark(entry["rcpt"], entry["status"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def _mark(self, rcpt: str, status: str) -> None:
+        if status in FINAL_STATUSES:
+            self.done[rcpt] = status
+        else:
+            self.done.pop(rcpt, None)
+
+    def record(self, recipients: list[str], status: str, detail: str = "") -> None:
+        with self._lock:
+            for rcpt in recipients:
+                self._mark(rcpt, status)
+            if self._fh is None:
+                return
+            ts = datetime.now().isoformat(timespec="seconds")
+            for rcpt in recipients:
+                entry = {"rcpt": rcpt, "status": status, "ts": ts}
+                if detail:
+                    entry["detail"] = detail
+                self._fh.write(json.dumps(entry) + "\n")
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class PreparedMessage:
+    """A newsletter serialized once, stamped with per-envelope headers on demand.
+
+    The MIME tree (and the quoted-printable or base64 encoding of every part)
+    is generated a single time in __init__. for_recipients() then only builds
+    a few hundred bytes of headers and concatenates them with the cached body,
+    so per-recipient sends don't re-encode a 100KB HTML part each time.
+
+    list_unsubscribe may contain {email}, which is replaced with the
+    URL-quoted recipient address for single-recipient envelopes.
+    """
+
+    def __init__(
+        self,
+        html: str,
+        subject: str,
+        from_header: str,
+        text: str | None = None,
+        encoding: str = "quoted-printable",
+        list_unsubscribe: str | None = None,
+    ):
+        charset = Charset("utf-8")
+        charset.body_encoding = QP if encoding == "quoted-printable" else BASE64
+
+        msg = MIMEMultipart("alternative")
+        msg["From"] = from_header
+        msg["Subject"] = subject
+        if text is not None:
+            msg.attach(MIMEText(text, "plain", charset))
+        msg.attach(MIMEText(html, "html", charset))
+
+        buf = BytesIO()
+        BytesGenerator(buf, policy=policy.compat32.clone(linesep="\r\n")).flatten(msg)
+        raw = buf.getvalue()
+        header_end = raw.index(b"\r\n\r\n") + 2
+        self.common_headers = raw[:header_end]
+        self.body = raw[header_end:]  # starts with the blank separator line
+        self.list_unsubscribe = list_unsubscribe
+
+    def for_recipients(self, batch: list[str]) -> bytes:
+        """Full message bytes for one envelope."""
+        if len(batch) == 1:
+            to = batch[0]
+        else:
+            to = "undisclosed-recipients:;"
+        headers = [
+            f"To: {to}",
+            f"Date: {formatdate(localtime=True)}",
+            f"Message-ID: {make_msgid(domain='fizzbuzz')}",
+        ]
+        if self.list_unsubscribe:
+            if "{email}" not in self.list_unsubscribe:
+                headers.append(f"List-Unsubscribe: <{self.list_unsubscribe}>")
+            elif len(batch) == 1:
+                target = self.list_unsubscribe.replace("{email}", quote(batch[0], safe=""))
+                headers.append(f"List-Unsubscribe: <{target}>")
+        per_envelope = ("\r\n".join(headers) + "\r\n").encode("utf-8")
+        return self.common_headers + per_envelope + self.body
+
+
+def _is_transient(code: int) -> bool:
+    return 400 <= code < 500
+
+
+class _Session:
+    """One SMTP connection owned by a single worker, plus its throughput stats."""
+
+    def __init__(self, owner: "BulkSender", index: int):
+        self.owner = owner
+        self.index = index
+        self.server: smtplib.SMTP | None = None
+        self.stats = {"connection": index, "envelopes": 0, "sent": 0, "failed": 0,
+                      "reconnects": 0, "busy": 0.0}
+
+    def connect(self) -> None:
+        o = self.owner
+        self.close()
+        server = smtplib.SMTP(o.host, o.port, timeout=SMTP_TIMEOUT)
+        server.ehlo()
+        if o.use_tls:
+            # Never fall back to plaintext: a missing STARTTLS may be a downgrade
+            if not server.has_extn("starttls"):
+                server.close()
+                raise smtplib.SMTPNotSupportedError(
+                    f"{o.host}:{o.port} does not offer STARTTLS; refusing to log in and send in plaintext"
+                )
+            server.starttls()
+            server.ehlo()
+        if o.user and o.password:
+            server.login(o.user, o.password)
+        self.server = server
+
+    def close(self) -> None:
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self.server = None
+
+    def _drop(self) -> None:
+        """Abandon a broken session without the QUIT handshake."""
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+            self.stats["reconnects"] += 1
+
+    def deliver(self, batch: list[str], message: bytes | str) -> tuple[list[str], list[str], list[str], str]:
+        """Send one envelope, reconnecting and retrying on transient errors.
+
+        Returns (sent, refused, failed, last_error): refused recipients were
+        rejected permanently at RCPT (5xx); failed ones still had transient
+        errors after MAX_ATTEMPTS, or were in an envelope the server rejected
+        as a whole. Recipients accepted on an earlier attempt of a
+        partially refused envelope are recorded as they succeed.
+        """
+        pending = list(batch)
+        refused_for_good: list[str] = []
+        last_error = ""
+        self.stats["envelopes"] += 1
+        for attempt in range(MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(RETRY_BASE_DELAY * 2 ** (attempt - 1))
+            try:
+                if self.server is None:
+                    self.connect()
+                refused = self.server.sendmail(self.owner.sender_email, pending, message)
+            except smtplib.SMTPRecipientsRefused as exc:
+                refused = exc.recipients
+            except (smtplib.SMTPAuthenticationError, smtplib.SMTPNotSupportedError):
+                raise  # bad credentials or no TLS fail the whole send, not each recipient
+            except smtplib.SMTPResponseException as exc:
+                last_error = f"{exc.smtp_code} {exc.smtp_error!r}"
+                if not _is_transient(exc.smtp_code):
+                    # MAIL FROM / DATA rejected the message itself (552 too
+                    # large, 554 policy): nothing is wrong with the addresses,
+                    # so they stay "failed" and a resumed send tries again
+                    return [], refused_for_good, pending, last_error
+                # 421 means the server is closing the session; 4xx on other
+                # commands usually clears on a fresh connection too.
+                self._drop()
+                continue
+            except (smtplib.SMTPServerDisconnected, OSError) as exc:
+                last_error = str(exc) or exc.__class__.__name__
+                self._drop()
+                continue
+
+            retry = []
+            for rcpt, (code, resp) in refused.items():
+                last_error = f"{code} {resp!r}"
+                (retry if _is_transient(code) else refused_for_good).append(rcpt)
+            sent = [r for r in pending if r not in refused]
+            if not retry:
+                return sent, refused_for_good, [], last_error
+            # Partial success: record what went through, retry the rest
+            if sent:
+                self.owner._record(self, sent, [], [], "", envelope_done=False)
+            pending = retry
+        return [], refused_for_good, pending, last_error
+
+
+class BulkSender:
+    """Deliver one message to many recipients over pooled SMTP sessions.
+
+    With connections=1 (the default) this is a single persistent session.
+    With more, worker threads each hold their own session and pull envelopes
+    from a shared queue; the rate limiter and journal are shared, so the
+    configured rate is a global cap across the pool.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str | None,
+        password: str | None,
+        sender_email: str,
+        batch_size: int = 1,
+        rate_per_minute: float = 60,
+        journal_path: Path | None = None,
+        use_tls: bool = True,
+        connections: int = 1,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.sender_email = sender_email
+        self.batch_size = max(1, batch_size)
+        self.limiter = RateLimiter(rate_per_minute, burst=self.batch_size * max(1, connections))
+        self.journal_path = journal_path
+        self.use_tls = use_tls
+        self.connections = max(1, connections)
+        self._lock = threading.Lock()
+
+    def _record(self, session: _Session, sent: list[str], refused: list[str], failed: list[str],
+                error: str, envelope_done: bool = True) -> None:
+        if sent:
+            self._journal.record(sent, "sent")
+        if refused:
+            self._journal.record(refused, "refused", error)
+        if failed:
+            self._journal.record(failed, "failed", error)
+        failed = refused + failed
+        with self._lock:
+            self.report["sent"] += len(sent)
+            self.report["failed"] += len(failed)
+            session.stats["sent"] += len(sent)
+            session.stats["failed"] += len(failed)
+            self._processed += envelope_done
+        if self._progress:
+            if failed:
+                print(f"\n  ✗ {', '.join(failed)}: {error}")
+            print(f"  … {self._processed}/{self._total} envelopes processed", end="\r", flush=True)
+
+    def _worker(self, index: int, batches: "queue.SimpleQueue", build_message) -> None:
+        session = _Session(self, index)
+        self.sessions.append(session)
+        # In a multi-community run the pool of SMTP sessions is shared by all processes
+        with slot("smtp"):
+            self._drain(session, batches, build_message)
+
+    def _drain(self, session: _Session, batches: "queue.SimpleQueue", build_message) -> None:
+        try:
+            while not self._abort.is_set():
+                try:
+                    batch = batches.get_nowait()
+                except queue.Empty:
+                    return
+                self.limiter.acquire(len(batch))
+                t0 = time.monotonic()
+                sent, refused, failed, error = session.deliver(batch, build_message(batch))
+                session.stats["busy"] += time.monotonic() - t0
+                self._record(session, sent, refused, failed, error)
+        except BaseException as exc:
+            self._abort.set()
+            self._error = exc
+        finally:
+            session.close()
+
+    def send_all(self, recipients: list[str], build_message: Callable[[list[str]], bytes | str],
+                 progress: bool = True) -> dict:
+        """Deliver to every recipient not already sent or refused per the journal.
+
+        build_message(batch) returns the serialized message for one envelope
+        and must be safe to call from several threads.
+        Returns {"sent", "failed", "skipped", "elapsed", "per_connection"}.
+        """
+        self._journal = SendJournal(self.journal_path)
+        self.report = {"sent": 0, "failed": 0, "skipped": 0, "elapsed": 0.0}
+        self.sessions: list[_Session] = []
+        self._progress = progress
+        self._abort = threading.Event()
+        self._error: BaseException | None = None
+
+        todo = []
+        for rcpt in dict.fromkeys(recipients):
+            if rcpt in self._journal.done:
+                self.report["skipped"] += 1
+            else:
+                todo.append(rcpt)
+
+        if progress and self.report["skipped"]:
+            print(f"↩️  Resuming: {self.report['skipped']} recipient(s) already done per {self.journal_path}")
+
+        batches = queue.SimpleQueue()
+        for i in range(0, len(todo), self.batch_size):
+            batches.put(todo[i:i + self.batch_size])
+        self._total = batches.qsize()
+        self._processed = 0
+
+        start = time.monotonic()
+        try:
+            n_workers = min(self.connections, self._total) or 1
+            threads = [
+                threading.Thread(target=self._worker, args=(i + 1, batches, build_message), daemon=True)
+                for i in range(n_workers)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            self._journal.close()
+            self.report["elapsed"] = time.monotonic() - start
+            if progress and todo:
+                print()
+
+        if self._error is not None:
+            raise self._error
+
+        self.report["per_connection"] = sorted(
+            (s.stats for s in self.sessions), key=lambda st: st["connection"]
+        )
+        return self.report
+
+
+def format_throughput(report: dict) -> list[str]:
+    """Human-readable aggregate and per-connection throughput lines."""
+    elapsed = report["elapsed"] or 1e-9
+    lines = [f"Aggregate: {report['sent']} sent in {report['elapsed']:.1f}s "
+             f"({report['sent'] / elapsed * 60:.1f}/min)"]
+    for st in report.get("per_connection", []):
+        busy = st["busy"] or 1e-9
+        lines.append(
+            f"  conn {st['connection']}: {st['envelopes']} envelopes, {st['sent']} sent, "
+            f"{st['failed']} failed, {st['reconnects']} reconnects, "
+            f"{st['sent'] / busy * 60:.1f}/min while busy"
+        )
+    return lines
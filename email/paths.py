@@ -0,0 +1,44 @@
+"""
+paths.py
+Where one community's pipeline reads and writes its files.
+
+Defaults are the single-campus layout (data/, email/input/, email/output/,
+.mailing_list). Each can be redirected with an environment variable so
+several communities can run side by side (see fanout.py); relative values
+are resolved against the repo root:
+
+    FIZZ_DATA_DIR       posts DB, archive, sanitized CSV, stage cache
+    FIZZ_INPUT_DIR      glossary, edition memory, alignment and editor's note;
+                        prompts and templates fall back to email/input/
+    FIZZ_OUTPUT_DIR     generated newsletters and send journals
+    FIZZ_MAILING_LIST   recipient list
+    FIZZ_TENANT         name used to keep per-community logs/checkpoints apart
+"""
+
+import os
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+SHARED_INPUT_DIR = ROOT_DIR / "email" / "input"
+
+
+def _env_path(name: str, default: Path) -> Path:
+    value = os.environ.get(name)
+    if not value:
+        return default
+    path = Path(value).expanduser()
+    return path if path.is_absolute() else ROOT_DIR / path
+
+
+DATA_DIR = _env_path("FIZZ_DATA_DIR", ROOT_DIR / "data")
+INPUT_DIR = _env_path("FIZZ_INPUT_DIR", SHARED_INPUT_DIR)
+OUTPUT_DIR = _env_path("FIZZ_OUTPUT_DIR", ROOT_DIR / "email" / "output")
+MAILING_LIST_PATH = _env_path("FIZZ_MAILING_LIST", ROOT_DIR / ".mailing_list")
+LOGS_DIR = ROOT_DIR / "logs"
+TENANT = os.environ.get("FIZZ_TENANT", "")
+
+
+def input_file(name: str) -> Path:
+    """A community's own copy of an input file if it has one, else the shared one."""
+    own = INPUT_DIR / name
+    return own if own.is_file() or INPUT_DIR == SHARED_INPUT_DIR else SHARED_INPUT_DIR / name
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+pipeline.py
+Unattended pipeline runner behind `daily-email.sh --auto`.
+
+Runs scrape -> sanitize -> generate -> assemble -> send as a dependency
+graph with no prompts. Stages whose dependencies are met run concurrently
+(the two scrapers, when both are enabled). After each stage the runner
+writes a checkpoint to logs/pipeline-checkpoint.json; re-running after a
+failure resumes from the last completed stage, so the expensive LLM
+generation is never repeated once it has succeeded.
+
+Python stages run in-process: the generate module is loaded once and its
+raw output and the assembled HTML are handed to the next stage in memory,
+falling back to the checkpointed file paths after a resume.
+
+Within a stage, the content-hash stage cache (stage_cache.py) skips the
+sanitize, glossary, analysis, annotation, writing and assembly steps whose
+inputs have not changed; `--force STAGE` re-runs one and everything the checkpoint
+recorded after it.
+
+Usage:
+    python3 pipeline.py                          # resume today's run (or start one)
+    python3 pipeline.py --fresh                  # ignore the checkpoint
+    python3 pipeline.py --scrape both --send list
+    python3 pipeline.py --send none              # produce the edition only
+    python3 pipeline.py --force writing          # re-write even if inputs match
+    python3 pipeline.py --profile all            # cProfile + tracemalloc each stage into logs/
+
+Environment defaults: AUTO_SCRAPE (top-feed|crawl|both|none, default
+top-feed), AUTO_SEND (none|test|list, default test), TEST_EMAIL_RECIPIENT.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import nullcontext
+from datetime import date, datetime
+from importlib.util import spec_from_file_location, module_from_spec
+from pathlib import Path
+
+from paths import LOGS_DIR, TENANT
+from profiling import add_profile_argument, profiled
+from stage_cache import StageCache, add_force_argument
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT = SCRIPT_DIR.parent
+SCRAPING_DIR = ROOT / "scraping"
+CHECKPOINT_PATH = LOGS_DIR / (f"pipeline-checkpoint_{TENANT}.json" if TENANT else "pipeline-checkpoint.json")
+
+SCRAPE_CHOICES = ("top-feed", "crawl", "both", "none")
+SEND_CHOICES = ("none", "test", "list")
+
+
+# ── Module loading ──────────────────────────────────────────────────────
+
+_modules = {}
+
+
+def load_module(name: str, filename: str):
+    """Import an email/ script by file name (handles generate-email.py), once."""
+    if name not in _modules:
+        spec = spec_from_file_location(name, SCRIPT_DIR / filename)
+        mod = module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        _modules[name] = mod
+    return _modules[name]
+
+
+# ── Stages ──────────────────────────────────────────────────────────────
+# Each stage takes the run context and returns a JSON-serializable dict of
+# outputs that is saved in the checkpoint. Large in-memory values go in
+# ctx["memory"][stage] and are not persisted.
+
+def _run_node(args: list[str]) -> None:
+    print(f">>> node {' '.join(args)}", flush=True)
+    subprocess.run(["node", *args], cwd=SCRAPING_DIR, check=True)
+
+
+def stage_scrape_top_feed(ctx) -> dict:
+    _run_node(["top-feed.mjs", "--feed", "home_top_week"])
+    return {}
+
+
+def stage_scrape_crawl(ctx) -> dict:
+    _run_node(["crawl.mjs", "--recent-hops", "2"])
+    return {}
+
+
+def stage_sanitize(ctx) -> dict:
+    sanitize = load_module("sanitize", "sanitize.py")
+    return sanitize.main(ctx["cache"])
+
+
+def stage_generate(ctx) -> dict:
+    generate = load_module("generate_email", "generate-email.py")
+    raw_path = generate.main(ctx["cache"])
+    ctx["memory"]["generate"] = {"raw_output": raw_path.read_text(encoding="utf-8")}
+    return {"raw": str(raw_path)}
+
+
+def stage_assemble(ctx) -> dict:
+    assemble = load_module("assemble", "assemble.py")
+    raw_path = Path(ctx["outputs"]["generate"]["raw"])
+    raw_output = ctx["memory"].get("generate", {}).get("raw_output")
+    email_path = assemble.assemble_file(raw_path, raw_output=raw_output, cache=ctx["cache"])
+    ctx["memory"]["assemble"] = {"html": email_path.read_text(encoding="utf-8")}
+    return {"email": str(email_path)}
+
+
+def stage_send(ctx) -> dict:
+    target = ctx["send"]
+    email_path = Path(ctx["outputs"]["assemble"]["email"])
+    if target == "none":
+        print("[Send: disabled for this run]")
+        return {"target": "none"}
+
+    send = load_module("send", "send.py")
+    html = ctx["memory"].get("assemble", {}).get("html") or send.load_html(email_path)
+    html = send.prepare_for_email(html)
+    text = send.text_for_newsletter(email_path, html)
+
+    if target == "test":
+        test_email = os.environ.get("TEST_EMAIL_RECIPIENT", "")
+        if not test_email:
+            raise RuntimeError("AUTO_SEND=test but TEST_EMAIL_RECIPIENT is not set")
+        recipients, journal_path = [test_email], None
+    else:
+        recipients = send.load_mailing_list()
+        journal_path = send.journal_path_for(email_path)
+
+    print(f"[Send: {len(recipients)} recipient(s), target={target}]")
+    report = send.send_newsletter(
+        html, recipients, send.EMAIL_SUBJECT,
+        text=text, journal_path=journal_path, progress=True,
+    )
+    for line in send.format_throughput(report):
+        print(f"   {line}")
+    if report["failed"]:
+        raise RuntimeError(f"{report['failed']} recipient(s) failed; re-run to retry")
+    return {"target": target, "sent": report["sent"], "skipped": report["skipped"]}
+
+
+# name -> (dependencies, function)
+STAGES = {
+    "scrape-top-feed": ([], stage_scrape_top_feed),
+    "scrape-crawl":    ([], stage_scrape_crawl),
+    "sanitize":        (["scrape-top-feed", "scrape-crawl"], stage_sanitize),
+    "generate":        (["sanitize"], stage_generate),
+    "assemble":        (["generate"], stage_assemble),
+    "send":            (["assemble"], stage_send),
+}
+
+# Run as node subprocesses; nothing for cProfile/tracemalloc to see
+NODE_STAGES = {"scrape-top-feed", "scrape-crawl"}
+
+# stage-cache step -> the pipeline stage that runs it
+CACHE_STEPS = {
+    "sanitize": "sanitize",
+    "glossary": "generate",
+    "analysis": "generate",
+    "annotation": "generate",
+    "writing": "generate",
+    "assembly": "assemble",
+}
+
+
+# ── Checkpoint ──────────────────────────────────────────────────────────
+
+def load_checkpoint(run_id: str) -> dict:
+    if CHECKPOINT_PATH.is_file():
+        try:
+            cp = json.loads(CHECKPOINT_PATH.read_text(encoding="utf-8"))
+            if cp.get("run_id") == run_id:
+                return cp
+        except json.JSONDecodeError:
+            print(f"WARNING: unreadable checkpoint {CHECKPOINT_PATH}, starting fresh")
+    return {"run_id": run_id, "stages": {}}
+
+
+def save_checkpoint(cp: dict) -> None:
+    CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CHECKPOINT_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cp, indent=2), encoding="utf-8")
+    os.replace(tmp, CHECKPOINT_PATH)
+
+
+# ── Runner ──────────────────────────────────────────────────────────────
+
+def _with_dependents(names: set[str]) -> set[str]:
+    """names plus every stage downstream of them."""
+    result = set(names)
+    changed = True
+    while changed:
+        changed = False
+        for name, (deps, _) in STAGES.items():
+            if name not in result and result.intersection(deps):
+                result.add(name)
+                changed = True
+    return result
+
+
+def run(scrape: str, send: str, fresh: bool = False, cache: StageCache | None = None) -> bool:
+    """Run every pending stage. Returns True if the whole graph completed."""
+    cache = cache or StageCache()
+    run_id = date.today().isoformat()
+    cp = {"run_id": run_id, "stages": {}} if fresh else load_checkpoint(run_id)
+
+    # A forced cache step must actually run, so its pipeline stage and
+    # everything after it can't be skipped on the checkpoint's word
+    for name in _with_dependents({CACHE_STEPS[step] for step in cache.force}):
+        cp["stages"].pop(name, None)
+
+    disabled = set()
+    if scrape not in ("top-feed", "both"):
+        disabled.add("scrape-top-feed")
+    if scrape not in ("crawl", "both"):
+        disabled.add("scrape-crawl")
+
+    done = {name for name, st in cp["stages"].items() if st.get("status") == "done"}
+    ctx = {
+        "send": send,
+        "cache": cache,
+        "outputs": {name: cp["stages"][name].get("outputs", {}) for name in done},
+        "memory": {},
+    }
+    if done:
+        print(f"[Resuming run {run_id}: already done: {', '.join(sorted(done))}]")
+
+    satisfied = done | disabled
+    pending = [name for name in STAGES if name not in satisfied]
+    failed = None
+
+    with ThreadPoolExecutor(max_workers=len(STAGES)) as pool:
+        running = {}
+        while pending or running:
+            if failed is None:
+                for name in list(pending):
+                    deps, fn = STAGES[name]
+                    if all(d in satisfied for d in deps):
+                        pending.remove(name)
+                        print(f"\n{'=' * 60}\nPIPELINE: {name}\n{'=' * 60}", flush=True)
+                        cp["stages"][name] = {"status": "running",
+                                              "started_at": datetime.now().isoformat(timespec="seconds")}
+                        save_checkpoint(cp)
+                        running[pool.submit(_timed, name, fn, ctx)] = name
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                st = cp["stages"][name]
+                st["finished_at"] = datetime.now().isoformat(timespec="seconds")
+                try:
+                    outputs, elapsed = fut.result()
+                except Exception as exc:
+                    st.update(status="failed", error=f"{exc.__class__.__name__}: {exc}")
+                    traceback.print_exc()
+                    print(f"[{name} FAILED: {exc}]")
+                    failed = failed or name
+                else:
+                    st.update(status="done", outputs=outputs or {}, seconds=round(elapsed, 1))
+                    ctx["outputs"][name] = outputs or {}
+                    satisfied.add(name)
+                    print(f"[{name} done in {elapsed:.1f}s]")
+                save_checkpoint(cp)
+
+    print(f"\n{cache.report()}")
+    if failed:
+        print(f"\nPipeline stopped at '{failed}'. Re-run to resume from there; "
+              f"checkpoint: {CHECKPOINT_PATH}")
+        return False
+    print(f"\n[Pipeline complete for {run_id}]")
+    return True
+
+
+def _timed(name, fn, ctx):
+    start = time.monotonic()
+    with nullcontext() if name in NODE_STAGES else profiled(name):
+        outputs = fn(ctx)
+    return outputs, time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the FizzBuzz pipeline unattended")
+    parser.add_argument(
+        "--scrape",
+        choices=SCRAPE_CHOICES,
+        default=os.environ.get("AUTO_SCRAPE", "top-feed"),
+        help="Which scrapers to run (default: $AUTO_SCRAPE or top-feed)",
+    )
+    parser.add_argument(
+        "--send",
+        choices=SEND_CHOICES,
+        default=os.environ.get("AUTO_SEND", "test"),
+        help="Who to send the edition to (default: $AUTO_SEND or test)",
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Ignore today's checkpoint and run every stage",
+    )
+    add_force_argument(parser)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    cache = StageCache(force=args.force)
+    if args.profile:
+        # Each Python stage is profiled on its own thread (see profiling.py)
+        os.environ["FIZZ_PROFILE"] = args.profile
+
+    # No prompts anywhere downstream, even when started from a terminal
+    os.environ["FIZZ_NONINTERACTIVE"] = "1"
+
+    ok = run(args.scrape, args.send, fresh=args.fresh, cache=cache)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
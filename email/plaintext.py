@@ -0,0 +1,120 @@
+"""
+plaintext.py
+Render compiled newsletter HTML to a readable plain-text alternative part.
+
+Built on the stdlib html.parser so it runs anywhere send.py does. MJML output
+is deeply nested tables and divs; the renderer keeps the reading order, turns
+block elements into paragraph breaks, keeps link targets and image alt text,
+and drops <head>, <style> and <script> entirely.
+
+The rendered text is cached next to the HTML (fizz_email_X.html ->
+fizz_email_X.txt) so it is produced once per edition, not once per send.
+"""
+
+import re
+import textwrap
+from html.parser import HTMLParser
+from pathlib import Path
+
+WRAP_WIDTH = 78
+
+_SKIP_TAGS = {"head", "style", "script", "title"}
+_BLOCK_TAGS = {
+    "p", "div", "table", "tr", "section", "article", "header", "footer",
+    "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "blockquote",
+}
+
+
+class _TextRenderer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: list[str] = []   # finished paragraphs
+        self.current: list[str] = []  # text of the paragraph being built
+        self.skip_depth = 0
+        self.links: list[tuple[str, int]] = []  # (href, len(current) at <a>)
+
+    def _flush(self) -> None:
+        text = re.sub(r"\s+", " ", "".join(self.current)).strip()
+        if text:
+            self.blocks.append(text)
+        self.current = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self.skip_depth += 1
+            return
+        if self.skip_depth:
+            return
+        attrs = dict(attrs)
+        if tag in _BLOCK_TAGS:
+            self._flush()
+            if tag == "li":
+                self.current.append("- ")
+        elif tag == "br":
+            self._flush()
+        elif tag == "td":
+            self.current.append(" ")
+        elif tag == "a":
+            self.links.append((attrs.get("href") or "", len(self.current)))
+        elif tag == "img":
+            alt = (attrs.get("alt") or "").strip()
+            if alt and alt.lower() != "image":
+                self.current.append(f" [{alt}] ")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in _SKIP_TAGS:
+            self.skip_depth -= 1
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if self.skip_depth:
+            return
+        if tag == "a" and self.links:
+            href, start = self.links.pop()
+            label = "".join(self.current[start:]).strip()
+            if href.startswith(("http://", "https://", "mailto:")) and href not in label:
+                self.current.append(f" ({href})")
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.current.append(data.replace("\xa0", " "))
+
+    def render(self) -> str:
+        self._flush()
+        paragraphs = []
+        for block in self.blocks:
+            indent = "  " if block.startswith("- ") else ""
+            paragraphs.append(textwrap.fill(
+                block, width=WRAP_WIDTH, subsequent_indent=indent,
+                break_long_words=False, break_on_hyphens=False,
+            ))
+        return "\n\n".join(paragraphs) + "\n"
+
+
+def html_to_text(html: str) -> str:
+    """Plain-text rendering of an HTML document."""
+    renderer = _TextRenderer()
+    renderer.feed(html)
+    renderer.close()
+    return renderer.render()
+
+
+def text_for_newsletter(html_path: Path, html: str | None = None) -> str:
+    """Cached plain-text alternative for a newsletter file.
+
+    Reuses fizz_email_X.txt when it is newer than the HTML; otherwise renders
+    and writes it.
+    """
+    txt_path = html_path.with_suffix(".txt")
+    if txt_path.is_file() and txt_path.stat().st_mtime >= html_path.stat().st_mtime:
+        return txt_path.read_text(encoding="utf-8")
+    if html is None:
+        html = html_path.read_text(encoding="utf-8")
+    text = html_to_text(html)
+    txt_path.write_text(text, encoding="utf-8")
+    return text
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+posts_db.py
+Python-side access to the shared posts DB written by scraping/db.mjs.
+
+The scrapers can run concurrently, so db.mjs serializes its read-modify-write
+cycles with an advisory lock file (posts-db.json.lock, created with O_EXCL)
+and replaces the DB with an atomic rename. This module speaks the same
+protocol so a reader never races a writer.
+
+Storage is split into partitions keyed on post `date`:
+    data/posts-db.json                    hot partition, scrapers merge here
+    data/archive/posts-2026-W09.json.gz   cold partitions, one per ISO week
+
+`compact` moves posts older than the hot window into their weekly cold
+partition and deletes cold partitions past the retention limit. Undated
+posts stay hot. Readers ask
+for a time window and only open the partitions that overlap it.
+
+Usage:
+    from posts_db import load_posts
+    posts = load_posts(since=time.time() - 7 * 86400)
+
+    python3 posts_db.py compact                       # defaults below
+    python3 posts_db.py compact --hot-days 14 --retain-weeks 26 --dry-run
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from paths import DATA_DIR
+
+DB_PATH = DATA_DIR / "posts-db.json"
+ARCHIVE_DIR = DATA_DIR / "archive"
+
+# ── Config ──────────────────────────────────────────────────────────────────
+HOT_DAYS = 21               # Posts newer than this stay in posts-db.json
+RETAIN_WEEKS = 52           # Cold partitions older than this are deleted (None = keep forever)
+# ────────────────────────────────────────────────────────────────────────────
+
+LOCK_TIMEOUT = 120       # seconds to wait for the lock before giving up
+LOCK_STALE = 600         # a lock older than this is assumed abandoned
+LOCK_POLL = 0.1
+BREAK_STALE = 30         # a stale-lock breaker older than this crashed mid-break
+
+
+def _lock_path(db_path: Path) -> Path:
+    return db_path.with_name(db_path.name + ".lock")
+
+
+def _is_stale(lock_path: Path, raw: str) -> bool:
+    """True if the lock (its contents read as `raw`) has a dead owner or is older than LOCK_STALE."""
+    try:
+        info = json.loads(raw)
+        if time.time() * 1000 - info["createdAt"] > LOCK_STALE * 1000:
+            return True
+        os.kill(int(info["pid"]), 0)
+        return False
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False  # pid exists but belongs to another user
+    except (OSError, ValueError, KeyError, TypeError):
+        # Unreadable or half-written lock: only stale once it is old on disk
+        try:
+            return time.time() - lock_path.stat().st_mtime > LOCK_STALE
+        except OSError:
+            return False
+
+
+def _break_stale_lock(lock_path: Path, seen: str) -> bool:
+    """Delete the lock if it still holds `seen`, the contents judged stale.
+
+    Checking and deleting is not atomic, so waiters that break locks take
+    turns on a second O_EXCL file (posts-db.json.lock.break) and re-read the
+    lock under it. Two waiters that judged the same lock stale can then
+    never delete a fresh lock the first one created in the meantime.
+    Returns False if another waiter is breaking it.
+    """
+    break_path = lock_path.with_name(lock_path.name + ".break")
+    try:
+        os.close(os.open(break_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+    except FileExistsError:
+        try:
+            # Breaking takes microseconds; an old breaker was left by a crash
+            if time.time() - break_path.stat().st_mtime > BREAK_STALE:
+                break_path.unlink()
+        except FileNotFoundError:
+            pass
+        return False
+    try:
+        try:
+            current = lock_path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return True
+        if current == seen:
+            print(f"WARNING: removing stale DB lock {lock_path}")
+            lock_path.unlink()
+        return True
+    finally:
+        try:
+            break_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def db_lock(db_path: Path = DB_PATH, timeout: float = LOCK_TIMEOUT):
+    """Hold the advisory DB lock for the duration of the block."""
+    lock_path = _lock_path(db_path)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            try:
+                seen = lock_path.read_text(encoding="utf-8")
+            except FileNotFoundError:
+                continue    # released in the meantime
+            except OSError:
+                seen = None
+            if seen is not None and _is_stale(lock_path, seen) and _break_stale_lock(lock_path, seen):
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for DB lock {lock_path}")
+            time.sleep(LOCK_POLL)
+            continue
+        with os.fdopen(fd, "w") as f:
+            json.dump({"pid": os.getpid(), "createdAt": int(time.time() * 1000)}, f)
+        break
+    try:
+        yield
+    finally:
+        try:
+            lock_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def load_posts_db(db_path: Path = DB_PATH) -> dict:
+    """Load the posts DB under the lock.
+
+    Returns an empty DB if the file does not exist yet. A file that exists
+    but does not parse raises instead of being treated as empty.
+    """
+    with db_lock(db_path):
+        return _read_db(db_path)
+
+
+def _read_db(db_path: Path) -> dict:
+    if not db_path.exists():
+        return {"lastUpdated": None, "posts": []}
+    with open(db_path, encoding="utf-8") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Could not parse {db_path}: {e}") from e
+
+
+def write_posts_db(db: dict, db_path: Path = DB_PATH) -> None:
+    """Atomically replace the DB. Caller must hold db_lock()."""
+    tmp_path = db_path.with_name(f"{db_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(db, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, db_path)
+
+
+# ── Cold partitions ─────────────────────────────────────────────────────────
+
+_PARTITION_RE = re.compile(r"^posts-(\d{4})-W(\d{2})\.json\.gz$")
+
+
+def partition_name(ts: float) -> str:
+    """Name of the weekly cold partition that holds a post dated `ts`."""
+    year, week, _ = datetime.fromtimestamp(ts, timezone.utc).isocalendar()
+    return f"posts-{year}-W{week:02d}.json.gz"
+
+
+def partition_range(name: str) -> tuple[float, float] | None:
+    """[start, end) epoch seconds covered by a partition file name."""
+    m = _PARTITION_RE.match(name)
+    if not m:
+        return None
+    start = datetime.fromisocalendar(int(m.group(1)), int(m.group(2)), 1).replace(tzinfo=timezone.utc)
+    return start.timestamp(), (start + timedelta(days=7)).timestamp()
+
+
+def _read_partition(path: Path) -> list[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)["posts"]
+
+
+def _write_partition(path: Path, posts: list[dict]) -> None:
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump({"totalPosts": len(posts), "posts": posts}, f)
+    os.replace(tmp_path, path)
+
+
+def load_posts(since: float | None = None, until: float | None = None,
+               db_path: Path = DB_PATH, archive_dir: Path = ARCHIVE_DIR) -> list[dict]:
+    """Return posts dated within [since, until], reading only overlapping partitions.
+
+    The hot partition is always read. A post present in both the hot and a
+    cold partition (re-scraped after compaction) comes from the hot one.
+    Everything is read under the lock so a concurrent compaction can't move
+    posts between partitions mid-read.
+    """
+    posts = {}
+    with db_lock(db_path):
+        if archive_dir.is_dir():
+            for path in sorted(archive_dir.glob("posts-*.json.gz")):
+                rng = partition_range(path.name)
+                if rng is None:
+                    continue
+                start, end = rng
+                if since is not None and end <= since:
+                    continue
+                if until is not None and start > until:
+                    continue
+                for p in _read_partition(path):
+                    posts[p.get("postID")] = p
+
+        for p in _read_db(db_path).get("posts", []):
+            posts[p.get("postID")] = p
+
+    return [
+        p for p in posts.values()
+        if (since is None or (p.get("date") or 0) >= since)
+        and (until is None or (p.get("date") or 0) <= until)
+    ]
+
+
+def compact(hot_days: int = HOT_DAYS, retain_weeks: int | None = RETAIN_WEEKS,
+            dry_run: bool = False, db_path: Path = DB_PATH,
+            archive_dir: Path = ARCHIVE_DIR) -> dict:
+    """Move cold posts out of the hot DB and apply the retention limit.
+
+    Posts without a `date` can't be placed in a week, so they stay in the
+    hot DB (and out of reach of retention).
+    """
+    now = time.time()
+    hot_cutoff = now - 86400 * hot_days
+    retain_cutoff = now - 7 * 86400 * retain_weeks if retain_weeks is not None else None
+
+    stats = {"moved": 0, "kept_hot": 0, "partitions_written": 0,
+             "partitions_deleted": 0, "dropped": 0}
+
+    with db_lock(db_path):
+        db = _read_db(db_path)
+
+        hot, cold = [], {}
+        for p in db.get("posts", []):
+            if p.get("date") is None or p["date"] >= hot_cutoff:
+                hot.append(p)
+            else:
+                cold.setdefault(partition_name(p["date"]), []).append(p)
+        stats["kept_hot"] = len(hot)
+
+        if not dry_run:
+            archive_dir.mkdir(parents=True, exist_ok=True)
+
+        for name, moving in sorted(cold.items()):
+            start, end = partition_range(name)
+            if retain_cutoff is not None and end <= retain_cutoff:
+                stats["dropped"] += len(moving)
+                continue
+            stats["moved"] += len(moving)
+            stats["partitions_written"] += 1
+            if dry_run:
+                continue
+            path = archive_dir / name
+            merged = {p.get("postID"): p for p in (_read_partition(path) if path.exists() else [])}
+            for p in moving:
+                merged[p.get("postID")] = p
+            _write_partition(path, sorted(
+                merged.values(), key=lambda p: p.get("likesMinusDislikes", 0), reverse=True
+            ))
+
+        if retain_cutoff is not None and archive_dir.is_dir():
+            for path in archive_dir.glob("posts-*.json.gz"):
+                rng = partition_range(path.name)
+                if rng and rng[1] <= retain_cutoff:
+                    stats["partitions_deleted"] += 1
+                    if not dry_run:
+                        path.unlink()
+
+        if not dry_run and (stats["moved"] or stats["dropped"]):
+            db["posts"] = hot
+            db["totalPosts"] = len(hot)
+            db["lastUpdated"] = datetime.now(timezone.utc).isoformat()
+            write_posts_db(db, db_path)
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the shared posts DB")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_compact = sub.add_parser(
+        "compact", help="Move old posts into weekly archive partitions and apply retention"
+    )
+    p_compact.add_argument(
+        "--hot-days", type=int, default=HOT_DAYS,
+        help=f"Keep posts newer than this many days in posts-db.json (default: {HOT_DAYS})",
+    )
+    p_compact.add_argument(
+        "--retain-weeks", type=int, default=RETAIN_WEEKS,
+        help=f"Delete archive partitions older than this many weeks, 0 = keep all (default: {RETAIN_WEEKS})",
+    )
+    p_compact.add_argument(
+        "--dry-run", action="store_true", help="Report what would change without writing"
+    )
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        stats = compact(args.hot_days, args.retain_weeks or None, args.dry_run)
+        prefix = "[dry run] " if args.dry_run else ""
+        print(f"{prefix}Kept {stats['kept_hot']} posts hot, moved {stats['moved']} "
+              f"into {stats['partitions_written']} archive partition(s) in {ARCHIVE_DIR}")
+        print(f"{prefix}Retention: dropped {stats['dropped']} posts, "
+              f"deleted {stats['partitions_deleted']} partition(s)")
+
+
+if __name__ == "__main__":
+    main()
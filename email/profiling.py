@@ -0,0 +1,184 @@
+"""
+profiling.py
+Opt-in cProfile and tracemalloc hooks for the pipeline's Python entry points.
+
+sanitize.py, generate-email.py, assemble.py, send.py, pipeline.py and
+fanout.py accept `--profile [MODE]`; FIZZ_PROFILE=MODE in the environment
+does the same and reaches every step of `daily-email.sh --profile`:
+
+    cpu     cProfile the run -> logs/profile_<name>_<timestamp>.prof (default)
+    mem     tracemalloc snapshots -> logs/profile_<name>_<timestamp>_alloc.txt
+    all     both
+
+The allocation report lists the top FIZZ_PROFILE_TOP (default 25) source
+lines by memory still held at the end of the run, the top lines by growth
+since the start, and the traced peak. tracemalloc slows Python down a lot,
+so leave it off when timing. The timestamp is FIZZ_RUN_TIMESTAMP when set
+(daily-email.sh sets it to the run's log timestamp) so every step of one
+run sorts together.
+
+pipeline.py profiles each Python stage separately (profile_sanitize_...,
+profile_generate_...), since stages run on worker threads and cProfile
+only sees the thread it was started on.
+
+Inspect a .prof with:
+    python3 -m pstats logs/profile_generate_20260301_070000.prof
+    snakeviz logs/profile_generate_20260301_070000.prof     # pip install snakeviz
+
+Usage:
+    from profiling import add_profile_argument, profiled
+    with profiled("sanitize", args.profile):
+        main()
+"""
+
+import argparse
+import cProfile
+import io
+import os
+import pstats
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+from paths import LOGS_DIR, TENANT
+
+MODES = ("cpu", "mem", "all")
+TOP_N = int(os.getenv("FIZZ_PROFILE_TOP", "25"))    # lines per allocation table / stats summary
+
+
+def parse_mode(value: str | None) -> set[str]:
+    """{"cpu"}, {"mem"}, both or neither from a --profile / FIZZ_PROFILE value."""
+    value = (value or "").strip().lower()
+    if value in ("", "0", "off", "none", "false", "no"):
+        return set()
+    if value in ("1", "on", "true", "yes"):
+        return {"cpu"}
+    kinds = set()
+    for part in value.split(","):
+        part = part.strip()
+        if part == "all":
+            kinds |= {"cpu", "mem"}
+        elif part in MODES:
+            kinds.add(part)
+        elif part:
+            raise ValueError(f"Unknown profile mode '{part}' (choose from {', '.join(MODES)})")
+    return kinds
+
+
+def _mode_value(value: str) -> str:
+    try:
+        parse_mode(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+    return value
+
+
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="cpu",
+        default=None,
+        type=_mode_value,
+        metavar="MODE",
+        help=f"Profile this run into logs/ ({', '.join(MODES)}; default cpu; "
+             f"also $FIZZ_PROFILE)",
+    )
+
+
+def _base_path(name: str):
+    stamp = os.environ.get("FIZZ_RUN_TIMESTAMP") or datetime.now().strftime("%Y%m%d_%H%M%S")
+    label = f"{name}_{TENANT}" if TENANT else name
+    return LOGS_DIR / f"profile_{label}_{stamp}"
+
+
+def _cpu_summary(profiler: cProfile.Profile) -> str:
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(min(TOP_N, 15))
+    # Drop pstats' header; keep the column titles and rows
+    lines = out.getvalue().splitlines()
+    start = next((i for i, line in enumerate(lines) if "ncalls" in line), 0)
+    return "\n".join(line for line in lines[start:] if line.strip())
+
+
+def _alloc_report(name: str, start, end, peak: int) -> str:
+    ignore = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+    start = start.filter_traces(ignore)
+    end = end.filter_traces(ignore)
+    held = end.statistics("lineno")
+    growth = end.compare_to(start, "lineno")
+
+    lines = [
+        f"Allocation report: {name} ({datetime.now().isoformat(timespec='seconds')})",
+        f"Peak traced memory: {peak / 1e6:.1f} MB",
+        f"Held at end:        {sum(s.size for s in held) / 1e6:.1f} MB in {sum(s.count for s in held):,} blocks",
+        "",
+        f"Top {TOP_N} lines by memory held at end:",
+    ]
+    lines += [f"  {stat.size / 1e3:>10,.1f} KB {stat.count:>9,} blocks  {stat.traceback}"
+              for stat in held[:TOP_N]]
+    lines += ["", f"Top {TOP_N} lines by growth since start:"]
+    lines += [f"  {stat.size_diff / 1e3:>+10,.1f} KB {stat.count_diff:>+9,} blocks  {stat.traceback}"
+              for stat in growth[:TOP_N]]
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def profiled(name: str, mode: str | None = None):
+    """Profile the block per `mode` (falls back to FIZZ_PROFILE); a no-op when off.
+
+    Results are written even if the block raises (including SystemExit).
+    """
+    kinds = parse_mode(mode if mode is not None else os.environ.get("FIZZ_PROFILE"))
+    if not kinds:
+        yield
+        return
+
+    base = _base_path(name)
+    profiler = cProfile.Profile() if "cpu" in kinds else None
+    # Someone up the stack may already be tracing; leave their session alone
+    own_trace = "mem" in kinds and not tracemalloc.is_tracing()
+    start_snapshot = None
+    if own_trace:
+        tracemalloc.start()
+        start_snapshot = tracemalloc.take_snapshot()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+        LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        if own_trace:
+            end_snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            alloc_path = base.with_name(base.name + "_alloc.txt")
+            alloc_path.write_text(_alloc_report(name, start_snapshot, end_snapshot, peak), encoding="utf-8")
+            print(f"[Profile: {name} allocations -> {alloc_path} (peak {peak / 1e6:.1f} MB)]", flush=True)
+        if profiler:
+            prof_path = base.with_suffix(".prof")
+            profiler.dump_stats(prof_path)
+            print(f"[Profile: {name} -> {prof_path}]")
+            print(_cpu_summary(profiler), flush=True)
+
+
+def run_main(name: str, main) -> None:
+    """Call main() under profiled(), for scripts whose main() parses its own args.
+
+    The mode comes from --profile on the command line (main's parser must
+    also accept it, via add_profile_argument) or from FIZZ_PROFILE.
+    """
+    pre = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    add_profile_argument(pre)
+    args, _ = pre.parse_known_args(sys.argv[1:])
+    with profiled(name, args.profile):
+        main()
@@ -0,0 +1,217 @@
+"""
+sample_server.py
+Serving-side pieces of the sample-send web GUI (send.py --sample).
+
+- SampleEdition: a newsletter loaded once and prepared for serving: the
+  email-ready HTML and text for sends, plus pre-compressed gzip (and brotli,
+  when the optional `brotli` package is installed) preview bytes and a
+  content-hash ETag.
+- DeliveryQueue: a background worker that performs the SMTP sends, so the
+  /send request returns 202 immediately. Repeat requests for the same
+  address inside DEDUPE_WINDOW are dropped.
+- IPRateLimiter: sliding-window cap on /send requests per client IP.
+- EditionWatcher: polls email/output/ for a newer edition, prepares it in
+  the background and swaps it in atomically, so the server can run as a
+  long-lived daemon across editions.
+"""
+
+import gzip
+import hashlib
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable
+
+# ── Config ──────────────────────────────────────────────────────────────────
+DEDUPE_WINDOW = 3600        # seconds before the same address can get another sample
+IP_LIMIT = 5                # max /send requests per IP ...
+IP_WINDOW = 3600            # ... within this many seconds
+QUEUE_MAX = 1000            # pending sends before /send starts refusing
+RELOAD_INTERVAL = 30        # seconds between checks for a newer edition
+RELOAD_SETTLE = 2           # ignore files modified less than this many seconds ago
+# ────────────────────────────────────────────────────────────────────────────
+
+
+class SampleEdition:
+    """One newsletter file, prepared once for previews and sends."""
+
+    def __init__(self, path: Path, raw_html: str, prepared_html: str, text: str):
+        self.path = path
+        self.prepared_html = prepared_html
+        self.text = text
+        self.body = raw_html.encode("utf-8")
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self.encoded = {"gzip": gzip.compress(self.body, compresslevel=9)}
+        try:
+            import brotli
+            self.encoded["br"] = brotli.compress(self.body, quality=11)
+        except ImportError:
+            pass
+
+    def negotiate(self, accept_encoding: str) -> tuple[bytes, str | None]:
+        """Best pre-compressed body for an Accept-Encoding header."""
+        weights = _accept_weights(accept_encoding)
+        for encoding in ("br", "gzip"):
+            weight = weights.get(encoding, weights.get("*", 0.0))
+            if weight > 0 and encoding in self.encoded:
+                return self.encoded[encoding], encoding
+        return self.body, None
+
+    def not_modified(self, if_none_match: str) -> bool:
+        """True if an If-None-Match header names this edition's ETag (or is "*").
+
+        Entries are compared whole, ignoring a weak W/ prefix, as the
+        weak comparison for GET requires.
+        """
+        for tag in (if_none_match or "").split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == self.etag:
+                return True
+        return False
+
+
+def _accept_weights(header: str) -> dict[str, float]:
+    """Accept-Encoding as {coding: q}; a malformed q counts as 0 (refused)."""
+    weights = {}
+    for part in (header or "").split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        weights[coding.lower()] = q
+    return weights
+
+
+class IPRateLimiter:
+    """Allow at most `limit` hits per `window` seconds per key."""
+
+    def __init__(self, limit: int = IP_LIMIT, window: float = IP_WINDOW):
+        self.limit = limit
+        self.window = window
+        self._hits: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.setdefault(key, deque())
+            while hits and now - hits[0] > self.window:
+                hits.popleft()
+            if len(hits) >= self.limit:
+                return False
+            hits.append(now)
+            # Drop idle keys so the table doesn't grow without bound
+            if len(self._hits) > 10_000:
+                self._hits = {k: v for k, v in self._hits.items() if v and now - v[-1] <= self.window}
+            return True
+
+
+class DeliveryQueue:
+    """Background worker thread that sends queued sample emails."""
+
+    def __init__(self, send: Callable[[str], None], dedupe_window: float = DEDUPE_WINDOW,
+                 maxsize: int = QUEUE_MAX):
+        self._send = send
+        self.dedupe_window = dedupe_window
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._recent: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="sample-delivery", daemon=True)
+        self._thread.start()
+
+    def submit(self, email: str) -> str:
+        """Queue a send. Returns "queued", "duplicate" or "full"."""
+        key = email.strip().lower()
+        now = time.monotonic()
+        with self._lock:
+            last = self._recent.get(key)
+            if last is not None and now - last < self.dedupe_window:
+                return "duplicate"
+            try:
+                self._queue.put_nowait(email)
+            except queue.Full:
+                return "full"
+            self._recent[key] = now
+            if len(self._recent) > 10_000:
+                self._recent = {k: t for k, t in self._recent.items() if now - t < self.dedupe_window}
+        return "queued"
+
+    def _run(self) -> None:
+        while True:
+            email = self._queue.get()
+            try:
+                self._send(email)
+                print(f"📨 Sample sent to {email}")
+            except Exception as exc:
+                print(f"❌ Sample send to {email} failed: {exc}")
+                # Let the visitor retry instead of waiting out the dedupe window
+                with self._lock:
+                    self._recent.pop(email.strip().lower(), None)
+            finally:
+                self._queue.task_done()
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+
+class EditionWatcher:
+    """Keep `current` pointed at the newest prepared edition.
+
+    find() returns the path that should be served; load(path) prepares a
+    SampleEdition. Both run on the watcher thread, never in a request, and
+    the new edition replaces the old one with a single reference swap, so
+    readers see either the old edition or the new one, never a mix.
+    """
+
+    def __init__(self, find: Callable[[], Path], load: Callable[[Path], SampleEdition],
+                 interval: float = RELOAD_INTERVAL):
+        self._find = find
+        self._load = load
+        self.interval = interval
+        path = find()
+        self.current = load(path)
+        self._loaded_key = self._key(path)
+        self._thread = threading.Thread(target=self._run, name="edition-watcher", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _key(path: Path) -> tuple[str, float]:
+        return str(path), path.stat().st_mtime
+
+    def check(self) -> bool:
+        """Load and swap in a newer edition if there is one. Returns True on swap."""
+        path = self._find()
+        key = self._key(path)
+        if key == self._loaded_key:
+            return False
+        if time.time() - key[1] < RELOAD_SETTLE:
+            return False  # probably still being written; pick it up next poll
+        edition = self._load(path)
+        if edition.etag == self.current.etag:
+            self._loaded_key = key
+            return False
+        self.current = edition
+        self._loaded_key = key
+        print(f"🔄 Now serving {path.name} (ETag {edition.etag})")
+        return True
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as exc:
+                print(f"⚠️  Edition reload failed, still serving {self.current.path.name}: {exc}")
@@ -1,7 +1,16 @@
-import json, csv, re, time
+import argparse, json, csv, re, time
+from bisect import bisect_right
 from datetime import datetime
 from pathlib import Path
 
+import crawl_graph
+import dedup
+import textnorm
+from paths import DATA_DIR
+from posts_db import load_posts
+from profiling import add_profile_argument, profiled
+from stage_cache import StageCache, add_force_argument, fingerprint
+
 # Relative time words that become unreliable once a post ages
 _RELATIVE_TIME_RE = re.compile(
     r'\b(tonight|tonite|tomorrow|tmrw|tmr|this morning|this afternoon|this evening'
@@ -9,6 +18,12 @@ _RELATIVE_TIME_RE = re.compile(
     r'|this wednesday|this thursday|later today|tn|rn|right now)\b',
     re.IGNORECASE,
 )
+# The same words as a case-sensitive trie for lowercased text: one scan of
+# the whole window finds the few posts the full regex needs to touch
+_RELATIVE_TIME_KEYWORDS_RE = re.compile(
+    r'\b(?:to(?:night|nite|morrow)|tmrw?|this (?:morning|afternoon|evening|weekend'
+    r'|(?:fri|satur|sun|mon|tues|wednes|thurs)day)|later today|[tr]n|right now)\b'
+)
 
 # ── Config ──────────────────────────────────────────────────────────────────
 DAYS = 7                    # Only include posts from the last N days
@@ -17,176 +32,358 @@ LEAST_LIKED = 5          # Keep only the N least-liked posts (None = no limit)
 MOST_LIKED_REFIZZES = 30    # Keep only the N most-liked reFizzes overall (None = no limit)
 LEAST_LIKED_REFIZZES = 5    # Also include the N least-liked reFizzes overall (None = skip)
 INCLUDE_VERIFIED = True     # Always include posts from verified orgs
+CLUSTER_METHOD = "lpa"      # Group posts over the crawl's similar-posts graph: "lpa", "components" or None
+CLUSTER_MIN_SIZE = 2        # Fewest CSV rows a group needs to get a cluster number
+DEDUP_THRESHOLD = 0.7       # Fold near-duplicate posts at this estimated similarity (None = off; needs numpy)
 # ────────────────────────────────────────────────────────────────────────────
 
-ROOT_DIR = Path(__file__).resolve().parents[1]
-INPUT_PATH = ROOT_DIR / "data" / "posts-db.json"
-LEGACY_INPUT_PATH = ROOT_DIR / "data" / "crawl-results.json"
-OUTPUT_PATH = ROOT_DIR / "data" / "crawl-results-new.csv"
-
-input_path = INPUT_PATH if INPUT_PATH.exists() else LEGACY_INPUT_PATH
-with open(input_path) as f:
-    data = json.load(f)
-print(f"Reading from {input_path} ({len(data.get('posts', []))} posts)")
-
-cutoff = time.time() - 86400 * DAYS
-
-# First pass: collect all posts and build parent-child relationships
-# A reFizz post is a child (response) to the original post it quotes.
-# We group children under their original parent to avoid duplicate content.
-all_posts = {}  # postID -> post dict
-children = {}   # parent postID -> list of {likes, text}
-
-for p in data["posts"]:
-    if p["date"] < cutoff:
-        continue
-    all_posts[p["postID"]] = p
-
-# Identify reFizz relationships where the original is also in the dataset
-child_ids = set()  # posts that will be folded into their parent's row
-for p in all_posts.values():
-    rf = p.get("reFizz")
-    if rf and p.get("reFizzContentType") == "post":
-        parent_id = rf.get("postID", "")
-        if parent_id in all_posts:
-            child_ids.add(p["postID"])
-            children.setdefault(parent_id, []).append({
-                "likes": p.get("likesMinusDislikes", 0),
-                "text": p.get("text", "").replace("\n", " "),
-            })
-
-# Filter reFizzes globally by likes, then distribute back to parents
-all_refizzes = []  # (parent_id, {likes, text})
-for parent_id, kids in children.items():
-    for kid in kids:
-        all_refizzes.append((parent_id, kid))
-
-all_refizzes.sort(key=lambda x: x[1]["likes"], reverse=True)
-
-selected_refizzes = set()
-if MOST_LIKED_REFIZZES is not None:
-    for r in all_refizzes[:MOST_LIKED_REFIZZES]:
-        selected_refizzes.add(id(r))
-if LEAST_LIKED_REFIZZES is not None:
-    for r in all_refizzes[-LEAST_LIKED_REFIZZES:]:
-        selected_refizzes.add(id(r))
-if MOST_LIKED_REFIZZES is None and LEAST_LIKED_REFIZZES is None:
-    selected_refizzes = set(id(r) for r in all_refizzes)
-
-# Rebuild children with only selected reFizzes
-filtered_children = {}
-for r in all_refizzes:
-    if id(r) in selected_refizzes:
-        parent_id, kid = r
-        filtered_children.setdefault(parent_id, []).append(kid)
-
-# Sort each parent's kept children by likes descending
-for kids in filtered_children.values():
-    kids.sort(key=lambda c: c["likes"], reverse=True)
-
-total_refizzes_kept = sum(len(v) for v in filtered_children.values())
-
-# Second pass: build rows, skipping children (they're nested under parents)
-rows = []
-for p in all_posts.values():
-    if p["postID"] in child_ids:
-        continue
-
-    identity = p.get("identity", {})
-    name = identity.get("name", "")
-    community = identity.get("communityID", "")
-    verified = identity.get("verified", False)
-
-    media_urls = []
-    for m in p.get("media", []):
-        url = m.get("signedUrl", "")
-        if url:
-            media_urls.append(url)
-        thumb = m.get("thumbnail", {}).get("signedUrl", "")
-        if thumb and thumb != url:
-            media_urls.append(thumb)
-
-    # Build refizzes string: responses to this post from children
-    kids = filtered_children.get(p["postID"], [])
-    refizzes_str = "|".join(f"{c['likes']}|{c['text']}" for c in kids) if kids else ""
-
-    # If this post is a reFizz of something NOT in our dataset, show the original
-    if not kids:
+INPUT_PATH = DATA_DIR / "posts-db.json"
+LEGACY_INPUT_PATH = DATA_DIR / "crawl-results.json"
+OUTPUT_PATH = DATA_DIR / "crawl-results-new.csv"
+POST_TEXT_MAP_PATH = DATA_DIR / "post-text-map.json"
+
+FIELDNAMES = ["identity", "likes", "comments", "text", "media", "refizzes", "cluster", "similar"]
+
+
+def load_window(cutoff: float) -> tuple[Path, list[dict]]:
+    """Return (input path, posts) for the posts DB, falling back to the legacy crawl file."""
+    if INPUT_PATH.exists():
+        return INPUT_PATH, load_posts(since=cutoff, db_path=INPUT_PATH)
+    with open(LEGACY_INPUT_PATH) as f:
+        return LEGACY_INPUT_PATH, json.load(f)["posts"]
+
+
+def cluster_window(posts: list[dict]) -> tuple[dict, int]:
+    """(postID -> raw cluster label, edges used) over the crawl graph for these posts."""
+    if not CLUSTER_METHOD:
+        return {}, 0
+    graph = crawl_graph.load_graph(keep=[p["postID"] for p in posts])
+    if graph is None:
+        return {}, 0
+    return graph.clusters(CLUSTER_METHOD), graph.edge_count
+
+
+def annotate_relative_times(texts: list[str], timestamps: list[float]) -> list[str]:
+    """Mark relative time words in every text with its post's timestamp.
+
+    One keyword scan over the lowercased window picks out the texts that
+    need the full regex. Timestamp strings are memoized by minute, which is
+    all they show.
+    """
+    lowered = [t.lower() for t in texts]
+    offsets, pos = [], 0
+    for t in lowered:
+        offsets.append(pos)
+        pos += len(t) + 1
+    hits = {bisect_right(offsets, m.start()) - 1
+            for m in _RELATIVE_TIME_KEYWORDS_RE.finditer("\0".join(lowered))}
+
+    out = list(texts)
+    posted_by_minute = {}
+    for i in sorted(hits):
+        post_ts = timestamps[i]
+        if post_ts:
+            minute = int(post_ts // 60)
+            posted_str = posted_by_minute.get(minute)
+            if posted_str is None:
+                posted_str = posted_by_minute[minute] = (
+                    datetime.fromtimestamp(minute * 60).strftime("%b %-d at %-I:%M%p"))
+            note = f"relative to {posted_str}"
+        else:
+            note = "unknown post time"
+        out[i] = _RELATIVE_TIME_RE.sub(lambda m: f"[RELATIVE TIME: {m.group(1)} ({note})]", texts[i])
+    return out
+
+
+def select_rows(rows: list[dict]) -> list[dict]:
+    """Apply the most-liked / least-liked / verified filters to rows sorted by likes."""
+    selected = set()
+    if MOST_LIKED is not None:
+        for r in rows[:MOST_LIKED]:
+            selected.add(id(r))
+    if LEAST_LIKED is not None:
+        for r in rows[-LEAST_LIKED:]:
+            selected.add(id(r))
+    if INCLUDE_VERIFIED:
+        for r in rows:
+            if r["_verified"]:
+                selected.add(id(r))
+    return [r for r in rows if id(r) in selected] if selected else rows
+
+
+def fold_duplicates(rows: list[dict]) -> tuple[list[dict], dict]:
+    """Fold near-duplicate rows into their most-liked copy.
+
+    The kept row gets the group's summed likes and the number of copies it
+    absorbed in the similar column. Rows with media or no text are left
+    alone: the same caption can sit on different pictures. tokens_saved
+    counts only folded rows that would otherwise have made the CSV.
+    """
+    stats = {"duplicates_folded": 0, "duplicate_groups": 0, "tokens_saved": 0}
+    if DEDUP_THRESHOLD is None:
+        return rows, stats
+    candidates = [r for r in rows if r["_raw"].strip() and not r["media"]]
+    try:
+        groups = dedup.near_duplicate_groups([r["_raw"] for r in candidates], threshold=DEDUP_THRESHOLD)
+    except ImportError:
+        print("  Near-duplicates: not folded (pip install numpy to enable)")
+        return rows, stats
+
+    would_select = {id(r) for r in select_rows(sorted(rows, key=lambda r: r["likes"], reverse=True))}
+    folded = set()
+    for group in groups:
+        members = sorted((candidates[i] for i in group), key=lambda r: (r["_verified"], r["likes"]), reverse=True)
+        keep = members[0]
+        keep["likes"] = sum(r["likes"] for r in members)
+        keep["similar"] = len(members) - 1
+        for r in members[1:]:
+            folded.add(id(r))
+            if id(r) in would_select:
+                stats["tokens_saved"] += dedup.estimate_tokens(",".join(str(r[f]) for f in FIELDNAMES if f in r))
+    stats["duplicates_folded"] = len(folded)
+    stats["duplicate_groups"] = len(groups)
+    return [r for r in rows if id(r) not in folded], stats
+
+
+def build_rows(posts: list[dict], cutoff: float, labels: dict | None = None) -> tuple[list[dict], dict, dict]:
+    """Filter, flatten and rank posts into CSV rows.
+
+    Near-duplicate posts are folded together (fold_duplicates); labels
+    (from cluster_window) numbers groups of related rows in the cluster
+    column. Returns (rows, post_text_map, stats) where post_text_map
+    maps postID to the row text, normalized for link matching at assembly
+    time (textnorm.map_entry).
+    """
+    # First pass: collect all posts and build parent-child relationships
+    # A reFizz post is a child (response) to the original post it quotes.
+    # We group children under their original parent to avoid duplicate content.
+    all_posts = {}  # postID -> post dict
+    children = {}   # parent postID -> list of {likes, text}
+
+    for p in posts:
+        if p["date"] < cutoff:
+            continue
+        all_posts[p["postID"]] = p
+
+    # Identify reFizz relationships where the original is also in the dataset
+    child_ids = set()  # posts that will be folded into their parent's row
+    for p in all_posts.values():
         rf = p.get("reFizz")
-        if rf and p.get("reFizzContentType") in ("post", "comment"):
-            rf_text = rf.get("text", "").replace("\n", " ")
-            rf_likes = rf.get("likesMinusDislikes", 0)
-            refizzes_str = f"(original) {rf_likes}|{rf_text}"
-
-    # Only include identity when someone de-anonymized (named + verified)
-    identity_str = ""
-    is_verified_org = False
-    if name and name != "Anonymous":
-        identity_str = f"{name} ({community})" + (" [verified]" if verified else "")
-        is_verified_org = verified
-
-    # Annotate relative time references so the model knows they're stale
-    text = p.get("text", "").replace("\n", " ")
-    post_ts = p.get("date", 0)
-    if post_ts:
-        posted_str = datetime.fromtimestamp(post_ts).strftime("%b %-d at %-I:%M%p")
-        text = _RELATIVE_TIME_RE.sub(rf'[RELATIVE TIME: \1 (relative to {posted_str})]', text)
-    else:
-        text = _RELATIVE_TIME_RE.sub(r'[RELATIVE TIME: \1 (unknown post time)]', text)
-
-    rows.append({
-        "identity": identity_str,
-        "likes": p.get("likesMinusDislikes", 0),
-        "comments": p.get("commentCount", 0),
-        "text": text,
-        "media": " ; ".join(media_urls),
-        "refizzes": refizzes_str,
-        "_verified": is_verified_org,
-        "_postID": p["postID"],
-    })
+        if rf and p.get("reFizzContentType") == "post":
+            parent_id = rf.get("postID", "")
+            if parent_id in all_posts:
+                child_ids.add(p["postID"])
+                children.setdefault(parent_id, []).append({
+                    "likes": p.get("likesMinusDislikes", 0),
+                    "text": p.get("text", "").replace("\n", " "),
+                })
+
+    # Filter reFizzes globally by likes, then distribute back to parents
+    all_refizzes = []  # (parent_id, {likes, text})
+    for parent_id, kids in children.items():
+        for kid in kids:
+            all_refizzes.append((parent_id, kid))
+
+    all_refizzes.sort(key=lambda x: x[1]["likes"], reverse=True)
 
-rows.sort(key=lambda r: r["likes"], reverse=True)
-
-# Apply most-liked / least-liked filters (can combine)
-selected = set()
-if MOST_LIKED is not None:
-    for r in rows[:MOST_LIKED]:
-        selected.add(id(r))
-if LEAST_LIKED is not None:
-    for r in rows[-LEAST_LIKED:]:
-        selected.add(id(r))
-if INCLUDE_VERIFIED:
+    selected_refizzes = set()
+    if MOST_LIKED_REFIZZES is not None:
+        for r in all_refizzes[:MOST_LIKED_REFIZZES]:
+            selected_refizzes.add(id(r))
+    if LEAST_LIKED_REFIZZES is not None:
+        for r in all_refizzes[-LEAST_LIKED_REFIZZES:]:
+            selected_refizzes.add(id(r))
+    if MOST_LIKED_REFIZZES is None and LEAST_LIKED_REFIZZES is None:
+        selected_refizzes = set(id(r) for r in all_refizzes)
+
+    # Rebuild children with only selected reFizzes
+    filtered_children = {}
+    for r in all_refizzes:
+        if id(r) in selected_refizzes:
+            parent_id, kid = r
+            filtered_children.setdefault(parent_id, []).append(kid)
+
+    # Sort each parent's kept children by likes descending
+    for kids in filtered_children.values():
+        kids.sort(key=lambda c: c["likes"], reverse=True)
+
+    total_refizzes_kept = sum(len(v) for v in filtered_children.values())
+
+    # Second pass: build rows, skipping children (they're nested under parents)
+    rows = []
+    for p in all_posts.values():
+        if p["postID"] in child_ids:
+            continue
+
+        identity = p.get("identity", {})
+        name = identity.get("name", "")
+        community = identity.get("communityID", "")
+        verified = identity.get("verified", False)
+
+        media_urls = []
+        for m in p.get("media", []):
+            url = m.get("signedUrl", "")
+            if url:
+                media_urls.append(url)
+            thumb = m.get("thumbnail", {}).get("signedUrl", "")
+            if thumb and thumb != url:
+                media_urls.append(thumb)
+
+        # Build refizzes string: responses to this post from children
+        kids = filtered_children.get(p["postID"], [])
+        refizzes_str = "|".join(f"{c['likes']}|{c['text']}" for c in kids) if kids else ""
+
+        # If this post is a reFizz of something NOT in our dataset, show the original
+        if not kids:
+            rf = p.get("reFizz")
+            if rf and p.get("reFizzContentType") in ("post", "comment"):
+                rf_text = rf.get("text", "").replace("\n", " ")
+                rf_likes = rf.get("likesMinusDislikes", 0)
+                refizzes_str = f"(original) {rf_likes}|{rf_text}"
+
+        # Only include identity when someone de-anonymized (named + verified)
+        identity_str = ""
+        is_verified_org = False
+        if name and name != "Anonymous":
+            identity_str = f"{name} ({community})" + (" [verified]" if verified else "")
+            is_verified_org = verified
+
+        rows.append({
+            "identity": identity_str,
+            "likes": p.get("likesMinusDislikes", 0),
+            "comments": p.get("commentCount", 0),
+            "text": p.get("text", "").replace("\n", " "),
+            "media": " ; ".join(media_urls),
+            "refizzes": refizzes_str,
+            "similar": "",
+            "_verified": is_verified_org,
+            "_postID": p["postID"],
+            "_raw": p.get("text", ""),
+            "_date": p.get("date", 0),
+        })
+
+    # Fold near-copies first so they don't take up most-liked slots
+    rows, dedup_stats = fold_duplicates(rows)
+
+    rows.sort(key=lambda r: r["likes"], reverse=True)
+
+    # Apply most-liked / least-liked filters (can combine)
+    rows = select_rows(rows)
+
+    # Annotate relative time references so the model knows they're stale;
+    # only kept rows reach the prompt, so only they are annotated
+    annotated = annotate_relative_times([r["text"] for r in rows], [r["_date"] for r in rows])
+    for r, text in zip(rows, annotated):
+        r["text"] = text
+
+    # Number the similar-post groups among the kept rows, most-liked group first
+    likes_by_id = {r["_postID"]: max(r["likes"], 0) for r in rows}
+    clusters = crawl_graph.number_clusters(labels or {}, likes_by_id, weight=likes_by_id.get,
+                                           min_size=CLUSTER_MIN_SIZE)
     for r in rows:
-        if r["_verified"]:
-            selected.add(id(r))
+        r["cluster"] = clusters.get(r["_postID"], "")
+
+    # Build post text → postID map for link matching at assembly time
+    post_text_map = {}
+    for r in rows:
+        post_id = r.pop("_postID")
+        post_text_map[post_id] = textnorm.map_entry(r.get("text", ""))
+
+    # Remove internal tracking fields
+    for r in rows:
+        del r["_verified"]
+        del r["_raw"]
+        del r["_date"]
 
-if selected:
-    rows = [r for r in rows if id(r) in selected]
+    stats = {
+        "refizzes_kept": total_refizzes_kept,
+        "refizzes_total": len(all_refizzes),
+        "clusters": len(set(clusters.values())),
+        "clustered_rows": len(clusters),
+        **dedup_stats,
+    }
+    return rows, post_text_map, stats
 
-# Build post text → postID map for link matching at assembly time
-post_text_map = {}
-for r in rows:
-    post_id = r.pop("_postID")
-    post_text_map[post_id] = r.get("text", "")
 
-# Remove internal tracking fields
-for r in rows:
-    del r["_verified"]
+def write_outputs(rows: list[dict], post_text_map: dict) -> None:
+    with open(POST_TEXT_MAP_PATH, "w", encoding="utf-8") as f:
+        # One post per line; token lists would otherwise take a line per word
+        f.write("{\n" + ",\n".join(
+            f"  {json.dumps(post_id)}: {json.dumps(entry, ensure_ascii=False)}"
+            for post_id, entry in post_text_map.items()
+        ) + "\n}\n")
 
-POST_TEXT_MAP_PATH = ROOT_DIR / "data" / "post-text-map.json"
-with open(POST_TEXT_MAP_PATH, "w", encoding="utf-8") as f:
-    json.dump(post_text_map, f, indent=2)
+    with open(OUTPUT_PATH, "w", newline="") as f:
+        f.write("# refizzes format: likes|text|likes|text (responses to this post, sorted by likes)\n")
+        f.write("# (original) prefix means it shows the post being quote-reposted\n")
+        f.write("# cluster: rows with the same number are linked as similar posts by Fizz (blank = no group)\n")
+        f.write("# similar: near-identical posts folded into this row; their likes are included\n")
+        w = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        w.writeheader()
+        w.writerows(rows)
+
+
+def main(cache: StageCache | None = None) -> dict:
+    cache = cache or StageCache()
+    cutoff = time.time() - 86400 * DAYS
+
+    input_path, posts = load_window(cutoff)
+    print(f"Reading from {input_path} ({len(posts)} posts)")
+
+    # The window (not the cutoff second) plus this script's config and code
+    # decide the output, so an unchanged window reuses the last CSV.
+    window = [p for p in posts if p["date"] >= cutoff]
+    graph_file = crawl_graph.graph_path()
+    key = fingerprint(
+        window,
+        [DAYS, MOST_LIKED, LEAST_LIKED, MOST_LIKED_REFIZZES, LEAST_LIKED_REFIZZES, INCLUDE_VERIFIED,
+         CLUSTER_METHOD, CLUSTER_MIN_SIZE, DEDUP_THRESHOLD, dedup.available()],
+        graph_file if CLUSTER_METHOD else "",
+        Path(__file__),
+        Path(crawl_graph.__file__),
+        Path(dedup.__file__),
+        Path(textnorm.__file__),
+    )
+    cached = cache.get("sanitize", key, valid=lambda out: all(
+        fingerprint(Path(path)) == digest for path, digest in out["files"].items()
+    ))
+    if cached is not None:
+        print(f"  {OUTPUT_PATH.name} and {POST_TEXT_MAP_PATH.name} are up to date ({cached['rows']} posts)")
+        return {"csv": str(OUTPUT_PATH), "post_text_map": str(POST_TEXT_MAP_PATH), "rows": cached["rows"]}
+
+    labels, edge_count = cluster_window(window)
+    rows, post_text_map, stats = build_rows(window, cutoff, labels)
+    write_outputs(rows, post_text_map)
+    cache.put("sanitize", key, {
+        "rows": len(rows),
+        "files": {str(path): fingerprint(path) for path in (OUTPUT_PATH, POST_TEXT_MAP_PATH)},
+    })
 
-fieldnames = ["identity", "likes", "comments", "text", "media", "refizzes"]
+    file_size = OUTPUT_PATH.stat().st_size
+    print(f"Wrote {len(rows)} posts ({stats['refizzes_kept']} reFizzes kept out of {stats['refizzes_total']}) from last {DAYS} days to {OUTPUT_PATH}")
+    print(f"  Post text map: {POST_TEXT_MAP_PATH} ({len(post_text_map)} entries)")
+    if stats["duplicates_folded"]:
+        print(f"  Near-duplicates: folded {stats['duplicates_folded']} posts into {stats['duplicate_groups']} rows "
+              f"(~{stats['tokens_saved']:,} prompt tokens saved)")
+    if labels:
+        print(f"  Clusters: {stats['clusters']} groups covering {stats['clustered_rows']} posts "
+              f"({CLUSTER_METHOD} over {edge_count:,} crawl edges in the window)")
+    elif CLUSTER_METHOD:
+        print(f"  Clusters: none ({graph_file.name} not found; run crawl.mjs to record similar-post links)")
+    print(f"  File size: {file_size:,} chars")
+    return {
+        "csv": str(OUTPUT_PATH),
+        "post_text_map": str(POST_TEXT_MAP_PATH),
+        "rows": len(rows),
+    }
 
-with open(OUTPUT_PATH, "w", newline="") as f:
-    f.write("# refizzes format: likes|text|likes|text (responses to this post, sorted by likes)\n")
-    f.write("# (original) prefix means it shows the post being quote-reposted\n")
-    w = csv.DictWriter(f, fieldnames=fieldnames)
-    w.writeheader()
-    w.writerows(rows)
 
-file_size = OUTPUT_PATH.stat().st_size
-print(f"Wrote {len(rows)} posts ({total_refizzes_kept} reFizzes kept out of {len(all_refizzes)}) from last {DAYS} days to {OUTPUT_PATH}")
-print(f"  Post text map: {POST_TEXT_MAP_PATH} ({len(post_text_map)} entries)")
-print(f"  File size: {file_size:,} chars")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filter the posts DB window into the newsletter CSV")
+    add_force_argument(parser)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    cache = StageCache(force=args.force)
+    with profiled("sanitize", args.profile):
+        main(cache)
+    print(cache.report())
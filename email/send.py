@@ -6,28 +6,46 @@ Sends the latest FizzBuzz HTML newsletter to a list of recipients via SMTP.
 Usage:
     python3 send.py
     python3 send.py --file email/output/fizz_email_20240227_120000.html
+    python3 send.py --list --rate 30 --batch-size 5   # paced bulk send
+    python3 send.py --list --connections 4            # parallel SMTP sessions
+    python3 send.py --list --restart                  # ignore the resume journal
     python3 send_newsletter.py --sample              # launch web GUI for sample sends
     python3 send_newsletter.py --sample --port 8080  # custom port
+    python3 send.py --sample --production            # waitress, for long-running use
 
 Setup:
     pip install python-dotenv flask
+    Optional: pip install waitress brotli   (for --sample --production)
     Add SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SENDER_EMAIL,
     and SENDER_NAME to your .env file.
     For Gmail: SMTP_HOST=smtp.gmail.com, SMTP_PORT=587, SMTP_PASSWORD=<app password>
+    Optional: SMTP_RATE_PER_MINUTE (default 60), SMTP_BATCH_SIZE (default 1),
+    SMTP_CONNECTIONS (default 1), LIST_UNSUBSCRIBE (URL, may contain {email})
     Create a .mailing_list file in the fizzbuzz root with one email per line
+
+Bulk sends go through mailer.BulkSender: SMTP_CONNECTIONS pooled sessions,
+one envelope per recipient (or per SMTP_BATCH_SIZE recipients), paced to a
+rate limit shared by the whole pool.
+Progress is journaled to email/output/send-journal_<newsletter>.jsonl and a
+re-run with the same newsletter skips recipients already sent or permanently
+refused, and retries the ones that failed.
 """
 
 import os
 import re
+import sys
 import glob
-import smtplib
 import argparse
 import webbrowser
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from pathlib import Path
 from dotenv import load_dotenv
 
+from mailer import BulkSender, PreparedMessage, format_throughput
+from paths import MAILING_LIST_PATH, OUTPUT_DIR
+from plaintext import text_for_newsletter
+from profiling import add_profile_argument, run_main
+from sample_server import DeliveryQueue, EditionWatcher, IPRateLimiter, SampleEdition
+
 # ── Load .env from fizzbuzz root ─────────────────────────────────────────────
 ROOT = Path(__file__).resolve().parent.parent
 load_dotenv(ROOT / ".env")
@@ -40,15 +58,18 @@ SMTP_PASSWORD     = os.getenv("SMTP_PASSWORD")
 SENDER_EMAIL      = os.getenv("SENDER_EMAIL")
 SENDER_NAME       = os.getenv("SENDER_NAME", "FizzBuzz")
 EMAIL_SUBJECT     = os.getenv("EMAIL_SUBJECT", "📰 FizzBuzz — Yale's Daily Digest")
-MAILING_LIST_PATH = ROOT / ".mailing_list"
+LIST_UNSUBSCRIBE  = os.getenv("LIST_UNSUBSCRIBE")  # mailto:/https: URL, may contain {email}
+SMTP_RATE_PER_MINUTE = float(os.getenv("SMTP_RATE_PER_MINUTE", "60"))
+SMTP_BATCH_SIZE   = int(os.getenv("SMTP_BATCH_SIZE", "1"))
+SMTP_CONNECTIONS  = int(os.getenv("SMTP_CONNECTIONS", "1"))
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def load_mailing_list() -> list[str]:
-    """Load recipients from .mailing_list in the fizzbuzz root (one email per line)."""
+    """Load recipients from .mailing_list (or $FIZZ_MAILING_LIST), one email per line."""
     if not MAILING_LIST_PATH.exists():
         raise FileNotFoundError(
-            f".mailing_list not found at {MAILING_LIST_PATH}\n"
+            f"Mailing list not found at {MAILING_LIST_PATH}\n"
             "Create it with one email address per line."
         )
     emails = [
@@ -57,17 +78,17 @@ def load_mailing_list() -> list[str]:
         if line.strip() and not line.strip().startswith("#")
     ]
     if not emails:
-        raise ValueError(".mailing_list exists but contains no email addresses.")
+        raise ValueError(f"{MAILING_LIST_PATH.name} exists but contains no email addresses.")
     return emails
 
 
 def find_latest_newsletter() -> Path:
     """Return the most recently generated fizz_email_*.html file."""
-    pattern = str(ROOT / "email" / "output" / "fizz_email_*.html")
+    pattern = str(OUTPUT_DIR / "fizz_email_*.html")
     files = sorted(glob.glob(pattern))
     if not files:
         raise FileNotFoundError(
-            "No fizz_email_*.html files found in email/output/. "
+            f"No fizz_email_*.html files found in {OUTPUT_DIR}. "
             "Run generate-email.py first."
         )
     return Path(files[-1])
@@ -93,12 +114,12 @@ def prepare_for_email(html: str) -> str:
 def find_sample_newsletter() -> Path:
     """Return the most recent fizz_sample_*.html, falling back to fizz_email_*.html."""
     for prefix in ("fizz_sample_", "fizz_email_"):
-        pattern = str(ROOT / "email" / "output" / f"{prefix}*.html")
+        pattern = str(OUTPUT_DIR / f"{prefix}*.html")
         files = sorted(glob.glob(pattern))
         if files:
             return Path(files[-1])
     raise FileNotFoundError(
-        "No fizz_sample_*.html or fizz_email_*.html files found in email/output/. "
+        f"No fizz_sample_*.html or fizz_email_*.html files found in {OUTPUT_DIR}. "
         "Run generate-email.py first."
     )
 
@@ -198,12 +219,39 @@ document.getElementById('f').addEventListener('submit',async e=>{
 """
 
 
-def run_sample_server(newsletter_path: Path, port: int):
-    """Launch a local Flask app that lets visitors request a sample email."""
-    from flask import Flask, request, jsonify
-
+def load_sample_edition(newsletter_path: Path) -> SampleEdition:
+    """Load a newsletter and prepare it for previews and sample sends."""
     raw_html = load_html(newsletter_path)
     prepared_html = prepare_for_email(raw_html)
+    prepared_text = text_for_newsletter(newsletter_path, prepared_html)
+    return SampleEdition(newsletter_path, raw_html, prepared_html, prepared_text)
+
+
+def run_sample_server(newsletter_path: Path | None, port: int, production: bool = False):
+    """Launch a Flask app that lets visitors request a sample email.
+
+    /send only validates and queues; a background worker does the SMTP work,
+    so requests return 202 immediately. With production=True the app is
+    served by waitress (multi-threaded) instead of Flask's dev server.
+
+    With newsletter_path=None the newest sample edition in email/output/ is
+    served and hot-reloaded when a newer one appears; an explicit path is
+    pinned but still reloaded if the file itself changes.
+    """
+    from flask import Flask, Response, request, jsonify
+
+    find = (lambda: newsletter_path) if newsletter_path else find_sample_newsletter
+    watcher = EditionWatcher(find, load_sample_edition)
+
+    def deliver(email: str):
+        edition = watcher.current
+        report = send_newsletter(edition.prepared_html, [email], EMAIL_SUBJECT, text=edition.text)
+        # send_newsletter reports refused recipients instead of raising
+        if report["failed"]:
+            raise RuntimeError("the SMTP server refused or could not deliver it")
+
+    deliveries = DeliveryQueue(deliver)
+    ip_limiter = IPRateLimiter()
 
     app = Flask(__name__)
 
@@ -213,44 +261,88 @@ def run_sample_server(newsletter_path: Path, port: int):
 
     @app.route("/preview")
     def preview():
-        return raw_html
+        edition = watcher.current
+        headers = {
+            "ETag": edition.etag,
+            "Cache-Control": "public, max-age=300",
+            "Vary": "Accept-Encoding",
+        }
+        if edition.not_modified(request.headers.get("If-None-Match", "")):
+            return Response(status=304, headers=headers)
+        body, encoding = edition.negotiate(request.headers.get("Accept-Encoding", ""))
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(body, headers=headers, content_type="text/html; charset=utf-8")
 
     @app.route("/send", methods=["POST"])
     def send_sample():
-        data = request.get_json(force=True)
+        data = request.get_json(force=True, silent=True) or {}
         email = (data.get("email") or "").strip()
         if not email or "@" not in email:
             return jsonify(error="Please enter a valid email address."), 400
-        try:
-            send_newsletter(prepared_html, [email], EMAIL_SUBJECT)
-        except Exception as exc:
-            return jsonify(error=str(exc)), 500
-        return jsonify(message=f"Sample sent to {email}!")
+        if not ip_limiter.allow(request.remote_addr or "unknown"):
+            return jsonify(error="Too many requests — try again later."), 429
+        status = deliveries.submit(email)
+        if status == "full":
+            return jsonify(error="We're swamped right now — try again in a few minutes."), 503
+        if status == "duplicate":
+            return jsonify(message=f"A sample is already on its way to {email}."), 200
+        return jsonify(message=f"Sample queued for {email} — check your inbox shortly!"), 202
 
     url = f"http://localhost:{port}"
-    print(f"📄 Sample newsletter: {newsletter_path.name}")
-    print(f"🌐 Server running at {url}")
+    print(f"📄 Sample newsletter: {watcher.current.path.name}"
+          + ("" if newsletter_path else f" (watching for newer editions every {watcher.interval:g}s)"))
+    print(f"🌐 Server running at {url}" + (" (production)" if production else ""))
     print(f"   Press Ctrl+C to stop.\n")
-    webbrowser.open(url)
-    app.run(host="0.0.0.0", port=port, debug=False)
-
-
-def send_newsletter(html_content: str, recipients: list[str], subject: str):
+    if production:
+        try:
+            from waitress import serve
+        except ImportError:
+            raise SystemExit("--production requires waitress: pip install waitress")
+        serve(app, host="0.0.0.0", port=port, threads=8)
+    else:
+        webbrowser.open(url)
+        app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
+
+
+def send_newsletter(
+    html_content: str,
+    recipients: list[str],
+    subject: str,
+    text: str | None = None,
+    journal_path: Path | None = None,
+    batch_size: int = SMTP_BATCH_SIZE,
+    rate_per_minute: float = SMTP_RATE_PER_MINUTE,
+    connections: int = SMTP_CONNECTIONS,
+    progress: bool = False,
+) -> dict:
+    """Deliver to recipients over pooled SMTP sessions. Returns the send report.
+
+    When `text` is given it is sent as the text/plain alternative part.
+    """
     if not SMTP_PASSWORD:
         raise ValueError("SMTP_PASSWORD not set in .env")
     if not SENDER_EMAIL:
         raise ValueError("SENDER_EMAIL not set in .env")
 
-    msg = MIMEMultipart("alternative")
-    msg["From"] = f"{SENDER_NAME} <{SENDER_EMAIL}>"
-    msg["Subject"] = subject
-    msg["Bcc"] = ", ".join(recipients)
-    msg.attach(MIMEText(html_content, "html"))
+    prepared = PreparedMessage(
+        html_content, subject, f"{SENDER_NAME} <{SENDER_EMAIL}>",
+        text=text,
+        list_unsubscribe=LIST_UNSUBSCRIBE,
+    )
+    sender = BulkSender(
+        SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SENDER_EMAIL,
+        batch_size=batch_size,
+        rate_per_minute=rate_per_minute,
+        journal_path=journal_path,
+        connections=connections,
+    )
+    return sender.send_all(recipients, prepared.for_recipients, progress=progress)
 
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-        server.starttls()
-        server.login(SMTP_USER, SMTP_PASSWORD)
-        server.sendmail(SENDER_EMAIL, recipients, msg.as_string())
+
+def journal_path_for(newsletter_path: Path) -> Path:
+    """Resume journal for a given newsletter file."""
+    return OUTPUT_DIR / f"send-journal_{newsletter_path.stem}.jsonl"
 
 
 # ── Main ──────────────────────────────────────────────────────────────────────
@@ -274,17 +366,46 @@ def main():
         action="store_true",
         help="Send to the full mailing list (required for bulk sends)"
     )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=SMTP_RATE_PER_MINUTE,
+        help=f"Max recipients per minute, 0 = unpaced (default: {SMTP_RATE_PER_MINUTE:g})"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=SMTP_BATCH_SIZE,
+        help=f"Recipients per SMTP envelope (default: {SMTP_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--connections", "-c",
+        type=int,
+        default=SMTP_CONNECTIONS,
+        help=f"Parallel SMTP connections for bulk sends (default: {SMTP_CONNECTIONS})"
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Discard the resume journal for this newsletter and send to everyone"
+    )
     parser.add_argument(
         "--sample", "-s",
         action="store_true",
         help="Launch a web GUI where visitors can request a sample email"
     )
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="Serve the sample GUI with waitress instead of Flask's dev server"
+    )
     parser.add_argument(
         "--port", "-p",
         type=int,
         default=5050,
         help="Port for the sample-send web server (default: 5050)"
     )
+    add_profile_argument(parser)
     args = parser.parse_args()
 
     # ── Resolve newsletter file ──────────────────────────────────────────
@@ -299,7 +420,8 @@ def main():
 
     # ── Sample mode: launch web GUI ──────────────────────────────────────
     if args.sample:
-        run_sample_server(newsletter_path, args.port)
+        run_sample_server(newsletter_path if args.file else None, args.port,
+                          production=args.production)
         return
 
     # ── Normal send mode ────────────────────────────────────────────────
@@ -308,13 +430,20 @@ def main():
 
     if args.to:
         recipients = [args.to]
+        journal_path = None
     else:
         recipients = load_mailing_list()
+        journal_path = journal_path_for(newsletter_path)
+        if args.restart and journal_path.exists():
+            journal_path.unlink()
 
     print(f"📄 Newsletter: {newsletter_path.name}")
     print(f"👥 Recipients: {len(recipients)}")
     print(f"📬 Sender: {SENDER_NAME} <{SENDER_EMAIL}>")
     print(f"📝 Subject: {EMAIL_SUBJECT}")
+    print(f"⏱️  Pacing: {args.rate:g}/min, {args.batch_size} per envelope, {args.connections} connection(s)")
+    if journal_path:
+        print(f"🧾 Journal: {journal_path}")
     print()
 
     html = load_html(newsletter_path)
@@ -322,10 +451,30 @@ def main():
     print("🔧 Inlining CSS for email compatibility...")
     html = prepare_for_email(html)
 
+    text = text_for_newsletter(newsletter_path, html)
+    print(f"📃 Plain-text part: {len(text):,} chars ({newsletter_path.with_suffix('.txt').name})")
+
     print("🚀 Sending...")
-    send_newsletter(html, recipients, EMAIL_SUBJECT)
+    report = send_newsletter(
+        html, recipients, EMAIL_SUBJECT,
+        text=text,
+        journal_path=journal_path,
+        batch_size=args.batch_size,
+        rate_per_minute=args.rate,
+        connections=args.connections,
+        progress=True,
+    )
+    print(
+        f"📊 {report['sent']} sent, {report['failed']} failed, "
+        f"{report['skipped']} skipped (already done) in {report['elapsed']:.1f}s"
+    )
+    for line in format_throughput(report):
+        print(f"   {line}")
+    if report["failed"]:
+        print(f"❌ {report['failed']} recipient(s) failed — see {journal_path or 'output above'}")
+        sys.exit(1)
     print("✅ Sent successfully!")
 
 
 if __name__ == "__main__":
-    main()
+    run_main("send", main)
@@ -0,0 +1,171 @@
+"""
+stage_cache.py
+Content-hash cache for the expensive pipeline stages.
+
+Each stage (sanitize, glossary, analysis, annotation, writing, assembly)
+hashes everything it reads: the posts window, prompt templates, glossary,
+edition memory, alignment note, template. If the hash matches the one recorded
+after the stage last ran, the recorded output is reused instead of running
+the stage again. One entry per stage lives in data/.stage-cache/<stage>.json.
+
+Files the pipeline appends to itself are fingerprinted so that a re-run
+still hits the cache: the glossary by its defined terms only (new "term =
+???" lines are ignored until someone fills them in), the edition memory
+without today's lines.
+
+Force a stage to run with `--force STAGE` (repeatable, comma lists and
+"all" accepted) on pipeline.py, sanitize.py, generate-email.py and
+assemble.py, or with FIZZ_FORCE=STAGE[,STAGE] in the environment.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+
+from paths import DATA_DIR
+
+CACHE_DIR = DATA_DIR / ".stage-cache"
+
+STAGES = ("sanitize", "glossary", "analysis", "annotation", "writing", "assembly")
+
+
+def fingerprint(*parts) -> str:
+    """sha256 over a sequence of inputs.
+
+    str and bytes are hashed as-is, a Path by its contents (or a marker if
+    it does not exist), anything else as canonical JSON.
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, Path):
+            data = part.read_bytes() if part.is_file() else b"\0missing\0" + str(part).encode()
+        elif isinstance(part, bytes):
+            data = part
+        elif isinstance(part, str):
+            data = part.encode("utf-8")
+        else:
+            data = json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def glossary_fingerprint(glossary: str) -> str:
+    """Hash of the glossary's defined terms, ignoring comments and '= ???' placeholders."""
+    entries = []
+    for line in glossary.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.split("=", 1)[-1].strip() == "???":
+            continue
+        entries.append(line)
+    return fingerprint(*entries)
+
+
+def memory_fingerprint(memory_log: str, today: str | None = None) -> str:
+    """Hash of the edition memory as it stood before today's edition was written."""
+    prefix = f"[{today or date.today().isoformat()}]"
+    return fingerprint(*(
+        line for line in memory_log.splitlines()
+        if line.strip() and not line.startswith(prefix)
+    ))
+
+
+def parse_force(values) -> set[str]:
+    """Normalize --force / FIZZ_FORCE values into a set of stage names."""
+    forced = set()
+    for value in values or ():
+        for name in value.split(","):
+            name = name.strip().lower()
+            if not name:
+                continue
+            if name == "all":
+                forced.update(STAGES)
+            elif name in STAGES:
+                forced.add(name)
+            else:
+                raise ValueError(f"Unknown stage {name!r} (choose from: {', '.join(STAGES)}, all)")
+    return forced
+
+
+def _force_value(value: str) -> str:
+    try:
+        parse_force([value])
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+    return value
+
+
+def add_force_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--force",
+        action="append",
+        type=_force_value,
+        metavar="STAGE",
+        help=f"Re-run a cached stage even if its inputs are unchanged "
+             f"({', '.join(STAGES)}, all; repeatable)",
+    )
+
+
+class StageCache:
+    """Lookup and record stage outputs by input hash.
+
+    A stage asks get(stage, key) before doing its work and calls
+    put(stage, key, output) afterwards; output must be JSON-serializable.
+    Hits and misses are recorded for report().
+    """
+
+    def __init__(self, force=(), cache_dir: Path = CACHE_DIR):
+        self.force = parse_force(force) | parse_force([os.environ.get("FIZZ_FORCE", "")])
+        self.cache_dir = cache_dir
+        self.hits: list[str] = []
+        self.misses: list[str] = []
+
+    def _path(self, stage: str) -> Path:
+        return self.cache_dir / f"{stage}.json"
+
+    def get(self, stage: str, key: str, valid=None) -> dict | None:
+        """Recorded output for `stage` if it was produced from `key`, else None.
+
+        valid(output), if given, can reject an entry whose output no longer
+        exists on disk.
+        """
+        entry = None
+        if stage in self.force:
+            print(f"[Stage cache: {stage} forced]")
+        else:
+            try:
+                entry = json.loads(self._path(stage).read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                entry = None
+            if entry is not None and entry.get("key") != key:
+                entry = None
+            elif entry is not None and valid is not None and not valid(entry["output"]):
+                entry = None
+        if entry is None:
+            self.misses.append(stage)
+            return None
+        self.hits.append(stage)
+        print(f"[Stage cache: {stage} unchanged since {entry.get('created_at', '?')}, reusing output]")
+        return entry["output"]
+
+    def put(self, stage: str, key: str, output: dict) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(stage)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "key": key,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "output": output,
+        }, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def report(self) -> str:
+        hits = ", ".join(self.hits) or "none"
+        ran = ", ".join(self.misses) or "none"
+        return f"[Stage cache: hits: {hits} | ran: {ran}]"
@@ -0,0 +1,55 @@
+"""
+textnorm.py
+Matching-ready post text, computed once in sanitize.py and reused at assembly.
+
+sanitize.py writes each kept post to post-text-map.json as
+
+    {"<postID>": {"text": "<CSV text>", "clean": "<normalized>", "tokens": ["<word>", ...]}}
+
+where clean_for_matching() has stripped HTML, [RELATIVE TIME: ...]
+annotations and punctuation, and tokens is the set of words left. When
+generate-email.py matches a quote to its post, it only normalizes the
+quote. The posts arrive normalized, and the token sets rule out posts that
+share no word with the quote before any fuzzy comparison runs.
+
+Maps written before this format (postID -> plain text) still load; their
+entries are normalized on load.
+
+Usage:
+    from textnorm import clean_for_matching, load_post_text_map, map_entry
+"""
+
+import json
+import re
+from pathlib import Path
+
+_ENTITY_RE = re.compile(r"&[a-z]+;")
+_TAG_RE = re.compile(r"<[^>]+>")
+_ANNOTATION_RE = re.compile(r"\[RELATIVE TIME:[^\]]*\]")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def clean_for_matching(text: str) -> str:
+    """Normalize text for fuzzy comparison."""
+    text = _ENTITY_RE.sub(" ", text)             # strip HTML entities
+    text = _TAG_RE.sub(" ", text)                # strip tags
+    text = _ANNOTATION_RE.sub(" ", text)         # strip time annotations
+    text = _PUNCT_RE.sub(" ", text.lower())      # lowercase, strip punctuation
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def map_entry(text: str) -> dict:
+    """A post-text-map.json value for one post's CSV text."""
+    clean = clean_for_matching(text)
+    return {"text": text, "clean": clean, "tokens": sorted(set(clean.split()))}
+
+
+def load_post_text_map(path: Path) -> dict[str, dict]:
+    """postID -> {"text", "clean", "tokens" (a set)}, from either map format."""
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    entries = {}
+    for post_id, value in raw.items():
+        entry = map_entry(value) if isinstance(value, str) else value
+        entries[post_id] = {"text": entry["text"], "clean": entry["clean"], "tokens": set(entry["tokens"])}
+    return entries
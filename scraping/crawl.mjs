@@ -2,7 +2,7 @@ import fetch from "node-fetch";
 import fs from "fs";
 import path from "path";
 import { fileURLToPath } from "url";
-import { mergeIntoDB } from "./db.mjs";
+import { DATA_DIR, mergeIntoDB } from "./db.mjs";
 
 const __dirname = path.dirname(fileURLToPath(import.meta.url));
 const ENV_PATH = fileURLToPath(new URL("../.env", import.meta.url));
@@ -34,7 +34,9 @@ const CONFIG = {
   MAX_QUERIES: Number(process.env.CRAWL_MAX_QUERIES || 2000),
   CONCURRENCY: Number(process.env.CRAWL_CONCURRENCY),
   TOKEN_REFRESH_MS: Number(process.env.CRAWL_TOKEN_REFRESH_MS),
-  SEED_FILE: path.resolve(__dirname, process.env.SEED_FILE || "../data/posts.json"),
+  SEED_FILE: process.env.SEED_FILE
+    ? path.resolve(__dirname, process.env.SEED_FILE)
+    : path.join(DATA_DIR, "posts.json"),
 };
 
 const REQUIRED_CONFIG_KEYS = [
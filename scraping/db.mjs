@@ -5,10 +5,19 @@
  * Posts are deduplicated by postID. When a post is seen again, its fields
  * are updated (newer scrape wins) and _scrapedAt is refreshed.
  *
+ * Several scrapers may run at once, so every read-modify-write happens under
+ * an advisory lock (data/posts-db.json.lock, created with O_EXCL) and the DB
+ * is written to a temp file and renamed into place. Readers never see a
+ * half-written file. email/posts_db.py speaks the same lock protocol.
+ *
+ * FIZZ_DATA_DIR moves the DB (and the scrapers' other outputs) to another
+ * directory, so several communities can keep separate databases.
+ *
  * Usage:
  *   import { mergeIntoDB } from "./db.mjs";
  *   mergeIntoDB(posts, "crawl");     // posts = array of post objects
  *   mergeIntoDB(posts, "top-feed");
+ *   mergeIntoDB(posts, "live", { fillOnly: true });
  */
 
 import fs from "fs";
@@ -16,10 +25,144 @@ import path from "path";
 import { fileURLToPath } from "url";
 
 const __dirname = path.dirname(fileURLToPath(import.meta.url));
-const DB_PATH = path.resolve(__dirname, "../data/posts-db.json");
+// FIZZ_DATA_DIR (relative to the repo root) gives each community its own data dir
+export const DATA_DIR = path.resolve(__dirname, "..", process.env.FIZZ_DATA_DIR || "data");
+fs.mkdirSync(DATA_DIR, { recursive: true });
+const DB_PATH = path.join(DATA_DIR, "posts-db.json");
+const LOCK_PATH = `${DB_PATH}.lock`;
+
+const LOCK_TIMEOUT_MS = 120_000;  // give up waiting for the lock after this
+const LOCK_STALE_MS = 600_000;    // a lock older than this is assumed abandoned
+const LOCK_POLL_MS = 100;
+const BREAK_PATH = `${LOCK_PATH}.break`;
+const BREAK_STALE_MS = 30_000;    // a stale-lock breaker older than this crashed mid-break
+
+function sleepSync(ms) {
+  Atomics.wait(new Int32Array(new SharedArrayBuffer(4)), 0, 0, ms);
+}
+
+function isStaleLock(raw) {
+  try {
+    const { pid, createdAt } = JSON.parse(raw);
+    if (Date.now() - createdAt > LOCK_STALE_MS) return true;
+    try {
+      process.kill(pid, 0);
+      return false;
+    } catch (err) {
+      return err.code === "ESRCH";
+    }
+  } catch {
+    // Unreadable lock: only treat it as stale once it is old on disk
+    try {
+      return Date.now() - fs.statSync(LOCK_PATH).mtimeMs > LOCK_STALE_MS;
+    } catch {
+      return false;
+    }
+  }
+}
+
+/**
+ * Delete the lock if it still holds `seen`, the contents judged stale.
+ *
+ * Checking and deleting is not atomic, so waiters that break locks take
+ * turns on a second O_EXCL file (posts-db.json.lock.break) and re-read the
+ * lock under it; a fresh lock created meanwhile is never deleted. Same
+ * protocol as email/posts_db.py. Returns false if another waiter is
+ * breaking it.
+ */
+function breakStaleLock(seen) {
+  try {
+    fs.closeSync(fs.openSync(BREAK_PATH, "wx"));
+  } catch (err) {
+    if (err.code !== "EEXIST") throw err;
+    try {
+      // Breaking takes microseconds; an old breaker was left by a crash
+      if (Date.now() - fs.statSync(BREAK_PATH).mtimeMs > BREAK_STALE_MS) fs.unlinkSync(BREAK_PATH);
+    } catch {}
+    return false;
+  }
+  try {
+    let current;
+    try {
+      current = fs.readFileSync(LOCK_PATH, "utf8");
+    } catch {
+      return true;
+    }
+    if (current === seen) {
+      console.warn(`── DB: removing stale lock ${LOCK_PATH}`);
+      fs.unlinkSync(LOCK_PATH);
+    }
+    return true;
+  } finally {
+    try { fs.unlinkSync(BREAK_PATH); } catch {}
+  }
+}
+
+/**
+ * Acquire the advisory DB lock, blocking until it is free.
+ */
+function acquireLock() {
+  const deadline = Date.now() + LOCK_TIMEOUT_MS;
+  for (;;) {
+    try {
+      const fd = fs.openSync(LOCK_PATH, "wx");
+      fs.writeSync(fd, JSON.stringify({ pid: process.pid, createdAt: Date.now() }));
+      fs.closeSync(fd);
+      return;
+    } catch (err) {
+      if (err.code !== "EEXIST") throw err;
+    }
+    let seen = null;
+    try {
+      seen = fs.readFileSync(LOCK_PATH, "utf8");
+    } catch (err) {
+      if (err.code === "ENOENT") continue;  // released in the meantime
+    }
+    if (seen !== null && isStaleLock(seen) && breakStaleLock(seen)) continue;
+    if (Date.now() > deadline) {
+      throw new Error(`Timed out waiting for DB lock ${LOCK_PATH}`);
+    }
+    sleepSync(LOCK_POLL_MS);
+  }
+}
+
+function releaseLock() {
+  try { fs.unlinkSync(LOCK_PATH); } catch {}
+}
 
 /**
- * Load the existing DB, or return an empty structure.
+ * Run fn() while holding the DB lock.
+ */
+export function withDBLock(fn) {
+  acquireLock();
+  try {
+    return fn();
+  } finally {
+    releaseLock();
+  }
+}
+
+/**
+ * Write the DB to a temp file in the same directory, then rename it over
+ * the real file so readers only ever see a complete DB.
+ */
+function writeDBAtomic(db) {
+  const tmpPath = `${DB_PATH}.${process.pid}.tmp`;
+  const fd = fs.openSync(tmpPath, "w");
+  try {
+    fs.writeSync(fd, JSON.stringify(db, null, 2));
+    fs.fsyncSync(fd);
+  } finally {
+    fs.closeSync(fd);
+  }
+  fs.renameSync(tmpPath, DB_PATH);
+}
+
+/**
+ * Load the existing DB, or return an empty structure if there is none yet.
+ *
+ * A DB that exists but fails to parse is an error, not an empty DB:
+ * silently starting over would drop every post on the next write.
  */
 export function loadDB() {
   if (!fs.existsSync(DB_PATH)) {
@@ -27,8 +170,8 @@ export function loadDB() {
   }
   try {
     return JSON.parse(fs.readFileSync(DB_PATH, "utf8"));
-  } catch {
-    return { lastUpdated: null, posts: [] };
+  } catch (err) {
+    throw new Error(`Could not parse ${DB_PATH}: ${err.message}`);
   }
 }
 
@@ -37,9 +180,18 @@ export function loadDB() {
  *
  * @param {Array} newPosts - Array of post objects (must have .postID)
  * @param {string} source  - Label for where these came from (e.g. "crawl", "top-feed")
+ * @param {Object} [opts]
+ * @param {boolean} [opts.fillOnly=false] - For existing posts, only fill in
+ *   fields that are missing instead of overwriting them. Used by the live
+ *   scraper, whose snapshots are taken at post time and would otherwise
+ *   clobber the like counts of a later crawl.
  * @returns {{ total: number, added: number, updated: number }}
  */
-export function mergeIntoDB(newPosts, source) {
+export function mergeIntoDB(newPosts, source, opts = {}) {
+  return withDBLock(() => mergeLocked(newPosts, source, opts));
+}
+
+function mergeLocked(newPosts, source, { fillOnly = false } = {}) {
   const db = loadDB();
 
   // Index existing posts by postID for fast lookup
@@ -58,9 +210,15 @@ export function mergeIntoDB(newPosts, source) {
     if (index.has(post.postID)) {
       // Update: merge fields, newer scrape wins for non-internal fields
       const existing = index.get(post.postID);
-      Object.assign(existing, post);
-      existing._scrapedAt = now;
-      existing._source = source;
+      if (fillOnly) {
+        for (const [k, v] of Object.entries(post)) {
+          if (existing[k] === undefined) existing[k] = v;
+        }
+      } else {
+        Object.assign(existing, post);
+        existing._scrapedAt = now;
+        existing._source = source;
+      }
       updated++;
     } else {
       // New post
@@ -81,7 +239,7 @@ export function mergeIntoDB(newPosts, source) {
     posts: allPosts,
   };
 
-  fs.writeFileSync(DB_PATH, JSON.stringify(output, null, 2));
+  writeDBAtomic(output);
 
   console.log(
     `── DB: ${added} added, ${updated} updated → ${allPosts.length} total posts in ${DB_PATH}`
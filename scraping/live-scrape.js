@@ -4,6 +4,7 @@ import fs from "fs";
 import path from "path";
 import dotenv from "dotenv";
 import { fileURLToPath } from "url";
+import { DATA_DIR, mergeIntoDB } from "./db.mjs";
 
 const __dirname = path.dirname(fileURLToPath(import.meta.url));
 
@@ -48,7 +49,12 @@ const CONFIG = {
   PUSHER_APP_KEY: process.env.PUSHER_APP_KEY,
   PUSHER_CLUSTER: process.env.PUSHER_CLUSTER,
   COMMUNITY: process.env.COMMUNITY,
-  OUTPUT_FILE: path.resolve(__dirname, process.env.OUTPUT_FILE || "../data/posts.json"),
+  OUTPUT_FILE: process.env.OUTPUT_FILE
+    ? path.resolve(__dirname, process.env.OUTPUT_FILE)
+    : path.join(DATA_DIR, "posts.json"),
+  // Live posts are buffered and merged into data/posts-db.json in batches
+  DB_FLUSH_MS: Number(process.env.LIVE_DB_FLUSH_MS || 60_000),
+  DB_FLUSH_POSTS: Number(process.env.LIVE_DB_FLUSH_POSTS || 25),
 };
 // ─────────────────────────────────────────────────────────────────────────────
 
@@ -72,7 +78,7 @@ let bearerToken = null;
 let savedPosts = [];
 
 // Debug log for raw Pusher events
-const DEBUG_LOG = path.resolve(__dirname, "../data/pusher-events.jsonl");
+const DEBUG_LOG = path.join(DATA_DIR, "pusher-events.jsonl");
 
 function logEvent(channel, eventName, data) {
   const line = JSON.stringify({ ts: new Date().toISOString(), channel, event: eventName, data }) + "\n";
@@ -146,6 +152,37 @@ function savePost(post) {
   return true;
 }
 
+// ─── DB INGESTION ─────────────────────────────────────────────────────────────
+// Raw post payloads waiting to be merged into the shared posts DB, keyed by
+// postID so a post seen on several channels is only written once.
+const pendingDBPosts = new Map();
+
+function queueForDB(rawPost) {
+  pendingDBPosts.set(rawPost.postID, rawPost);
+  if (pendingDBPosts.size >= CONFIG.DB_FLUSH_POSTS) flushToDB();
+}
+
+function flushToDB() {
+  if (pendingDBPosts.size === 0) return;
+  const batch = Array.from(pendingDBPosts.values());
+  pendingDBPosts.clear();
+  try {
+    mergeIntoDB(batch, "live", { fillOnly: true });
+  } catch (err) {
+    // Keep the batch for the next flush rather than dropping it
+    console.error(`❌ DB flush failed (${batch.length} posts kept for retry): ${err.message}`);
+    for (const p of batch) {
+      if (!pendingDBPosts.has(p.postID)) pendingDBPosts.set(p.postID, p);
+    }
+  }
+}
+
+function flushAndExit() {
+  flushToDB();
+  process.exit(0);
+}
+// ─────────────────────────────────────────────────────────────────────────────
+
 function sanitizePost(contentType, d) {
   const post = {
     id: d.postID,
@@ -217,6 +254,7 @@ async function main() {
 
       if (data?.data?.postID) {
         const post = sanitizePost(data.contentType, data.data);
+        queueForDB(data.data);
         const isNew = savePost(post);
         if (isNew) {
           console.log(`\n📝 [${eventName}] "${post.text || "(no text)"}"`);
@@ -248,6 +286,14 @@ async function main() {
 
   // Refresh token every 55 minutes (expires every 60)
   setInterval(refreshBearerToken, 55 * 60 * 1000);
+
+  // Merge buffered posts into the shared DB periodically and on shutdown
+  setInterval(flushToDB, CONFIG.DB_FLUSH_MS);
+  process.on("SIGINT", flushAndExit);
+  process.on("SIGTERM", flushAndExit);
+  console.log(
+    `🗄️  Merging into posts DB every ${CONFIG.DB_FLUSH_MS / 1000}s or ${CONFIG.DB_FLUSH_POSTS} posts`
+  );
 }
 
 main().catch(console.error);
@@ -18,7 +18,7 @@ import fetch from "node-fetch";
 import fs from "fs";
 import path from "path";
 import { fileURLToPath } from "url";
-import { mergeIntoDB } from "./db.mjs";
+import { DATA_DIR, mergeIntoDB } from "./db.mjs";
 
 const __dirname = path.dirname(fileURLToPath(import.meta.url));
 const ENV_PATH = fileURLToPath(new URL("../.env", import.meta.url));
@@ -201,7 +201,7 @@ function parseArgs() {
   }
 
   if (!opts.output) {
-    opts.output = path.resolve(__dirname, `../data/${opts.feedType}.json`);
+    opts.output = path.join(DATA_DIR, `${opts.feedType}.json`);
   }
 
   return opts;
@@ -246,7 +246,7 @@ async function main() {
       ),
     };
 
-    const outPath = path.resolve(__dirname, "../data/all-feeds.json");
+    const outPath = path.join(DATA_DIR, "all-feeds.json");
     fs.writeFileSync(outPath, JSON.stringify(output, null, 2));
 
     // Merge into shared posts DB
@@ -0,0 +1,10 @@
+"""Put email/ and bench/ on sys.path, the way the scripts themselves import each other."""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for sub in ("email", "bench"):
+    path = str(ROOT / sub)
+    if path not in sys.path:
+        sys.path.insert(0, path)
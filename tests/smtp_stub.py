@@ -0,0 +1,132 @@
+"""A threaded SMTP server on a local socket, scriptable to misbehave.
+
+Only what smtplib's sendmail needs: EHLO/HELO, MAIL, RCPT, DATA, RSET,
+NOOP, QUIT. Messages are numbered by MAIL command across all connections;
+`script` maps a message number to a failure for that message:
+
+    "421"       reply 421 to MAIL FROM and close the connection
+    "drop"      close the connection without replying to MAIL FROM
+    "552"       accept the recipients, reply 552 at the end of DATA
+    "451-data"  accept the recipients, reply 451 at the end of DATA
+
+`refuse` maps an address to a permanent RCPT reply code; `busy` maps an
+address to how many more times its RCPT gets 451.
+"""
+
+import socketserver
+import threading
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        stub = self.server.stub
+        self.reply("220 stub ESMTP")
+        mail_from, rcpts, number = None, [], 0
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250-stub\r\n250 8BITMIME" if verb == "EHLO" else "250 stub")
+            elif verb == "MAIL":
+                number = stub.next_message()
+                action = stub.script.get(number)
+                if action == "drop":
+                    return
+                if action == "421":
+                    self.reply("421 4.3.2 closing, try later")
+                    return
+                mail_from, rcpts = command[10:].strip("<> "), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                rcpt = command[8:].strip("<> ")
+                code = stub.rcpt_code(rcpt)
+                if code == 250:
+                    rcpts.append(rcpt)
+                    self.reply("250 OK")
+                else:
+                    self.reply(f"{code} {'4.2.0 busy' if code < 500 else '5.1.1 no such user'}")
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk:
+                        return
+                    if chunk == b".\r\n":
+                        break
+                    data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                action = stub.script.get(number)
+                if action == "552":
+                    self.reply("552 5.3.4 message too big")
+                elif action == "451-data":
+                    self.reply("451 4.3.0 temporary failure")
+                else:
+                    stub.record(mail_from, rcpts, b"".join(data))
+                    self.reply("250 OK queued")
+                mail_from, rcpts = None, []
+            elif verb == "RSET":
+                mail_from, rcpts = None, []
+                self.reply("250 OK")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("502 not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPStub:
+    """Run with `with SMTPStub() as stub:`; connect to stub.host, stub.port."""
+
+    def __init__(self):
+        self.script: dict[int, str] = {}
+        self.refuse: dict[str, int] = {}
+        self.busy: dict[str, int] = {}
+        self.messages: list[tuple[str, list[str], bytes]] = []
+        self.connections = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.stub = self
+        self.host, self.port = self._server.server_address
+
+    def next_message(self) -> int:
+        with self._lock:
+            self._count += 1
+            return self._count
+
+    def rcpt_code(self, rcpt: str) -> int:
+        with self._lock:
+            if rcpt in self.refuse:
+                return self.refuse[rcpt]
+            if self.busy.get(rcpt, 0) > 0:
+                self.busy[rcpt] -= 1
+                return 451
+            return 250
+
+    def record(self, mail_from: str, rcpts: list[str], data: bytes) -> None:
+        with self._lock:
+            self.messages.append((mail_from, list(rcpts), data))
+
+    def delivered(self) -> list[str]:
+        return sorted(r for _, rcpts, _ in self.messages for r in rcpts)
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
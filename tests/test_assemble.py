@@ -0,0 +1,43 @@
+"""assemble_file's stage caching around post-link resolution."""
+
+import pytest
+
+pytest.importorskip("pandas")
+
+import assemble
+from stage_cache import StageCache
+
+RAW = (
+    "<!--TICKER-->a<!--/TICKER-->"
+    "<!--SECTIONS--><fb-section color=\"red\" label=\"I\"><p>hi</p></fb-section><!--/SECTIONS-->"
+    "<!--FOOTER_EXCEPT-->b<!--/FOOTER_EXCEPT-->"
+)
+
+
+@pytest.fixture
+def raw_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(assemble, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(assemble._mod, "compile_mjml", lambda source: source)
+    path = tmp_path / "fizz_raw_20260101_000000.html"
+    path.write_text(RAW, encoding="utf-8")
+    template = tmp_path / "template.mjml"
+    template.write_text("{{TICKER_CONTENT}}{{SECTIONS}}{{FOOTER_EXCEPT}}", encoding="utf-8")
+    return path, template
+
+
+def test_unresolved_links_are_not_cached(raw_file, tmp_path, monkeypatch):
+    raw_path, template = raw_file
+    cache_dir = tmp_path / "cache"
+    outcome = {"unresolved": ["post1"]}
+    monkeypatch.setattr(assemble._mod, "resolve_post_links", lambda source: (source, outcome["unresolved"]))
+
+    assemble.assemble_file(raw_path, template, cache=StageCache(cache_dir=cache_dir))
+    assert not (cache_dir / "assembly.json").exists()
+
+    outcome["unresolved"] = []
+    assemble.assemble_file(raw_path, template, cache=StageCache(cache_dir=cache_dir))
+    assert (cache_dir / "assembly.json").exists()
+
+    cache = StageCache(cache_dir=cache_dir)
+    assemble.assemble_file(raw_path, template, cache=cache)
+    assert cache.hits == ["assembly"]
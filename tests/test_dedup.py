@@ -0,0 +1,43 @@
+"""MinHash near-duplicate grouping in dedup.py."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import dedup
+
+
+def test_groups_near_duplicates():
+    texts = [
+        "can we get a big W for the dining hall chicken tenders tonight",
+        "something else entirely about the library being closed",
+        "can we get a big W for the dining hall chicken tenders tonight!!",
+        "",
+        "...",
+    ]
+    assert dedup.near_duplicate_groups(texts) == [[0, 2]]
+
+
+@pytest.mark.parametrize("texts", [["a", "b"], ["W", "L", "W"], ["", "x"], ["ab", "ab"]])
+def test_tiny_chunks(texts):
+    groups = dedup.near_duplicate_groups(texts)
+    assert all(len(g) > 1 for g in groups)
+
+
+def test_identical_short_texts_group():
+    assert dedup.near_duplicate_groups(["W", "L", "W"]) == [[0, 2]]
+
+
+def test_short_post_alone_in_final_chunk(monkeypatch):
+    monkeypatch.setattr(dedup, "CHUNK", 3)
+    texts = [
+        "the library is closed again for the third time this week",
+        "who parked a golf cart in the middle of cross campus",
+        "fire alarm at 3am in the old campus dorms, we stood outside forever",
+        "anyone else think the new schedule for shuttles makes no sense",
+        "midterm curve just dropped and honestly it saved my semester",
+        "there is a raccoon living in the courtyard and it has a name now",
+        "W",
+    ]
+    assert dedup.near_duplicate_groups(texts) == []
+    assert dedup.near_duplicate_groups(texts[:3] + ["L", "W", "x", "W"]) == [[4, 6]]
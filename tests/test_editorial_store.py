@@ -0,0 +1,40 @@
+"""Glossary lookup in editorial_store.py."""
+
+from editorial_store import Glossary
+from stage_cache import StageCache
+
+GLOSSARY = """# --- Words ---
+bussin = really good
+# --- Phrases ---
+can we get a big [thing] = a call for applause
+# --- Emoji ---
+💀 = dying of laughter
+"""
+
+
+def _glossary(tmp_path):
+    path = tmp_path / "slang-glossary.txt"
+    path.write_text(GLOSSARY, encoding="utf-8")
+    return Glossary(path)
+
+
+def test_relevant_matches_words_phrases_and_emoji(tmp_path):
+    glossary = _glossary(tmp_path)
+    texts = ["the dining hall was bussin", "can we get a big W for the team", "I'm 💀"]
+    assert [e.term for e in glossary.relevant(texts)] == ["bussin", "can we get a big [thing]", "💀"]
+    assert glossary.relevant(["nothing to see"]) == []
+
+
+def test_relevant_cache_honours_force(tmp_path):
+    glossary = _glossary(tmp_path)
+    cache_dir = tmp_path / "cache"
+    texts = ["bussin fr"]
+    glossary.relevant(texts, cache=StageCache(cache_dir=cache_dir))
+
+    cache = StageCache(cache_dir=cache_dir)
+    glossary.relevant(texts, cache=cache)
+    assert cache.hits == ["glossary"]
+
+    forced = StageCache(force=["all"], cache_dir=cache_dir)
+    assert [e.term for e in glossary.relevant(texts, cache=forced)] == ["bussin"]
+    assert forced.hits == [] and forced.misses == ["glossary"]
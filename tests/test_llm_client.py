@@ -0,0 +1,229 @@
+"""Circuit breaker, retries and stream resume in llm_client.py."""
+
+from types import SimpleNamespace
+
+import pytest
+
+import llm_client
+from llm_client import CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_client.time, "monotonic", clock)
+    monkeypatch.setattr(llm_client.time, "sleep", clock.sleep)
+    monkeypatch.setattr(llm_client, "backoff_delay", lambda *args: 0.0)
+    return clock
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=60)
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record(False)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    breaker.before_call()
+    breaker.record(False)
+    breaker.before_call()
+    breaker.record(True)
+    breaker.before_call()
+    breaker.record(False)
+    breaker.before_call()       # one failure since the success: still closed
+
+
+def test_half_open_allows_one_trial(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.before_call()
+    breaker.record(False)
+    clock.now += 61
+    assert breaker.before_call() is True        # the trial
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()                   # everyone else waits for it
+    breaker.record(True, trial=True)
+    breaker.before_call()
+    assert breaker.opened_at is None
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.before_call()
+    breaker.record(False)
+    clock.now += 61
+    trial = breaker.before_call()
+    breaker.record(False, trial)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock.now += 61
+    breaker.before_call()
+
+
+def test_release_frees_trial(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.before_call()
+    breaker.record(False)
+    clock.now += 61
+    trial = breaker.before_call()
+    breaker.release(trial)
+    assert breaker.before_call() is True    # the trial is available again; still half-open
+    assert breaker.opened_at is not None
+
+
+def test_only_the_trial_holder_frees_the_trial(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    assert breaker.before_call() is False   # a call admitted while closed
+    breaker.record(False)
+    breaker.record(False)                   # another call opens the breaker
+    clock.now += 61
+    assert breaker.before_call() is True
+    breaker.release(False)                  # the first call ends, e.g. interrupted
+    breaker.record(False)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()               # the trial is still running
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class FakeStream:
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        for i, chunk in enumerate(self.chunks):
+            if i == self.fail_after:
+                raise ConnectionError("dropped")
+            yield chunk
+
+    def get_final_message(self):
+        return SimpleNamespace(stop_reason="end_turn", usage=SimpleNamespace(input_tokens=10, output_tokens=5))
+
+
+class FakeMessages:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    def stream(self, **kwargs):
+        self.requests.append(kwargs)
+        return self.outcomes.pop(0)
+
+
+def _client(outcomes, **kwargs):
+    fake = FakeMessages(outcomes)
+    return llm_client.ResilientClient(SimpleNamespace(messages=fake), **kwargs), fake
+
+
+def test_create_retries_transient_errors(clock):
+    client, fake = _client([StatusError(529), StatusError(500), "ok"])
+    assert client.messages.create(model="m", messages=[]) == "ok"
+    assert len(fake.requests) == 3 and client.breaker.failures == 0
+
+
+def test_create_raises_permanent_errors_at_once(clock):
+    client, fake = _client([StatusError(401), "ok"], breaker=CircuitBreaker(threshold=1))
+    with pytest.raises(StatusError):
+        client.messages.create(model="m", messages=[])
+    assert len(fake.requests) == 1
+    assert client.breaker.failures == 0     # a bad request says nothing about the API
+    assert client.messages.create(model="m", messages=[]) == "ok"
+
+
+def test_retry_waits_out_an_open_breaker(clock):
+    client, fake = _client([StatusError(500), StatusError(503), "ok"],
+                           breaker=CircuitBreaker(threshold=2, cooldown=60))
+    assert client.messages.create(model="m", messages=[]) == "ok"
+    assert len(fake.requests) == 3 and clock.slept >= 60
+    assert client.breaker.opened_at is None
+
+
+def test_new_call_refused_while_open_but_running_retry_waits(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    client, fake = _client([StatusError(500), "ok"], breaker=breaker)
+    assert client.messages.create(model="m", messages=[]) == "ok"   # opened, waited, closed
+    breaker.record(False)
+    with pytest.raises(CircuitOpenError):
+        client.messages.create(model="m", messages=[])
+    assert len(fake.requests) == 2
+
+
+def test_interrupted_create_releases_trial(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.before_call()
+    breaker.record(False)
+    clock.now += 61
+    client, _ = _client([KeyboardInterrupt(), "ok"], breaker=breaker)
+    with pytest.raises(KeyboardInterrupt):
+        client.messages.create(model="m", messages=[])
+    assert client.messages.create(model="m", messages=[]) == "ok"
+
+
+def test_stream_resumes_after_drop(clock, tmp_path, monkeypatch):
+    monkeypatch.setenv("FIZZ_LLM_JOURNAL", str(tmp_path))
+    client, fake = _client([FakeStream(["Hello, ", "wor"], fail_after=1), FakeStream(["world", "!"])])
+    with client.messages.stream(model="m", max_tokens=10, messages=[{"role": "user", "content": "hi"}]) as s:
+        text = "".join(s.text_stream)
+        final = s.get_final_message()
+    assert text == "Hello, world!"
+    assert final.usage.output_tokens == 5
+    resumed = fake.requests[1]["messages"]
+    assert resumed[-2] == {"role": "assistant", "content": "Hello, "}
+    assert resumed[-1]["content"] == llm_client.RESUME_PROMPT
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_abandoned_stream_releases_trial(clock, tmp_path, monkeypatch):
+    monkeypatch.setenv("FIZZ_LLM_JOURNAL", str(tmp_path))
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.before_call()
+    breaker.record(False)
+    clock.now += 61
+    client, _ = _client([FakeStream(["a", "b", "c"]), "ok"], breaker=breaker)
+    with client.messages.stream(model="m", max_tokens=10, messages=[]) as s:
+        stream = s.text_stream
+        next(stream)
+        stream.close()          # GeneratorExit inside the half-open trial
+    assert client.messages.create(model="m", messages=[]) == "ok"
+
+
+def test_trim_overlap():
+    partial = "".join(f"line {i}: something unique happened here\n" for i in range(10))
+    more = partial[-100:] + "and then it continued"
+    assert llm_client.trim_overlap(partial, more) == "and then it continued"
+    assert llm_client.trim_overlap(partial, "\nshort") == "\nshort"
@@ -0,0 +1,194 @@
+"""BulkSender against an in-process fake smtplib.SMTP."""
+
+import json
+import smtplib
+
+import pytest
+
+import mailer
+
+
+class FakeSMTP:
+    """Accepts everything except the addresses listed in `refuse` (rcpt -> (code, msg))."""
+
+    refuse: dict = {}
+    starttls_offered = True
+    delivered: list = []
+    logins: list = []
+
+    def __init__(self, host, port, timeout=None):
+        self.tls = False
+
+    def ehlo(self):
+        return 250, b"ok"
+
+    def has_extn(self, name):
+        return name == "starttls" and self.starttls_offered
+
+    def starttls(self):
+        self.tls = True
+
+    def login(self, user, password):
+        FakeSMTP.logins.append((user, self.tls))
+
+    def sendmail(self, sender, rcpts, message):
+        refused = {r: FakeSMTP.refuse[r] for r in rcpts if r in FakeSMTP.refuse}
+        if len(refused) == len(rcpts):
+            raise smtplib.SMTPRecipientsRefused(refused)
+        FakeSMTP.delivered.extend(r for r in rcpts if r not in refused)
+        return refused
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    monkeypatch.setattr(mailer.smtplib, "SMTP", FakeSMTP)
+    monkeypatch.setattr(mailer, "RETRY_BASE_DELAY", 0)
+    FakeSMTP.refuse, FakeSMTP.delivered, FakeSMTP.logins = {}, [], []
+    FakeSMTP.starttls_offered = True
+    return FakeSMTP
+
+
+def _sender(journal, connections=1):
+    return mailer.BulkSender("smtp.test", 587, "user", "pw", "news@test", rate_per_minute=0,
+                             journal_path=journal, connections=connections)
+
+
+def _build(batch):
+    return b"Subject: hi\r\n\r\nbody\r\n"
+
+
+RECIPIENTS = ["a@x", "bad@x", "busy@x", "c@x"]
+
+
+@pytest.mark.parametrize("connections", [1, 3])
+def test_resume_retries_only_transient_failures(fake_smtp, tmp_path, connections):
+    journal = tmp_path / "journal.jsonl"
+    fake_smtp.refuse = {"bad@x": (550, b"no such user"), "busy@x": (451, b"try later")}
+
+    report = _sender(journal, connections).send_all(RECIPIENTS, _build, progress=False)
+    assert report["sent"] == 2 and report["failed"] == 2
+    assert sorted(fake_smtp.delivered) == ["a@x", "c@x"]
+    statuses = {}
+    for line in journal.read_text().splitlines():
+        entry = json.loads(line)
+        statuses[entry["rcpt"]] = entry["status"]
+    assert statuses == {"a@x": "sent", "c@x": "sent", "bad@x": "refused", "busy@x": "failed"}
+
+    # The server recovers: a resumed send only retries the transient failure
+    fake_smtp.refuse = {"bad@x": (550, b"no such user")}
+    fake_smtp.delivered = []
+    report = _sender(journal, connections).send_all(RECIPIENTS, _build, progress=False)
+    assert fake_smtp.delivered == ["busy@x"]
+    assert report["sent"] == 1 and report["failed"] == 0 and report["skipped"] == 3
+
+    fake_smtp.delivered = []
+    report = _sender(journal, connections).send_all(RECIPIENTS, _build, progress=False)
+    assert fake_smtp.delivered == [] and report["skipped"] == 4
+
+
+def test_journal_latest_status_wins(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = mailer.SendJournal(path)
+    journal.record(["a@x", "b@x"], "failed", "451")
+    journal.record(["a@x"], "sent")
+    journal.close()
+    path.write_text(path.read_text() + '{"rcpt": "c@x", "sta')   # torn last line
+    assert mailer.SendJournal(path).done == {"a@x": "sent"}
+
+
+def test_login_requires_starttls(fake_smtp, tmp_path):
+    fake_smtp.starttls_offered = False
+    with pytest.raises(smtplib.SMTPNotSupportedError):
+        _sender(None).send_all(["a@x"], _build, progress=False)
+    assert fake_smtp.logins == [] and fake_smtp.delivered == []
+
+    fake_smtp.starttls_offered = True
+    _sender(None).send_all(["a@x"], _build, progress=False)
+    assert fake_smtp.logins == [("user", True)]
+
+
+def test_prepared_message_stamps_recipient_headers():
+    prepared = mailer.PreparedMessage("<p>hello</p>", "Subject", "FizzBuzz <news@test>")
+    message = prepared.for_recipients(["a@x"])
+    message = message.decode() if isinstance(message, bytes) else message
+    assert "To: a@x" in message and "Subject: Subject" in message
+
+
+# ── Over a real socket ──────────────────────────────────────────────────
+
+from email import message_from_bytes, policy as email_policy
+
+from smtp_stub import SMTPStub
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(mailer, "RETRY_BASE_DELAY", 0)
+    with SMTPStub() as stub:
+        yield stub
+
+
+def _socket_sender(stub, journal, connections=1, batch_size=1):
+    return mailer.BulkSender(stub.host, stub.port, None, None, "news@test", batch_size=batch_size,
+                             rate_per_minute=0, journal_path=journal, use_tls=False,
+                             connections=connections)
+
+
+def _statuses(journal):
+    statuses = {}
+    for line in journal.read_text().splitlines():
+        entry = json.loads(line)
+        statuses[entry["rcpt"]] = entry["status"]
+    return statuses
+
+
+def test_socket_reconnects_after_421_and_dropped_connection(stub, tmp_path):
+    stub.script = {2: "421", 4: "drop"}
+    recipients = [f"r{i}@x" for i in range(5)]
+    prepared = mailer.PreparedMessage("<p>Big <b>news</b> today</p>", "FIZZBUZZ", "FizzBuzz <news@test>",
+                                      text="Big news today")
+    report = _socket_sender(stub, tmp_path / "j.jsonl").send_all(recipients, prepared.for_recipients,
+                                                                  progress=False)
+    assert stub.delivered() == recipients                      # each exactly once
+    assert report["sent"] == 5 and report["failed"] == 0
+    assert report["per_connection"][0]["reconnects"] == 2
+    assert set(_statuses(tmp_path / "j.jsonl").values()) == {"sent"}
+
+    # The bytes on the wire are a complete message addressed to that recipient
+    mail_from, rcpts, data = stub.messages[0]
+    message = message_from_bytes(data, policy=email_policy.default)
+    assert mail_from == "news@test" and rcpts == ["r0@x"]
+    assert message["To"] == "r0@x" and message["Subject"] == "FIZZBUZZ"
+    assert "<b>news</b>" in message.get_body(("html",)).get_content()
+    assert message.get_body(("plain",)).get_content().strip() == "Big news today"
+
+
+@pytest.mark.parametrize("connections,batch_size", [(1, 1), (2, 1), (1, 3)])
+def test_socket_resume_after_partial_failure(stub, tmp_path, connections, batch_size):
+    journal = tmp_path / "j.jsonl"
+    recipients = ["a@x", "c@x", "d@x", "bad@x", "busy@x", "e@x"]
+    stub.refuse = {"bad@x": 550}
+    stub.busy = {"busy@x": 99}                  # 451 on every attempt this run
+    stub.script = {1: "552"}                    # the first envelope is rejected as a whole
+
+    first = _socket_sender(stub, journal, connections, batch_size).send_all(recipients, _build, progress=False)
+    statuses = _statuses(journal)
+    assert statuses["bad@x"] == "refused" and statuses["busy@x"] == "failed"
+    rejected = [r for r, status in statuses.items() if status == "failed" and r != "busy@x"]
+    assert rejected                             # the 552 envelope's recipients
+    assert first["sent"] == len(stub.delivered()) == len(recipients) - 2 - len(rejected)
+
+    # Server recovered: the resume retries only the failed, never the sent or refused
+    stub.busy, stub.script = {}, {}
+    before = stub.delivered()
+    second = _socket_sender(stub, journal, connections, batch_size).send_all(recipients, _build, progress=False)
+    resent = sorted(set(stub.delivered()) - set(before))
+    assert resent == sorted(rejected + ["busy@x"])
+    assert second["skipped"] == len(recipients) - len(resent)
+    assert stub.delivered() == sorted(r for r in recipients if r != "bad@x")
@@ -0,0 +1,90 @@
+"""Compaction and windowed reads of the partitioned posts DB."""
+
+import json
+import time
+
+import posts_db
+
+
+def _write_db(path, posts):
+    path.write_text(json.dumps({"totalPosts": len(posts), "posts": posts}), encoding="utf-8")
+
+
+def test_compact_moves_old_posts_and_keeps_undated_hot(tmp_path):
+    db_path, archive = tmp_path / "posts-db.json", tmp_path / "archive"
+    now = time.time()
+    posts = [
+        {"postID": "new", "date": now - 3600},
+        {"postID": "old", "date": now - 40 * 86400},
+        {"postID": "ancient", "date": now - 400 * 86400},
+        {"postID": "undated"},
+        {"postID": "null-date", "date": None},
+    ]
+    _write_db(db_path, posts)
+
+    stats = posts_db.compact(hot_days=21, retain_weeks=52, db_path=db_path, archive_dir=archive)
+    assert stats["moved"] == 1 and stats["dropped"] == 1 and stats["kept_hot"] == 3
+
+    hot = {p["postID"] for p in json.loads(db_path.read_text(encoding="utf-8"))["posts"]}
+    assert hot == {"new", "undated", "null-date"}
+    assert len(list(archive.glob("posts-*.json.gz"))) == 1
+
+    posts_db.compact(hot_days=21, retain_weeks=52, db_path=db_path, archive_dir=archive)
+    hot = {p["postID"] for p in json.loads(db_path.read_text(encoding="utf-8"))["posts"]}
+    assert {"undated", "null-date"} <= hot
+
+    window = posts_db.load_posts(since=now - 60 * 86400, db_path=db_path, archive_dir=archive)
+    assert {p["postID"] for p in window} == {"new", "old"}
+
+
+def _dead_pid():
+    import subprocess
+    proc = subprocess.Popen(["true"])
+    proc.wait()
+    return proc.pid
+
+
+def test_stale_lock_is_broken(tmp_path):
+    db_path = tmp_path / "posts-db.json"
+    lock_path = db_path.with_name("posts-db.json.lock")
+    lock_path.write_text(json.dumps({"pid": _dead_pid(), "createdAt": int(time.time() * 1000)}))
+    with posts_db.db_lock(db_path, timeout=5):
+        assert json.loads(lock_path.read_text())["pid"] == posts_db.os.getpid()
+    assert not lock_path.exists()
+
+
+def test_late_breaker_leaves_a_fresh_lock_alone(tmp_path):
+    db_path = tmp_path / "posts-db.json"
+    lock_path = db_path.with_name("posts-db.json.lock")
+    stale = json.dumps({"pid": _dead_pid(), "createdAt": int(time.time() * 1000)})
+    lock_path.write_text(stale)
+
+    # Waiter B judged the lock stale; waiter A broke it first and now holds a fresh one
+    with posts_db.db_lock(db_path, timeout=5):
+        fresh = lock_path.read_text()
+        assert posts_db._break_stale_lock(lock_path, stale) is True
+        assert lock_path.read_text() == fresh
+
+
+def _locked_increment(db_path, counter, rounds):
+    for _ in range(rounds):
+        with posts_db.db_lock(db_path, timeout=30):
+            value = int(counter.read_text())
+            time.sleep(0.001)
+            counter.write_text(str(value + 1))
+
+
+def test_lock_excludes_concurrent_processes(tmp_path):
+    import multiprocessing
+
+    db_path = tmp_path / "posts-db.json"
+    db_path.with_name("posts-db.json.lock").write_text(
+        json.dumps({"pid": _dead_pid(), "createdAt": int(time.time() * 1000)}))
+    counter = tmp_path / "counter"
+    counter.write_text("0")
+    procs = [multiprocessing.Process(target=_locked_increment, args=(db_path, counter, 20)) for _ in range(4)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    assert int(counter.read_text()) == 80
@@ -0,0 +1,47 @@
+"""Content negotiation and conditional requests for the sample-send preview."""
+
+from pathlib import Path
+
+import pytest
+
+from sample_server import SampleEdition
+
+
+@pytest.fixture
+def edition():
+    return SampleEdition(Path("fizz_email_x.html"), "<html>" + "hello " * 200 + "</html>", "", "")
+
+
+@pytest.mark.parametrize("header,expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip; q=0.0", None),
+    ("gzip;q=0.00, deflate", None),
+    ("GZIP ; Q=0.5", "gzip"),
+    ("*", "gzip"),
+    ("*, gzip;q=0", None),
+    ("gzip;q=bogus", None),
+    ("", None),
+])
+def test_negotiate_gzip(edition, header, expected):
+    edition.encoded.pop("br", None)
+    body, encoding = edition.negotiate(header)
+    assert encoding == expected
+    assert (body == edition.body) == (expected is None)
+
+
+def test_negotiate_refused_brotli_falls_back(edition):
+    edition.encoded.setdefault("br", b"brotli bytes")
+    assert edition.negotiate("br;q=0.0, gzip")[1] == "gzip"
+    assert edition.negotiate("br, gzip")[1] == "br"
+
+
+def test_not_modified(edition):
+    etag = edition.etag
+    assert edition.not_modified(etag)
+    assert edition.not_modified(f'"other", W/{etag}')
+    assert edition.not_modified("*")
+    assert not edition.not_modified(f'"x{etag[1:]}')
+    assert not edition.not_modified(etag[:-2] + '"')
+    assert not edition.not_modified(f'"{etag}"')
+    assert not edition.not_modified("")